@@ -0,0 +1,245 @@
+# Event log analytics - reads eventLog files of any size a buffer at a time and sums them up
+# in one pass: what killed people and took their health, how each way of crossing the rivers
+# turned out, food and clothes along the trail by profession, and when games ended. Only the
+# games still under way are held in memory, never the events.
+#
+# Each file is summed up on its own (in parallel, one file per worker) and the summaries are
+# added together. Every file's summary is kept in an index with the file's size and time, so
+# asking again only reads files that are new or have changed.
+#
+#   python analytics.py events/
+#   python analytics.py server.bin events/*.bin --bucket 6
+
+import argparse
+import json
+import os
+from multiprocessing import Pool, cpu_count
+
+import batch
+import eventLog
+
+INDEX = os.path.join(batch.CACHE_DIR, 'eventIndex.json')
+INDEX_VERSION = 1  # bump when summaries change so old ones aren't reused
+EXTENSIONS = (".bin", ".jsonl")
+TRACKED = ("food", "clothes")  # the supplies followed along the trail
+
+
+class Game:
+    __slots__ = ("profession", "food", "clothes", "rivers")
+
+    def __init__(self, profession, food, clothes):
+        self.profession = profession
+        self.food = food
+        self.clothes = clothes
+        self.rivers = []  # how each river was crossed, in order
+
+
+def newSummary():
+    # every count is keyed by text so a summary is the same before and after JSON
+    return {
+        "events": 0,
+        "games": 0,
+        "unfinished": 0,  # games the log stops partway through
+        "deaths": {},  # cause -> people who died of it
+        "health": {},  # cause -> [times, total hp change]
+        "encounters": {},  # event -> times
+        "rivers": {},  # choices in order, comma separated -> {outcome: games}
+        "trails": {},  # profession -> {tick: [games, total food, total clothes]}
+        "endings": {},  # outcome -> {tick: games}
+    }
+
+
+def add(counts, key, amount=1):
+    counts[key] = counts.get(key, 0) + amount
+
+
+def summarise(path):
+    summary = newSummary()
+    games = {}  # game -> Game, only the ones still under way
+
+    def trailPoint(game, tick):
+        points = summary["trails"].setdefault(game.profession, {})
+        point = points.get(tick)
+        if point is None:
+            point = points[tick] = [0, 0, 0]
+        point[0] += 1
+        point[1] += game.food
+        point[2] += game.clothes
+
+    for event in eventLog.read(path):
+        summary["events"] += 1
+        kind = event["kind"]
+        game = games.get(event["game"])
+        if kind == "start":
+            game = games[event["game"]] = Game(event["profession"], event["food"], event["clothes"])
+            trailPoint(game, str(event["tick"]))
+        elif kind == "supplies" or kind == "purchase":
+            if game is not None and event["item"] in TRACKED:
+                item = event["item"]
+                setattr(game, item, getattr(game, item) + event["change" if kind == "supplies" else "amount"])
+        elif kind == "travelled":
+            if game is not None:
+                trailPoint(game, str(event["tick"]))
+        elif kind == "died":
+            add(summary["deaths"], event["cause"])
+        elif kind == "health":
+            health = summary["health"].setdefault(event["cause"], [0, 0])
+            health[0] += 1
+            health[1] += event["change"]
+        elif kind == "encounter":
+            add(summary["encounters"], event["event"])
+        elif kind == "river":
+            if game is not None:
+                game.rivers.append(event["choice"])
+        elif kind == "ended":
+            outcome = event["outcome"]
+            summary["games"] += 1
+            add(summary["endings"].setdefault(outcome, {}), str(event["tick"]))
+            if game is not None:
+                add(summary["rivers"].setdefault(",".join(game.rivers) or "none", {}), outcome)
+                del games[event["game"]]
+    summary["unfinished"] = len(games)
+    return summary
+
+
+def merge(into, summary):
+    for key in ("events", "games", "unfinished"):
+        into[key] += summary[key]
+    for key in ("deaths", "encounters"):
+        for name, count in summary[key].items():
+            add(into[key], name, count)
+    for cause, (times, total) in summary["health"].items():
+        health = into["health"].setdefault(cause, [0, 0])
+        health[0] += times
+        health[1] += total
+    for key in ("rivers", "endings"):
+        for name, counts in summary[key].items():
+            merged = into[key].setdefault(name, {})
+            for inner, count in counts.items():
+                add(merged, inner, count)
+    for profession, points in summary["trails"].items():
+        merged = into["trails"].setdefault(profession, {})
+        for tick, values in points.items():
+            point = merged.setdefault(tick, [0, 0, 0])
+            for at, value in enumerate(values):
+                point[at] += value
+    return into
+
+
+def logFiles(paths):
+    # the files named and every event log in the folders named
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(EXTENSIONS):
+                    found.append(os.path.join(path, name))
+        else:
+            found.append(path)
+    return found
+
+
+def fileKey(path):
+    info = os.stat(path)
+    return [info.st_size, info.st_mtime_ns]
+
+
+def loadIndex(path=INDEX):
+    try:
+        with open(path) as readFile:
+            index = json.load(readFile)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if index.get("version") != INDEX_VERSION:
+        return {}
+    return index["files"]
+
+
+def saveIndex(files, path=INDEX):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + '.tmp', 'w') as writeFile:
+        json.dump({"version": INDEX_VERSION, "files": files}, writeFile)
+    os.replace(path + '.tmp', path)  # never leave half an index behind
+
+
+def analyse(paths, workers=None, index=INDEX):
+    # the summary of every event log in paths, reading only the ones the index doesn't know
+    files = logFiles(paths)
+    known = {} if index is None else loadIndex(index)
+    keys = {os.path.abspath(path): fileKey(path) for path in files}
+    stale = [path for path in keys if path not in known or known[path]["key"] != keys[path]]
+    if stale:
+        workers = min(workers or cpu_count(), len(stale))
+        if workers > 1:
+            with Pool(workers) as pool:
+                summaries = pool.map(summarise, stale, chunksize=1)
+        else:
+            summaries = [summarise(path) for path in stale]
+        for path, summary in zip(stale, summaries):
+            known[path] = {"key": keys[path], "summary": summary}
+        if index is not None:
+            saveIndex(known, index)
+    total = newSummary()
+    for path in keys:
+        merge(total, known[path]["summary"])
+    return total
+
+
+def share(count, total):
+    return f"{count / total:.1%}" if total else "-"
+
+
+def report(summary, bucket=12):
+    print(f"{summary['games']} games, {summary['events']} events, {summary['unfinished']} unfinished")
+
+    died = sum(summary["deaths"].values())
+    print(f"\n{'DIED OF':<18}{'PEOPLE':>8}{'SHARE':>8}")
+    for cause, count in sorted(summary["deaths"].items(), key=lambda item: -item[1]):
+        print(f"{cause:<18}{count:>8}{share(count, died):>8}")
+
+    print(f"\n{'HEALTH FROM':<18}{'TIMES':>8}{'TOTAL HP':>10}{'EACH':>7}")
+    for cause, (times, total) in sorted(summary["health"].items(), key=lambda item: item[1][1]):
+        print(f"{cause:<18}{times:>8}{total:>10}{total / times:>7.0f}")
+
+    outcomes = list(batch.OUTCOMES) + sorted(set(outcome for counts in summary["rivers"].values()
+                                                 for outcome in counts) - set(batch.OUTCOMES))
+    print(f"\n{'RIVERS':<18}{'GAMES':>8}" + "".join(f"{outcome.upper():>11}" for outcome in outcomes))
+    for choices, counts in sorted(summary["rivers"].items(), key=lambda item: -sum(item[1].values())):
+        games = sum(counts.values())
+        print(f"{choices:<18}{games:>8}" + "".join(f"{share(counts.get(o, 0), games):>11}" for o in outcomes))
+
+    print(f"\n{'PROFESSION':<11}{'TICK':>6}{'TRAVELLING':>12}{'FOOD':>8}{'CLOTHES':>9}")
+    for profession, points in sorted(summary["trails"].items()):
+        for tick in sorted(points, key=int):
+            games, food, clothes = points[tick]
+            if int(tick) % bucket == 0:
+                print(f"{profession:<11}{tick:>6}{games:>12}{food / games:>8.1f}{clothes / games:>9.1f}")
+
+    print(f"\n{'ENDED':<11}{'TICKS':>10}{'GAMES':>8}")
+    for outcome, ticks in sorted(summary["endings"].items()):
+        buckets = {}
+        for tick, count in ticks.items():
+            add(buckets, int(tick) // bucket * bucket, count)
+        most = max(buckets.values())
+        for start in sorted(buckets):
+            bar = "#" * max(1, round(30 * buckets[start] / most))
+            print(f"{outcome:<11}{f'{start}-{start + bucket - 1}':>10}{buckets[start]:>8}  {bar}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sum up eventLog files in one pass")
+    parser.add_argument("paths", nargs="+", help="event logs, or folders of them")
+    parser.add_argument("--workers", type=int, default=cpu_count())
+    parser.add_argument("--bucket", type=int, default=12, help="ticks per row of the trail and ending tables")
+    parser.add_argument("--no-index", action="store_true", help=f"read every file again and leave {INDEX} alone")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+    summary = analyse(args.paths, args.workers, None if args.no_index else INDEX)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        report(summary, args.bucket)
+
+
+if __name__ == "__main__":
+    main()
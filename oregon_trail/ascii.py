@@ -1,232 +1,40 @@
-wagon = r'''⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀
-                    ⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢀⣠⣤⣤⡀⠀⠀⠀
-                    ⠀⠀⠀⢀⣤⠀⢤⣀⣀⣀⣀⣴⠀⣶⣦⣤⣤⣤⣶⠀⣾⣿⣿⣿⣿⡿⠁⠀⠀⠀
-                    ⠀⠘⣿⣿⣿⡇⢸⣿⣿⣿⣿⣿⠀⣿⣿⣿⣿⣿⡇⢰⣿⣿⣿⣿⡿⠁⠀⠀⠀⠀
-                    ⠀⠀⢹⣿⣿⣷⠀⣿⣿⣿⣿⣿⠀⣿⣿⣿⣿⣿⡇⣼⣿⣿⣿⣿⠃⠀⠀⠀⠀⠀
-                    ⠀⠀⠀⣿⣿⣿⠀⢿⣿⣿⣿⣿⠀⣿⣿⣿⣿⣿⠃⣿⣿⣿⣿⡏⠀⠀⠀⠀⠀⠀
-                    ⠀⠀⠀⣿⣿⣿⡄⢸⣿⣿⣿⣿⠀⣿⣿⣿⣿⣿⠀⣿⣿⣿⣿⠁⠀⠀⠀⠀⠀⠀
-                    ⠀⠀⠀⣿⣿⣿⡇⢸⣿⣿⣿⣿⠀⣿⣿⣿⣿⣿⠀⣿⣿⣿⣿⠀⣶⠀⠀⠀⠀⠀
-                    ⠀⠀⠘⠛⠛⠛⠃⠘⠛⠛⠛⠛⠀⠛⠛⠛⠛⠛⠀⠛⠛⠛⠛⠀⠛⠛⢿⠀⠀⠀
-                    ⠀⠀⣿⠏⡀⠲⡇⢸⠖⢀⠙⣿⣿⣿⡟⢁⠐⢾⠀⠗⢀⠙⢿⣿⣿⣧⣤⣤⡄⠀
-                    ⠀⠀⠋⠀⠛⠂⠀⠀⠐⠛⠀⠘⠛⠛⠀⠚⠓⠀⠀⠀⠛⠃⠘⠛⠛⠁⠀⠀⠀⠀
-                    ⠀⠀⠀⠀⠛⢁⡄⢰⣌⠛⠀⠀⠀⠀⠀⠙⢁⣤⠀⣄⠙⠁⠀⠀⠀⠀⠀⠀⠀⠀
-                    ⠀⠀⠀⠀⠀⠀⠁⠈⠀⠀⠀⠀⠀⠀⠀⠀⠀⠉⠀⠁⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀
-'''
+# ASCII art - each piece lives in its own file in art/ and is only read the first time it
+# is shown, so importing this module (engine and every batch worker do, through map)
+# reads nothing. ascii.wagon, ascii.deer and the rest still work as before.
+#
+# encoded() keeps the pieces already shown as terminal bytes, so showing one again is a
+# single write with nothing to convert.
 
-title = r'''
- _____  _               ___                                   _____              _  _ 
-/__   \| |__    ___    /___\ _ __  ___   __ _   ___   _ __   /__   \ _ __  __ _ (_)| |
-  / /\/| '_ \  / _ \  //  //| '__|/ _ \ / _` | / _ \ | '_ \    / /\/| '__|/ _` || || |
- / /   | | | ||  __/ / \_// | |  |  __/| (_| || (_) || | | |  / /   | |  | (_| || || |
- \/    |_| |_| \___| \___/  |_|   \___| \__, | \___/ |_| |_|  \/    |_|   \__,_||_||_|
-                                        |___/                                         
-'''
+import os
 
-fort_boise = r'''
- ___  __   __  ___     __   __     __   ___
-|__  /  \ |__)  |     |__) /  \ | /__` |__ 
-|    \__/ |  \  |     |__) \__/ | .__/ |___'''
+ART_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'art')
 
-oregon_city = r''' __   __   ___  __   __           __    ___    
-/  \ |__) |__  / _` /  \ |\ |    /  ` |  |  \ /
-\__/ |  \ |___ \__> \__/ | \|    \__, |  |   | 
-'''
+NAMES = ("wagon", "title", "fort_boise", "oregon_city", "banker2", "carpenter", "farmer", "deer", "fort_1",
+         "fort_2", "river", "gravestone", "celebrate", "perished", "no_cows", "starved", "froze")
 
-banker2 = '''
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⣀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⢯⠙⠩⠀⡇⠊⠽⢖⠆⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠱⣠⠀⢁⣄⠔⠁⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⣷⣶⣾⣾⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⢀⡔⠙⠈⢱⡟⣧⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⡠⠊⠀⠀⣀⡀⠀⠘⠕⢄⠀⠀⠀⠀⠀
-⠀⠀⠀⢀⠞⠀⠀⢀⣠⣿⣧⣀⠀⠀⢄⠱⡀⠀⠀⠀
-⠀⠀⡰⠃⠀⠀⢠⣿⠿⣿⡟⢿⣷⡄⠀⠑⢜⢆⠀⠀
-⠀⢰⠁⠀⠀⠀⠸⣿⣦⣿⡇⠀⠛⠋⠀⠨⡐⢍⢆⠀
-⠀⡇⠀⠀⠀⠀⠀⠙⠻⣿⣿⣿⣦⡀⠀⢀⠨⡒⠙⡄
-⢠⠁⡀⠀⠀⠀⣤⡀⠀⣿⡇⢈⣿⡷⠀⠠⢕⠢⠁⡇
-⠸⠀⡕⠀⠀⠀⢻⣿⣶⣿⣷⣾⡿⠁⠀⠨⣐⠨⢀⠃
-⠀⠣⣩⠘⠀⠀⠀⠈⠙⣿⡏⠁⠀⢀⠠⢁⡂⢉⠎⠀
-⠀⠀⠈⠓⠬⢀⣀⠀⠀⠈⠀⠀⠀⢐⣬⠴⠒⠁⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠈⠉⠉⠉⠉⠉⠀⠀⠀⠀⠀⠀⠀
-'''
+ART = {}  # name -> text, filled in as pieces are used
+ENCODED = {}  # (name, newline) -> bytes
 
-carpenter = r'''
-                                           __
-                               _____....--' .'
-                     ___...---'._ o      -`(
-           ___...---'            \   .--.  `\
- ___...---'                      |   \   \ `|
-|                                |o o |  |  |
-|                                 \___'.-`.  '.
-|                                      |   `---'
-'^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^' 
 
-'''
+def art(name):
+    text = ART.get(name)
+    if text is None:
+        if name not in NAMES:
+            raise KeyError(f"No art called {name}")
+        with open(os.path.join(ART_DIR, name + '.txt'), encoding='utf-8', newline='') as readFile:
+            text = ART[name] = readFile.read()
+    return text
 
-farmer = r'''
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢰⣿⣿⣿⣆⣀⠀⠀⠀⠀⢠⠀⡘⠀⡄⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⠰⠞⢻⣿⣿⣿⡏⠉⠉⠀⠀⢀⣾⣠⡇⣸⠃⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⢀⣤⣌⣿⣿⡿⠁⠀⠀⠀⠀⠈⠉⣿⡟⠿⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⣠⣾⠿⣿⣿⣿⣿⣿⣶⣄⠀⠀⣠⣾⣿⠃⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠠⣾⣿⡃⠀⣿⣿⣿⣿⣿⠙⢿⣷⣾⡿⣻⡇⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠈⠛⢿⣶⣿⣿⣿⣿⡿⠀⠀⠉⠁⠀⣿⠁⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠉⣿⣿⣿⣿⡇⠀⠀⠀⠀⢸⡏⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢠⣿⣿⣿⣿⣷⠀⠀⠀⠀⣾⠃⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⢸⣿⣿⢻⣿⣿⡆⠀⠀⢰⡿⠀⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⣿⣿⡏⠀⣿⣿⣷⠀⠀⣼⡇⠀⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⢀⣿⣿⠁⠀⠸⣿⣿⡄⠀⣿⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⢸⣿⡟⠀⠀⠀⢿⣿⣧⢠⡏⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⣾⣿⠃⠀⠀⠀⠘⣿⣿⣾⠃⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀
-⠀⠀⠀⠀⠀⠀⠀⠀⠀⠉⠉⠀⠀⠀⠀⠀⠉⠉⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀⠀
-'''
 
-deer = r"""
-        ,/  \.
-       |(    )|
-  \`-._:,\  /.;_,-'/
-   `.\_`\')(`/'_/,'
-       )/`.,'\(
-       |.    ,|
-       :6)  (6;
-        \`\ _(\
-         \._'; `.___...---..________...------._
-          \   |   ,'   .  .     .       .     .`:.
-           \`.' .  .         .   .   .     .   . \\
-            `.       .   .  \  .   .   ..::: .    ::
-              \ .    .  .   ..::::::::''  ':    . ||
-               \   `. :. .:'            \  '. .   ;;
-                `._  \ ::: ;           _,\  :.  |/(
-                   `.`::: /--....---''' \ `. :. :`\`
-                    | |:':               \  `. :.\
-                    | |' ;                \  (\  .\
-                    | |.:                  \  \`.  :
-                    |.| |                   ) /  :.|
-                    | |.|                  /./   | |
-                    |.| |                 / /    | |
-                    | | |                /./     |.|
-                    ;_;_;              ,'_/      ;_|
-                   '-/_(              '--'      /,',
-"""
-
-fort_1 = r'''
-                  p                  p         p
-                 /\     p      p    /\        /\
-                /__\   /\_____/\   /__\      /__\
-                |. |_=_|. . . .|_=_=_=_=_=_=_|. |
-                |. |. .|  ___  |. . . . . . .|. |
-                |. |   | |   | |             |. |
-              __|__|___|_|___|_|_____________|__|__
-             /          /   /                      \
-
-'''
-
-fort_2 = r'''
-                             -|             |-
-         -|                  [-_-_-_-_-_-_-_-]                  |-
-         [-_-_-_-_-]          |             |          [-_-_-_-_-]
-          | o   o |           [  0   0   0  ]           | o   o |
-           |     |    -|       |           |       |-    |     |
-           |     |_-___-___-___-|         |-___-___-___-_|     |
-           |  o  ]              [    0    ]              [  o  |
-           |     ]   o   o   o  [ _______ ]  o   o   o   [     | ----__________
-_____----- |     ]              [ ||||||| ]              [     |
-           |     ]              [ ||||||| ]              [     |
-       _-_-|_____]--------------[_|||||||_]--------------[_____|-_-_
-      ( (__________------------_____________-------------_________) )
-'''
-
-river = '''
-``'-.,_,.-'``'-.,_,.='``'-.,_,.-'``'-.,_,.='``
-``'-.,_,.-'``'-.,_,.='``'-.,_,.-'``'-.,_,.='``
-``'-.,_,.-'``'-.,_,.='``'-.,_,.-'``'-.,_,.='``
-``'-.,_,.-'``'-.,_,.='``'-.,_,.-'``'-.,_,.='``
-'''
-
-gravestone = r'''
-                 ______
-           _____/      \\_____
-          |                  ||
-          |  _     ___   _   ||
-          | | \     |   | \  ||
-          | |  |    |   |  | ||
-          | |_/     |   |_/  ||
-          | | \     |   |    ||
-          | |  \    |   |    ||
-          | |   \. _|_. | .  ||
-          |                  ||
-  *       | *   **    * **   |**      **
-   \))ejm96/.,(//,,..,,\||(,,.,\\,.((//
-'''
-
-celebrate = r'''
-                                   .''.       
-       .''.      .        *''*    :_\/_:     . 
-      :_\/_:   _\(/_  .:.*_\/_*   : /\ :  .'.:.'.
-  .''.: /\ :   ./)\   ':'* /\ * :  '..'.  -=:o:=-
- :_\/_:'.:::.    ' *''*    * '.\'/.' _\(/_'.':'.'
- : /\ : :::::     *_\/_*     -= o =-  /)\    '  *
-  '..'  ':::'     * /\ *     .'/.\'.   '
-      *            *..*         :
-        *
-        *
-'''
-
-perished = r'''
-⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿
-⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿⣿
-⣿⣿⣿⡿⠛⠉⠀⣤⠀⠉⠛⢿⣿⣿⣿⣿⣿⣿⡿⠛⠉⠀⣤⠀⠉⠛⢿⣿⣿⣿
-⣿⣿⣿⡇⣤⣤⣤⣿⣤⣤⣤⢸⣿⣿⣿⣿⣿⣿⡇⣤⣤⣤⣿⣤⣤⣤⢸⣿⣿⣿
-⣿⠛⠿⢷⣌⡉⠉⣿⠉⢉⣡⡾⠿⠛⠛⠛⠛⠿⢷⣌⡉⠉⣿⠉⢉⣡⡾⠿⠛⣿
-⣿⠀⠀⠀⢹⣧⠀⣿⠀⣼⡏⠀⠀⠀⢰⡆⠀⠀⠀⢹⣧⠀⣿⠀⣼⡏⠀⠀⠀⣿
-⣿⠿⠿⠇⢸⣿⠀⣿⠀⣿⡇⠸⠿⠿⢿⡿⠿⠿⠇⢸⣿⠀⣿⠀⣿⡇⠸⠿⠿⣿
-⣿⠀⠀⣠⣼⡿⠶⠶⠶⢿⣧⣄⠀⠀⢸⡇⠀⠀⣠⣼⡿⠶⠶⠶⢿⣧⣄⠀⠀⣿
-⣿⢠⡞⠉⠀⠀⠀⣤⠀⠀⠀⠉⢳⡄⢸⡇⢠⡞⠉⠀⠀⠀⣤⠀⠀⠀⠉⢳⡄⣿
-⣿⢸⡇⢀⣤⣤⣤⣿⣤⣤⣤⡀⢸⡇⢸⡇⢸⡇⢀⣤⣤⣤⣿⣤⣤⣤⡀⢸⡇⣿
-⣿⣼⡇⠀⠀⠀⠀⣿⠀⠀⠀⠀⢸⣧⣤⣤⣼⡇⠀⠀⠀⠀⣿⠀⠀⠀⠀⢸⣧⣿
-⣿⣿⡇⠀⠀⠀⠀⣿⠀⠀⠀⠀⢸⣿⣿⣿⣿⡇⠀⠀⠀⠀⣿⠀⠀⠀⠀⢸⣿⣿
-⣿⣿⡇⠀⠀⠀⠀⣿⠀⠀⠀⠀⢸⣿⣿⣿⣿⡇⠀⠀⠀⠀⣿⠀⠀⠀⠀⢸⣿⣿
-⣿⣿⡇⠀⠀⠀⠀⠛⠀⠀⠀⠀⢸⣿⣿⣿⣿⡇⠀⠀⠀⠀⠛⠀⠀⠀⠀⢸⣿⣿
-⣿⣿⣷⣶⣶⣶⣶⣶⣶⣶⣶⣶⣾⣿⣿⣿⣿⣷⣶⣶⣶⣶⣶⣶⣶⣶⣶⣾⣿⣿
-'''
-
-no_cows = r'''
-            (__)   
-            (xx)     
-     /-------\/      
-    / |     ||     
-   *  ||----||     
-      ^^    ^^  
-'''
-
-starved = r'''
-              _______
-           .-"       "-.
-          /             \
-         /               \
-         |   .--. .--.   |
-         | )/   | |   \( |
-         |/ \__/   \__/ \|
-         /      /^\      \
-         \__    '='    __/
-           |\         /|
-           |\''H+H+H''/|
-      jgs  \ `"""""""` /
-            `-._____.-'
-'''
-
-froze = r'''
-                .-"``'"-.
-               /   x x   \
-               \  ,.V.,  /
-         >-._  /'----'--`\  _.-<
-             `|     o     |`
-              \     o     /
-              /'--'-'----'\
-             |      o      |
-             |             |
-      -.--.---\           /---.-
-               '--'---'--`
-'''
+def encoded(name, newline="\n"):
+    data = ENCODED.get((name, newline))
+    if data is None:
+        data = ENCODED[(name, newline)] = art(name).replace("\n", newline).encode("utf-8")
+    return data
 
 
+def __getattr__(name):
+    # ascii.wagon and friends, read on first use
+    if name in NAMES:
+        return art(name)
+    raise AttributeError(f"module 'ascii' has no attribute '{name}'")
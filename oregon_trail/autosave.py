@@ -0,0 +1,125 @@
+# Background autosave - the game hands over the bytes to save and carries on. One writer
+# thread serves every game in the process: it keeps only the newest bytes for each save
+# file and writes each file at most once every interval seconds. Closing a save has the
+# writer thread write it straight away and waits for that, so on the server only the
+# closing game waits - AutoSaver.closing() - not the event loop.
+# Every write goes to a temp file that is fsynced and renamed over the save, so a crash
+# leaves either the old save or the new one, never half of one.
+
+import heapq
+import os
+import threading
+from time import monotonic
+
+import metrics
+
+
+def writeAtomic(path, data):
+    temp = path + '.tmp'
+    with open(temp, 'wb') as writeBin:
+        writeBin.write(data)
+        writeBin.flush()
+        os.fsync(writeBin.fileno())
+    os.replace(temp, path)
+    try:  # make the rename itself survive a crash
+        folder = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:  # Windows can't open folders
+        return
+    try:
+        os.fsync(folder)
+    except OSError:
+        pass
+    finally:
+        os.close(folder)
+
+
+class Writer:
+    def __init__(self, clock=monotonic):
+        self.clock = clock
+        self.pending = {}  # path -> newest bytes not written yet
+        self.due = []  # heap of (when the path may be written, path)
+        self.lastWrite = {}  # path -> when it was last written
+        self.writing = set()  # paths being written right now
+        self.errors = {}
+        self.writes = {}
+        self.changed = threading.Condition()
+        self.thread = None
+
+    def mark(self, path, data, interval):
+        # never blocks on the disk - replaces whatever was waiting to be written to path
+        with self.changed:
+            if path not in self.pending:
+                last = self.lastWrite.get(path)
+                heapq.heappush(self.due, (self.clock() if last is None else last + interval, path))
+            self.pending[path] = data
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+                self.thread.start()
+            self.changed.notify_all()
+
+    def run(self):
+        while True:
+            with self.changed:
+                while True:
+                    while self.due and self.due[0][1] not in self.pending:
+                        heapq.heappop(self.due)  # already written
+                    if self.due:
+                        wait = self.due[0][0] - self.clock()
+                        if wait <= 0:
+                            break
+                        self.changed.wait(wait)  # later marks just replace pending meanwhile
+                    else:
+                        self.changed.wait()
+                _, path = heapq.heappop(self.due)
+                data = self.pending.pop(path)
+                self.writing.add(path)
+            self.write(path, data)
+
+    def write(self, path, data):
+        try:
+            with metrics.span("saveWrite"):
+                writeAtomic(path, data)
+            self.writes[path] = self.writes.get(path, 0) + 1
+        except OSError as err:
+            self.errors[path] = err
+        with self.changed:
+            self.lastWrite[path] = self.clock()
+            self.writing.discard(path)
+            self.changed.notify_all()
+
+    def flush(self, path):
+        # has the writer thread write path's pending bytes now, waits for it and forgets about
+        # the path - the writing is never done on the calling thread
+        with self.changed:
+            if path in self.pending:
+                heapq.heappush(self.due, (self.clock(), path))  # due now, whatever the interval
+                self.changed.notify_all()
+            while path in self.pending or path in self.writing:
+                self.changed.wait()
+            self.lastWrite.pop(path, None)
+            self.writes.pop(path, None)
+            error = self.errors.pop(path, None)
+        if error is not None:
+            raise error
+
+
+WRITER = Writer()  # shared by every game in the process
+
+
+class AutoSaver:
+    def __init__(self, path, interval=5.0, writer=WRITER):
+        self.path = path
+        self.interval = interval
+        self.writer = writer
+
+    def mark(self, data):
+        self.writer.mark(self.path, data, self.interval)
+
+    def close(self):
+        # writes whatever is still waiting, blocking until it's on disk - on an event loop
+        # await closing() instead
+        self.writer.flush(self.path)
+
+    async def closing(self):
+        import asyncio  # only ever called on a loop, so already loaded
+        await asyncio.to_thread(self.writer.flush, self.path)
@@ -0,0 +1,168 @@
+# Monte Carlo balance runner - plays thousands of headless trails per profession and
+# supply mix across every core and reports how the games ended. The headless rules never
+# look at money or health, so a profession only makes a difference through what it can
+# afford - each mix is scaled up to the profession's budget. With --events every
+# trail's eventLog events are streamed to a folder, one file per chunk of trails.
+#
+#   python batch.py --trails 10000 --seed 1
+#   python batch.py --trails 100000 --events events --events-format bin
+
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter
+from functools import partial
+from multiprocessing import Pool
+
+import engine
+import eventLog
+import streams
+
+OUTCOMES = ("oregon", "starved", "stuck", "frozen", "grim fate")
+
+CACHE_DIR = 'batch_cache'
+
+# (oxen, boxes of ammo, clothes, lbs of food) - every mix fits the farmer's $400, and is
+# scaled up for professions with more money
+MIX_BUDGET = engine.PROFESSIONS["Farmer"]["money"]
+SUPPLY_MIXES = {
+    "tips": (6, 5, 8, 150),  # what leavingTips recommends
+    "light": (2, 2, 5, 100),
+    "oxen heavy": (10, 2, 5, 100),
+    "food heavy": (3, 0, 4, 300),
+}
+
+CHUNK = 2000  # trails per task handed to a worker
+
+
+def riverPolicy(choice, state, asked):
+    # travels without the menu and always crosses rivers the same way
+    return choice if asked == "river" else None
+
+
+def runChunk(config, chunk, trails, events=None):
+    # every trail has its own streams.Streams, so the totals don't depend on how the work is
+    # split into chunks or how the pool schedules them - events is the file this chunk's
+    # events are logged to
+    policy = partial(riverPolicy, config["river"])
+    counts = Counter()
+    if events is not None:
+        eventLog.start(events)
+    try:
+        for trail in range(chunk * CHUNK, chunk * CHUNK + trails):
+            state = engine.newTrail(config["profession"], config["supplies"])
+            counts[engine.runTrail(state, policy, streams.Streams(config["seed"], "batch", trail))] += 1
+    finally:
+        if events is not None:
+            eventLog.stop()
+    return counts
+
+
+def cacheKey(config):
+    # the encounter and landmark tables are part of the key so editing them never reuses old
+    # results, and so is the version of the random numbers
+    landmarks = [engine.LANDMARKS[row] for row in sorted(engine.LANDMARKS)]
+    text = json.dumps([config, engine.ENCOUNTERS["events"], landmarks, streams.VERSION], sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def eventsPath(folder, config, chunk, extension):
+    return os.path.join(folder, f"{cacheKey(config)[:16]}-{chunk:05}.{extension}")
+
+
+def loadCached(config):
+    try:
+        with open(os.path.join(CACHE_DIR, cacheKey(config) + '.json')) as readFile:
+            return json.load(readFile)["counts"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def saveCached(config, counts):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, cacheKey(config) + '.json')
+    with open(path + '.tmp', 'w') as writeFile:
+        json.dump({"config": config, "counts": counts}, writeFile)
+    os.replace(path + '.tmp', path)  # never leave half a result behind
+
+
+def runConfigs(configs, pool=None, events=None, eventsFormat="jsonl"):
+    # returns {index: outcome counts} for every config, only simulating what isn't cached -
+    # with an events folder everything is simulated, since a cached result has no events
+    results = {}
+    tasks = []
+    if events is not None:
+        os.makedirs(events, exist_ok=True)
+    for index, config in enumerate(configs):
+        cached = loadCached(config) if events is None else None
+        if cached is not None:
+            results[index] = cached
+            continue
+        for chunk, start in enumerate(range(0, config["trails"], CHUNK)):
+            path = None if events is None else eventsPath(events, config, chunk, eventsFormat)
+            tasks.append((index, (config, chunk, min(CHUNK, config["trails"] - start), path)))
+
+    if tasks:
+        ownPool = pool is None
+        if ownPool:
+            pool = Pool()
+        try:
+            chunkCounts = pool.starmap(runChunk, [args for _, args in tasks])
+        finally:
+            if ownPool:
+                pool.close()
+                pool.join()
+        totals = {}
+        for (index, _), counts in zip(tasks, chunkCounts):
+            totals.setdefault(index, Counter()).update(counts)
+        for index, counts in totals.items():
+            results[index] = {outcome: counts[outcome] for outcome in OUTCOMES}
+            saveCached(configs[index], results[index])
+    return results
+
+
+def scaled(profession, supplies):
+    # a mix bought with the profession's money instead of MIX_BUDGET, rounded down so it fits
+    money = engine.PROFESSIONS[profession]["money"]
+    return [amount * money // MIX_BUDGET for amount in supplies]
+
+
+def sweep(trails, seed, river="ford", mixes=SUPPLY_MIXES, events=None, eventsFormat="jsonl"):
+    configs = []
+    for profession in engine.PROFESSIONS:
+        for mixName, supplies in mixes.items():
+            configs.append({
+                "profession": profession,
+                "mix": mixName,
+                "supplies": scaled(profession, supplies),
+                "river": river,
+                "trails": trails,
+                "seed": seed,
+            })
+    results = runConfigs(configs, events=events, eventsFormat=eventsFormat)
+    return [(config, results[index]) for index, config in enumerate(configs)]
+
+
+def report(rows):
+    print(f"{'PROFESSION':<11}{'MIX':<12}" + "".join(f"{outcome.upper():>11}" for outcome in OUTCOMES))
+    for config, counts in rows:
+        total = sum(counts.values()) or 1
+        line = f"{config['profession']:<11}{config['mix']:<12}"
+        line += "".join(f"{counts[outcome] / total:>11.1%}" for outcome in OUTCOMES)
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many Oregon Trail games")
+    parser.add_argument("--trails", type=int, default=10000, help="trails per profession and supply mix")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--river", choices=engine.RIVER_CHOICES, default="ford")
+    parser.add_argument("--events", metavar="FOLDER", help="log every trail's events here")
+    parser.add_argument("--events-format", choices=("jsonl", "bin"), default="jsonl")
+    args = parser.parse_args()
+    report(sweep(args.trails, args.seed, args.river, events=args.events, eventsFormat=args.events_format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# Benchmarks for the game's hot paths - the rules in engine.py, the store, saving and
+# loading, drawing the map and header, and whole trails played headless. Each benchmark
+# is timed a few times and the best run counts, so a busy machine doesn't look like a
+# slowdown. Results are compared with benchBaselines.json and anything more than
+# --tolerance slower is reported, with exit code 1.
+#
+#   python bench.py                  compare with the baselines
+#   python bench.py hunt trails      only some benchmarks
+#   python bench.py --save           store this run as the baselines and add it to benchHistory.jsonl
+#
+# Baselines only mean something on the machine they were saved on, save new ones after
+# moving to another.
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import console
+import engine
+import gameState
+import main
+import map
+import saveFormat
+import streams
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINES = os.path.join(HERE, 'benchBaselines.json')
+HISTORY = os.path.join(HERE, 'benchHistory.jsonl')
+
+TOLERANCE = 0.25  # how much slower than the baseline still passes
+SUPPLIES = (6, 5, 8, 150)  # what leavingTips recommends
+PARTY = ("Ann", "Bob", "Cal", "Dee")
+
+# one visit to the store - oxen, ammo, clothes, food, then leave
+STORE_VISIT = ("1", "4", "2", "5", "3", "5", "4", "200", "5")
+
+
+class ScriptConsole(console.Console):
+    # answers every prompt from a list and throws the output away
+    def __init__(self, answers):
+        super().__init__()
+        self.answers = itertools.cycle(answers)
+
+    def write(self, text):
+        pass
+
+    async def typeOut(self, text, delay=0.03):
+        pass
+
+    async def nextLine(self):
+        return next(self.answers)
+
+
+def freshTrail():
+    return engine.newTrail("Banker", SUPPLIES)
+
+
+def benchEncounter(n):
+    rng = streams.Streams(1)
+    state = freshTrail()
+    player, inventory, party = state.player, state.inventory, state.party
+    for _ in range(n):
+        if len(party) < 2:
+            party[:] = PARTY  # nobody left to have an encounter with
+        engine.encounter(player, inventory, party, rng)
+
+
+def benchHunt(n):
+    rng = streams.Streams(1)
+    inventory = freshTrail().inventory
+    for _ in range(n):
+        inventory.ammo = 100
+        engine.hunt(inventory, rng)
+
+
+def benchCrossRiver(n):
+    rng = streams.Streams(1)
+    state = freshTrail()
+    player, inventory, party = state.player, state.inventory, state.party
+    choices = itertools.cycle(engine.RIVER_CHOICES)
+    for _ in range(n):
+        if len(party) < 2:
+            party[:] = PARTY
+        inventory.ammo = 50
+        player.money = 1000
+        engine.crossRiver(next(choices), inventory, party, player, state.date, rng)
+
+
+def benchPurchase(n):
+    player = engine.newPlayer("Banker", "Banker")
+    inventory = gameState.Inventory()
+    items = itertools.cycle(gameState.ITEMS)
+    for _ in range(n):
+        player.money = 1000
+        engine.purchase(player, inventory, next(items), 3)
+
+
+def benchSupplyStore(n):
+    # the whole store menu with a scripted player
+    con = ScriptConsole(STORE_VISIT)
+
+    async def visits():
+        for _ in range(n):
+            await main.supplyStore(con, engine.newPlayer("Banker", "Banker"))
+
+    asyncio.run(visits())
+
+
+def benchSaveLoad(n):
+    # saveGame and loadGame through a real file
+    state = freshTrail()
+    folder = tempfile.mkdtemp(prefix="bench-")
+    path = os.path.join(folder, main.BIN_FILE)
+    try:
+        for _ in range(n):
+            main.saveGame(state.miles, state.inventory, state.date, state.player, state.party, state.map,
+                          saveFile=path)
+            main.loadGame(path)
+    finally:
+        os.remove(path)
+        os.rmdir(folder)
+
+
+def benchSaveFormat(n):
+    # the same round trip without the disk
+    state = freshTrail()
+    for _ in range(n):
+        saveFormat.decode(saveFormat.encode(state.miles, state.inventory, state.date, state.player, state.party,
+                                            state.map))
+
+
+def benchMap(n):
+    # moving the wagon, then drawing the map the way the header and the menu do
+    m = freshTrail().map
+    for i in range(n):
+        map.setPlayerPos(m, i % m.size, engine.START_COL)
+        map.renderMap(m)
+        map.mapText(m)
+
+
+def benchGameHeader(n):
+    state = freshTrail()
+    for i in range(n):
+        state.miles = 500 - i % 500  # a new header every time, like on the trail
+        main.gameHeader(state.player, state.inventory, state.date, state.miles)
+
+
+def benchTrails(n):
+    # whole trails from the store to the end, no I/O at all
+    rng = streams.Streams(1)
+    for _ in range(n):
+        engine.runTrail(freshTrail(), rng=rng)
+
+
+# name -> (function, calls per run)
+BENCHMARKS = {
+    "encounter": (benchEncounter, 20000),
+    "hunt": (benchHunt, 50000),
+    "crossRiver": (benchCrossRiver, 20000),
+    "purchase": (benchPurchase, 50000),
+    "supplyStore": (benchSupplyStore, 2000),
+    "saveLoad": (benchSaveLoad, 200),
+    "saveFormat": (benchSaveFormat, 5000),
+    "map": (benchMap, 5000),
+    "gameHeader": (benchGameHeader, 20000),
+    "trails": (benchTrails, 500),
+}
+
+
+def measure(name, repeat=5, scale=1.0):
+    # best microseconds per call out of repeat runs
+    function, calls = BENCHMARKS[name]
+    calls = max(1, int(calls * scale))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(calls)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best / calls * 1e6
+
+
+def run(names=None, repeat=5, scale=1.0):
+    return {name: measure(name, repeat, scale) for name in (names or BENCHMARKS)}
+
+
+def loadBaselines(path=BASELINES):
+    try:
+        with open(path) as readFile:
+            return json.load(readFile)["benchmarks"]
+    except FileNotFoundError:
+        return {}
+
+
+def compare(results, baselines, tolerance=TOLERANCE):
+    # {name: (microseconds, baseline or None, True when slower than the tolerance allows)}
+    rows = {}
+    for name, us in results.items():
+        baseline = baselines.get(name)
+        rows[name] = (us, baseline, baseline is not None and us > baseline * (1 + tolerance))
+    return rows
+
+
+def describeMachine():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                                text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system(),
+            "commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def save(results, path=BASELINES, history=HISTORY):
+    # keeps baselines for benchmarks that weren't run this time
+    record = describeMachine()
+    baselines = loadBaselines(path)
+    baselines.update({name: round(us, 3) for name, us in results.items()})
+    with open(path, 'w') as writeFile:
+        json.dump(dict(record, benchmarks=baselines), writeFile, indent=2, sort_keys=True)
+        writeFile.write("\n")
+    with open(history, 'a') as writeFile:
+        writeFile.write(json.dumps(dict(record, benchmarks={name: round(us, 3) for name, us in results.items()}),
+                                   sort_keys=True) + "\n")
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Time the game's hot paths against stored baselines")
+    parser.add_argument("names", nargs="*", metavar="benchmark", help=", ".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies how many calls each run makes")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baselines")
+    args = parser.parse_args()
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"No benchmark called {name}")
+
+    results = run(args.names, args.repeat, args.scale)
+    failed = False
+    for name, (us, baseline, slower) in compare(results, loadBaselines(), args.tolerance).items():
+        failed = failed or slower
+        line = f"{name:<12}{us:>12.2f} µs"
+        if baseline is not None:
+            line += f"  baseline {baseline:.2f} µs  {us / baseline - 1:+.0%}"
+        if name == "trails":
+            line += f"  ({1e6 / us:.0f} trails/sec)"
+        print(line + ("  SLOWER" if slower else ""))
+    if args.save:
+        save(results)
+        print(f"Saved to {os.path.basename(BASELINES)}")
+    sys.exit(1 if failed and not args.save else 0)
+
+
+if __name__ == "__main__":
+    cli()
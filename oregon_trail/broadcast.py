@@ -0,0 +1,296 @@
+# Live spectator feed - every game being played is a channel, and spectators connect to a
+# socket to watch one trail, several, or all of them at once for a dashboard. Each update is
+# only what changed since the last one (date, health, miles, food, where the wagon is on the
+# map, who is left) as one JSON line, with a keyframe of everything every KEYFRAME_EVERY
+# updates so a spectator can join or catch up at any time.
+#
+# An update is turned into bytes once and the same bytes are written to every spectator,
+# never awaited, so the game never waits on a viewer. A spectator whose socket is more than
+# BEHIND bytes behind skips updates, and everything else, until it has drained, then gets
+# the latest keyframe of each game it missed (and the list of games if it missed one
+# opening or closing) instead of everything it missed.
+#
+#   python server.py --spectate 2324
+#   python broadcast.py --port 2324 --watch 3      (or --watch all, or nc localhost 2324)
+#
+# Spectators send lines of "watch 3", "watch all", "unwatch 3" or "list". Every line the
+# feed sends has the game it's about and its update number, seq. A keyframe has "key": 1,
+# the others are changes to apply, plus "event"/"message" lines for what happened.
+
+import argparse
+import asyncio
+import json
+from itertools import count
+
+KEYFRAME_EVERY = 20  # updates between keyframes
+BEHIND = 64 * 1024  # bytes a spectator can have waiting before it starts skipping updates
+ALL = "all"
+
+
+def encode(record):
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def snapshot(state):
+    # what a spectator sees of the trail - the game header's fields and the wagon on the map
+    m = state.map
+    return {
+        "player": state.player.name,
+        "profession": state.player.profession,
+        "date": state.date.text(),
+        "hp": state.player.hp,
+        "miles": state.miles,
+        "food": state.inventory.food,
+        "row": m.pRow,
+        "col": m.pCol,
+        "party": list(state.party),
+        "outcome": state.outcome,
+    }
+
+
+class Channel:
+    # one game's feed
+    __slots__ = ("hub", "game", "name", "state", "seq", "sinceKey", "key")
+
+    def __init__(self, hub, game, name):
+        self.hub = hub
+        self.game = game
+        self.name = name
+        self.state = {}
+        self.seq = 0
+        self.sinceKey = 0
+        self.key = None  # the keyframe's bytes, made when a spectator needs them
+
+    def publish(self, trail):
+        # sends whatever changed on the trail since the last update, nothing if nothing did
+        state = snapshot(trail)
+        old = self.state
+        changes = {name: value for name, value in state.items() if old.get(name) != value}
+        if not changes:
+            return
+        self.state = state
+        self.seq += 1
+        self.key = None
+        self.sinceKey += 1
+        if self.sinceKey >= KEYFRAME_EVERY:
+            self.sinceKey = 0
+            self.hub.fanOut(self, self.keyframe())  # now and then everyone gets the whole state
+            return
+        changes["game"] = self.game
+        changes["seq"] = self.seq
+        self.hub.fanOut(self, encode(changes))
+
+    def event(self, event, message):
+        self.seq += 1
+        self.key = None  # a keyframe's seq has to move on past the event
+        self.hub.fanOut(self, encode({"game": self.game, "seq": self.seq, "event": event, "message": message}))
+
+    def keyframe(self):
+        if self.key is None:
+            self.key = encode({"game": self.game, "seq": self.seq, "key": 1, "name": self.name, **self.state})
+        return self.key
+
+    def close(self):
+        self.hub.closed(self)
+
+
+class Spectator:
+    __slots__ = ("hub", "writer", "watching", "behind", "missed", "catching")
+
+    def __init__(self, hub, writer):
+        self.hub = hub
+        self.writer = writer
+        self.watching = set()  # games, or ALL
+        self.behind = set()  # channels that skipped updates and need a keyframe
+        self.missed = False  # skipped a listing, opened, closed or error line
+        self.catching = None  # the task waiting for the socket to drain
+        writer.transport.set_write_buffer_limits(high=BEHIND)  # drain() waits while more than BEHIND is waiting
+
+    def send(self, channel, data):
+        # never waits - a spectator that's behind just misses updates
+        if self.writer.transport.is_closing():
+            return
+        if self.fallingBehind():
+            self.behind.add(channel)
+            return
+        self.writer.transport.write(data)
+
+    def write(self, data):
+        # a line that isn't a game's update, caught up on with a new listing
+        if self.writer.transport.is_closing():
+            return
+        if self.fallingBehind():
+            self.missed = True
+            return
+        self.writer.transport.write(data)
+
+    def fallingBehind(self):
+        # True while updates are being skipped, until the socket drains
+        if self.catching is None and self.writer.transport.get_write_buffer_size() > BEHIND:
+            self.catching = asyncio.ensure_future(self.catchUp())
+        return self.catching is not None
+
+    async def catchUp(self):
+        # as soon as the socket has drained, not on a game's next update, so quiet games
+        # catch up too - the latest keyframe of each has everything that was missed
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            return
+        self.catching = None
+        if self.missed:
+            self.missed = False
+            self.write(self.hub.listing())
+        behind, self.behind = self.behind, set()
+        for channel in behind:
+            if channel.game in self.hub.channels and channel.state:
+                self.send(channel, channel.keyframe())
+
+    def stop(self):
+        if self.catching is not None:
+            self.catching.cancel()
+
+
+class Hub:
+    def __init__(self):
+        self.channels = {}  # game -> Channel
+        self.watchers = {ALL: set()}  # game or ALL -> the Spectators watching it
+        self.games = count(1)
+
+    def channel(self, name):
+        # a new game to broadcast, name is what spectators see it as
+        channel = Channel(self, next(self.games), name)
+        self.channels[channel.game] = channel
+        self.watchers[channel.game] = set()
+        self.announce({"game": channel.game, "opened": name})
+        return channel
+
+    def closed(self, channel):
+        data = encode({"game": channel.game, "seq": channel.seq + 1, "closed": channel.name})
+        for spectator in self.watchers.pop(channel.game, ()):
+            spectator.behind.discard(channel)
+            spectator.write(data)
+            spectator.watching.discard(channel.game)
+        for spectator in self.watchers[ALL]:
+            spectator.behind.discard(channel)
+            spectator.write(data)
+        del self.channels[channel.game]
+
+    def fanOut(self, channel, data):
+        for spectator in self.watchers[channel.game]:
+            spectator.send(channel, data)
+        for spectator in self.watchers[ALL]:
+            spectator.send(channel, data)
+
+    def announce(self, record):
+        data = encode(record)
+        for spectator in self.watchers[ALL]:
+            spectator.write(data)
+
+    def listing(self):
+        return encode({"games": [{"game": game, "name": channel.name} for game, channel in self.channels.items()]})
+
+    def watch(self, spectator, game):
+        if game == ALL:
+            if ALL in spectator.watching:
+                return
+            for watched in list(spectator.watching):
+                self.unwatch(spectator, watched)  # every game's updates come through ALL now
+            channels = list(self.channels.values())
+        elif game in self.channels:
+            if game in spectator.watching or ALL in spectator.watching:
+                return
+            channels = [self.channels[game]]
+        else:
+            spectator.write(encode({"error": f"No game {game}"}))
+            return
+        spectator.watching.add(game)
+        self.watchers[game].add(spectator)
+        for channel in channels:
+            if channel.state:
+                spectator.send(channel, channel.keyframe())  # starts from the whole state
+
+    def unwatch(self, spectator, game):
+        spectator.watching.discard(game)
+        self.watchers.get(game, set()).discard(spectator)
+
+    async def spectate(self, reader, writer):
+        spectator = Spectator(self, writer)
+        spectator.write(self.listing())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, game = line.decode("utf-8", "replace").strip().partition(" ")
+                game = game.strip()
+                game = int(game) if game.isdigit() else game
+                if command == "watch":
+                    self.watch(spectator, game)
+                elif command == "unwatch":
+                    self.unwatch(spectator, game)
+                elif command == "list":
+                    spectator.write(self.listing())
+                elif command:
+                    spectator.write(encode({"error": f"Unknown command {command}"}))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            for game in list(spectator.watching):
+                self.unwatch(spectator, game)
+            spectator.stop()
+            writer.close()
+
+    async def serve(self, host, port):
+        listener = await asyncio.start_server(self.spectate, host, port, limit=4096)
+        names = ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+        print(f"Spectators can watch on {names}")
+        async with listener:
+            await listener.serve_forever()
+
+
+async def watchFeed(host, port, game):
+    # a spectator in the terminal - applies the changes and prints one line per update
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"watch {game}\n".encode("utf-8"))
+    games = {}  # game -> everything known about it
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        record = json.loads(line)
+        if "opened" in record:
+            games[record["game"]] = {"name": record["opened"]}
+        if "game" not in record or "seq" not in record:
+            print(json.dumps(record))
+            continue
+        if "event" in record:
+            print(f"#{record['game']} {record['message']}")
+            continue
+        if "closed" in record:
+            games.pop(record["game"], None)
+            print(f"#{record['game']} closed")
+            continue
+        state = games.setdefault(record["game"], {})
+        if "key" in record:
+            state.clear()
+        state.update(record)  # a keyframe has everything, the rest only what changed
+        print(f"#{state['game']} {state.get('name', '?')}: {state.get('date')}  hp {state.get('hp')}  "
+              f"{state.get('miles')} miles  {state.get('food')} lbs  row {state.get('row')}  "
+              f"party {len(state.get('party', ()))}" + (f"  {state['outcome']}" if state.get("outcome") else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch games being played on a server started with --spectate")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=2324)
+    parser.add_argument("--watch", default=ALL, help="a game number, or all")
+    args = parser.parse_args()
+    try:
+        asyncio.run(watchFeed(args.host, args.port, args.watch))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# Where the game's text goes and where the player's answers come from. Every prompt in
+# main.py awaits a console instead of calling input(), so the game loop keeps running
+# while the player thinks, and the same menus can be played somewhere other than the
+# terminal.
+
+import asyncio
+import sys
+import threading
+from collections import deque
+
+import ascii
+import metrics
+import scheduler
+import typewriter
+
+
+class Console:
+    def __init__(self):
+        self.lines = deque()  # answers typed but not asked for yet, None once input has ended
+        self.arrived = asyncio.Event()
+        self.prompting = asyncio.Event()  # set while a prompt is waiting for the player
+        self.recorder = None  # a replayLog.Recorder to log every answer to
+        self.trail = None  # the trail being played, once there is one
+        self.channel = None  # a broadcast.Channel spectators watch the game on
+
+    def write(self, text):
+        raise NotImplementedError
+
+    def say(self, text=""):
+        self.write(f"{text}\n")
+
+    def sayArt(self, *names):
+        # pieces of ascii art back to back, then a newline
+        self.say("".join(ascii.art(name) for name in names))
+
+    def feed(self, line):
+        # a line from the player - None when there will be no more
+        self.lines.append(line)
+        self.arrived.set()
+
+    def listen(self):
+        pass  # consoles that need to start reading do it here, inside the running loop
+
+    async def nextLine(self):
+        self.listen()
+        self.prompting.set()
+        try:
+            with metrics.span("input"):
+                while not self.lines:
+                    self.arrived.clear()
+                    await self.arrived.wait()
+        finally:
+            self.prompting.clear()
+        if self.lines[0] is None:
+            raise EOFError  # leave the None there so every later ask fails the same way
+        line = self.lines.popleft()
+        if self.recorder is not None:
+            self.recorder.input(line, 0 if self.trail is None else self.trail.tick)
+        return line
+
+    async def atPrompt(self):
+        # returns once a prompt is waiting for the player. The trail clock only moves then,
+        # so a turn and everything it leads to happen between two ticks, and a replay can
+        # put every tick back exactly where it was
+        while not self.prompting.is_set():
+            await self.prompting.wait()
+
+    async def pause(self, seconds):
+        with metrics.span("pause"):
+            await asyncio.sleep(seconds)
+
+    def newTimers(self):
+        return scheduler.Scheduler()  # the real clock
+
+    async def ask(self, prompt=""):
+        self.write(prompt)
+        return await self.nextLine()
+
+    async def waitForLine(self, seconds):
+        # sleeps for seconds, returning True early if the player enters something
+        self.listen()
+        if not self.lines:
+            self.arrived.clear()
+            try:
+                await asyncio.wait_for(self.arrived.wait(), seconds)
+            except asyncio.TimeoutError:
+                return False
+        if self.lines[0] == "":
+            self.lines.popleft()  # an empty line only meant "skip", anything else answers the next prompt
+        return True
+
+    async def typeOut(self, text, delay=0.03):
+        # typewriter text - pressing Enter shows the rest of the message at once
+        for start, chunk, pause in typewriter.chunks(text, delay):
+            self.write(chunk)
+            if pause and await self.waitForLine(pause):
+                self.write(text[start + len(chunk):])
+                break
+        self.write("\n")
+
+
+class TerminalConsole(Console):
+    def __init__(self, inp=sys.stdin, out=sys.stdout):
+        super().__init__()
+        self.inp = inp
+        self.out = out
+        self.reader = None
+
+    def write(self, text):
+        with metrics.span("output"):
+            self.out.write(text)
+            self.out.flush()
+
+    def listen(self):
+        # one daemon thread turns the blocking stdin into lines for the event loop
+        if self.reader is not None:
+            return
+        loop = asyncio.get_running_loop()
+
+        def read():
+            while True:
+                line = self.inp.readline()
+                try:
+                    loop.call_soon_threadsafe(self.feed, line.rstrip("\r\n") if line else None)
+                except RuntimeError:  # the game is over and the loop has closed
+                    return
+                if not line:
+                    return
+
+        self.reader = threading.Thread(target=read, name="stdin", daemon=True)
+        self.reader.start()
+
+
+IAC = 255  # telnet "interpret as command"
+SB, SE = 250, 240  # start and end of a subnegotiation
+WILL, WONT, DO, DONT = 251, 252, 253, 254
+
+
+def stripTelnet(data):
+    # drops the option negotiation a telnet client sends, keeping the typed text
+    text = bytearray()
+    at = 0
+    while at < len(data):
+        byte = data[at]
+        if byte != IAC:
+            text.append(byte)
+            at += 1
+        elif at + 1 < len(data) and data[at + 1] == IAC:
+            text.append(IAC)  # an escaped 255
+            at += 2
+        elif at + 1 < len(data) and data[at + 1] in (WILL, WONT, DO, DONT):
+            at += 3
+        elif at + 1 < len(data) and data[at + 1] == SB:
+            end = data.find(bytes([IAC, SE]), at)
+            at = len(data) if end < 0 else end + 2
+        else:
+            at += 2
+    return bytes(text)
+
+
+class StreamConsole(Console):
+    # a player connected over TCP or telnet, read and written through asyncio streams
+    MAX_BUFFER = 256 * 1024  # a client this far behind isn't reading, so it gets dropped
+
+    def __init__(self, reader, writer):
+        super().__init__()
+        self.reader = reader
+        self.writer = writer
+        self.reading = None
+
+    def write(self, text):
+        self.send(text.replace("\n", "\r\n").encode("utf-8"))  # telnet wants CRLF
+
+    def sayArt(self, *names):
+        # encoded once per process, not once per player
+        self.send(b"".join(ascii.encoded(name, "\r\n") for name in names) + b"\r\n")
+
+    def send(self, data):
+        if self.writer.is_closing():
+            raise ConnectionResetError("The player disconnected")
+        with metrics.span("output"):
+            self.writer.write(data)
+        if self.writer.transport.get_write_buffer_size() > self.MAX_BUFFER:
+            self.writer.close()
+
+    def listen(self):
+        if self.reading is None:
+            self.reading = asyncio.ensure_future(self.readLines())
+
+    async def readLines(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                self.feed(stripTelnet(line).decode("utf-8", "replace").rstrip("\r\n"))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        self.feed(None)
+
+    async def close(self):
+        if self.reading is not None:
+            self.reading.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
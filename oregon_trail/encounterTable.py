@@ -0,0 +1,76 @@
+# Weighted encounter table - the events live in encounters.json and are compiled into
+# an alias table (Vose's method) so drawing an event costs the same however many there are.
+
+import json
+import os
+import random
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'encounters.json')
+
+
+def loadTable(path=TABLE_FILE):
+    with open(path, encoding="utf-8") as readFile:
+        return compileTable(json.load(readFile))
+
+
+def compileTable(events):
+    weights = [event["weight"] for event in events]
+    if not events or min(weights) < 0 or sum(weights) <= 0:
+        raise ValueError("Encounter weights must be positive")
+
+    size = len(events)
+    total = sum(weights)
+    scaled = [weight * size / total for weight in weights]  # the average column is 1
+    prob = [1.0] * size
+    alias = list(range(size))
+    small = [column for column in range(size) if scaled[column] < 1]
+    large = [column for column in range(size) if scaled[column] >= 1]
+
+    # each short column is topped up from a tall one, which becomes its alias
+    while small and large:
+        short = small.pop()
+        tall = large.pop()
+        prob[short] = scaled[short]
+        alias[short] = tall
+        scaled[tall] -= 1 - scaled[short]
+        if scaled[tall] < 1:
+            small.append(tall)
+        else:
+            large.append(tall)
+    # whatever is left over is 1 give or take rounding
+
+    return {"events": events, "prob": prob, "alias": alias}
+
+
+def drawIndex(table, rng=random):
+    # one uniform number picks the column and decides between it and its alias
+    size = len(table["prob"])
+    spin = rng.random() * size
+    column = min(int(spin), size - 1)  # random() * size can round up to size
+    if spin - column < table["prob"][column]:
+        return column
+    return table["alias"][column]
+
+
+def draw(table, rng=random):
+    return table["events"][drawIndex(table, rng)]
+
+
+def drawBlock(table, count, rng=random):
+    # a whole block of events at once, for simulations that know how many they need
+    events = table["events"]
+    prob = table["prob"]
+    alias = table["alias"]
+    size = len(prob)
+    block = []
+    for _ in range(count):
+        spin = rng.random() * size
+        column = min(int(spin), size - 1)
+        block.append(events[column if spin - column < prob[column] else alias[column]])
+    return block
+
+
+def weights(table):
+    # the chance of each event, for checking a table after editing the data
+    total = sum(event["weight"] for event in table["events"])
+    return {event["event"]: event["weight"] / total for event in table["events"]}
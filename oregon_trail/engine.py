@@ -0,0 +1,350 @@
+# Headless game rules - no input(), print() or sleep() in here so the trail can be
+# simulated as fast as the CPU allows. main.py is the terminal front end on top of it.
+
+import random
+import map
+import encounterTable
+import eventLog
+import landmarkTable
+import streams
+import terrain
+from datetime import datetime
+from gameDate import GameDate
+from gameState import ITEMS, Player, Inventory, Trail
+
+# The game runs on 5 second ticks, the greatest common divisor of the old timers
+TICK_SECONDS = 5
+FOOD_TICKS = 3  # 15 seconds - food eaten and miles traveled
+ENCOUNTER_TICKS = 8  # 40 seconds - random encounter
+DAY_TICKS = 12  # 60 seconds - date increases and the wagon moves down the map
+FOOD_EATEN = 13  # lbs every FOOD_TICKS
+MILES_TRAVELLED = 23  # every FOOD_TICKS
+
+START_MILES = 500
+START_DATE = datetime(1846, 3, 1)
+MAP_SIZE = 10
+START_COL = 5
+
+PROFESSIONS = {
+    "Banker": {"money": 1000, "hp": 500, "level": 1},
+    "Carpenter": {"money": 750, "hp": 350, "level": 2},
+    "Farmer": {"money": 400, "hp": 200, "level": 3},
+}
+
+PRICES = {"oxen": 20, "ammo": 3, "clothes": 10, "food": 1}  # ammo is $3 for a box of 10 bullets
+UNITS = {"oxen": 1, "ammo": 10, "clothes": 1, "food": 1}
+
+RIVER_CHOICES = ("ford", "caulk", "ferry")
+RIVER_DAYS = {"ford": 3, "caulk": 5, "ferry": 4}
+# choice -> (sides of the die rolled, rolls that go wrong, {item or "party": how many are lost}).
+# A flooded ford also loses up to all but one bullet, the ferry never goes wrong but costs FERRY_COST
+RIVER_RISKS = {
+    "ford": (10, (3, 4, 5, 6), {"clothes": 2}),
+    "caulk": (4, (2, 3), {"oxen": 1, "party": 1}),
+}
+FERRY_COST = 10
+MENU_ACTIONS = ("continue", "hunt", "rest")
+
+ENCOUNTERS = encounterTable.loadTable()
+LANDMARKS = landmarkTable.loadTable()
+
+RIVER_ROWS = landmarkTable.rows(LANDMARKS, "river")
+SHOP_ROWS = landmarkTable.rows(LANDMARKS, "fort")
+FINISH_ROW = landmarkTable.rows(LANDMARKS, "finish")[0]
+
+# these show a gravestone
+DEATHS = ("dysentery", "sunk") + tuple(event["event"] for event in ENCOUNTERS["events"]
+                                        if event.get("victim") == "dies")
+
+
+def newPlayer(name, profession):
+    stats = PROFESSIONS[profession]
+    return Player(name, profession, stats["money"], stats["hp"], stats["level"])
+
+
+def purchase(player, inventory, item, howMany):
+    # item is one of ITEMS, and nothing is bought unless howMany is above 0
+    if howMany <= 0:
+        return False  # buying a negative amount would be selling for money back
+    cost = howMany * PRICES[item]  # number purchased times cost of item
+    if player.money < cost:  # the inventory doesn't increase when the player doesn't have enough $
+        return False
+    setattr(inventory, item, getattr(inventory, item) + howMany * UNITS[item])
+    player.money -= cost
+    if eventLog.ACTIVE is not None:
+        eventLog.ACTIVE.emit("purchase", item, howMany * UNITS[item], cost)
+    return True
+
+
+def canLeaveStore(inventory):
+    if inventory.oxen < 2:
+        return "You need at least 2 oxen to pull your wagon."
+    elif inventory.food <= 0:
+        return "You won't make it very far without food."
+    return None
+
+
+def newState(player, party, inventory, game_date, m, milesLeft=START_MILES):
+    state = Trail(player, party, inventory, game_date, m, milesLeft)
+    eventLog.follow(state)
+    return state
+
+
+def trailMiles(rows):
+    # miles from Fort Boise to Oregon City on a trail of this many rows, START_MILES on the usual one
+    return START_MILES * (rows - 1) // (MAP_SIZE - 1)
+
+
+def newTrail(profession, supplies, party=("Ann", "Bob", "Cal", "Dee"), length=None, seed=0):
+    # a fresh game leaving Fort Boise - supplies is (oxen, boxes of ammo, clothes, lbs of food).
+    # With a length it's a procedural trail of that many rows made from seed
+    eventLog.begin()  # the purchases are part of the trail's events
+    player = newPlayer(profession, profession)
+    inventory = Inventory()
+    for item, howMany in zip(ITEMS, supplies):
+        if howMany != 0 and not purchase(player, inventory, item, howMany):
+            raise ValueError(f"A {profession} can't afford {supplies}")
+    if length is None:
+        m = map.createMap(MAP_SIZE, " ⛰ ", " 𖥞 ")
+    else:
+        m = terrain.createMap(seed, length, MAP_SIZE)
+    map.setPlayerPos(m, 0, START_COL)
+    return newState(player, list(party), inventory, GameDate(START_DATE), m,
+                    START_MILES if length is None else trailMiles(length))
+
+
+def encounter(player, inventory, party, rng=random, table=ENCOUNTERS):
+    # returns the name of what happened and the message to show the player
+    rng = streams.part(rng, "encounters")
+    if len(party) == 0:  # if nobody is left in the wagon party
+        if eventLog.ACTIVE is not None:
+            eventLog.ACTIVE.emit("died", player.name, "dysentery")
+        return "dysentery", f"{player.name} has died of dysentery."
+    return applyEncounter(encounterTable.draw(table, rng), player, inventory, party, rng)
+
+
+def applyEncounter(event, player, inventory, party, rng=random):
+    details = {}  # the random amounts, for filling in the message
+    name = event["event"]
+    log = eventLog.ACTIVE
+    if log is not None:
+        log.emit("encounter", name)
+    if "steal" in event:
+        item = event["steal"]
+        details["stolen"] = rng.randint(0, max(getattr(inventory, item), 0))
+        setattr(inventory, item, getattr(inventory, item) - details["stolen"])
+        if log is not None:
+            log.emit("supplies", item, -details["stolen"], name)
+    for item, (low, high) in event.get("found", {}).items():
+        details[item] = rng.randint(low, high)
+        setattr(inventory, item, getattr(inventory, item) + details[item])
+        if log is not None:
+            log.emit("supplies", item, details[item], name)
+    for item in ITEMS:
+        if item in event:
+            setattr(inventory, item, getattr(inventory, item) + event[item])
+            if log is not None:
+                log.emit("supplies", item, event[item], name)
+    player.hp += event.get("hp", 0)
+    if log is not None and "hp" in event:
+        log.emit("health", event["hp"], name)
+    if "victim" in event:
+        person = rng.randint(0, len(party) - 1)
+        details["name"] = party.pop(person) if event["victim"] == "dies" else party[person]
+        if log is not None:
+            log.emit("died" if event["victim"] == "dies" else "sick", details["name"], name)
+    return name, event["message"].format(**details)
+
+
+def hunt(inventory, rng=random):
+    rng = streams.part(rng, "hunting")
+    log = eventLog.ACTIVE
+    if inventory.ammo < 10:
+        if log is not None:
+            log.emit("hunt", "no ammo")
+        return "no ammo", "You do not have enough ammo to hunt."
+    inventory.ammo -= 10  # takes ammo regardless of if the hunt was successful or not
+    if log is not None:
+        log.emit("supplies", "ammo", -10, "hunt")
+    if rng.randint(1, 5) == 2:  # if the random number is 2, the animal has been shot
+        inventory.food += 100
+        if log is not None:
+            log.emit("supplies", "food", 100, "hunt")
+            log.emit("hunt", "shot")
+        return "shot", "Good aim. From the animal you shot, you got 100 pounds of meat."
+    if log is not None:
+        log.emit("hunt", "missed")
+    return "missed", "No luck this time."
+
+
+def crossRiver(choice, inventory, party, player, game_date, rng=random):
+    rng = streams.part(rng, "rivers")
+    log = eventLog.ACTIVE
+    if choice not in RIVER_DAYS:
+        raise ValueError(f"Invalid river choice: {choice}")
+    days = RIVER_DAYS[choice]
+    game_date.advance_days(days)
+    if log is not None:
+        log.emit("days", days, choice)
+    if choice == "ford":
+        sides, bad, lost = RIVER_RISKS[choice]
+        if rng.randint(1, sides) in bad:  # fording the river is risky, high chance of losing items
+            inventory.clothes -= lost["clothes"]
+            bulletsLost = rng.randint(1, inventory.ammo - 1) if inventory.ammo > 1 else 0
+            inventory.ammo -= bulletsLost
+            if log is not None:
+                log.emit("supplies", "clothes", -lost["clothes"], choice)
+                log.emit("supplies", "ammo", -bulletsLost, choice)
+                log.emit("river", choice, "flooded")
+            return "flooded", (f"The water was higher than anticipated. "
+                               f"You lost {lost['clothes']} outfits and {bulletsLost} bullets.")
+        result = "forded", "Your party and wagon made it across the river safely."
+    elif choice == "caulk":
+        sides, bad, lost = RIVER_RISKS[choice]
+        if rng.randint(1, sides) in bad and party:
+            inventory.oxen -= lost["oxen"]
+            casualty = party.pop(rng.randint(0, len(party) - 1))  # removes casualty from the party
+            if log is not None:
+                log.emit("supplies", "oxen", -lost["oxen"], choice)
+                log.emit("died", casualty, "sunk")
+                log.emit("river", choice, "sunk")
+            return "sunk", f"Your wagon sunk. You lost {lost['oxen']} ox and {casualty}."
+        result = "floated", "You made it across the river safely."
+    else:
+        player.money -= FERRY_COST
+        if log is not None:
+            log.emit("money", -FERRY_COST, choice)
+        result = "ferried", "You made it across the river safely."
+    if log is not None:
+        log.emit("river", choice, result[0])
+    return result
+
+
+def rest(player, game_date):
+    player.hp += 20  # resting restores health and adds 2 days
+    game_date.advance_days(2)
+    if eventLog.ACTIVE is not None:
+        eventLog.ACTIVE.emit("health", 20, "rest")
+        eventLog.ACTIVE.emit("days", 2, "rest")
+    return "rested", "You rest for 2 days."
+
+
+def moveDown(m):
+    if m.pRow < m.size - 1:  # the wagon stops at the last row
+        map.move(m, "down")
+        if eventLog.ACTIVE is not None:
+            eventLog.ACTIVE.emit("moved", m.pRow)
+
+
+def landmarksOf(m):
+    # the landmarks of a procedural trail's map, landmarks.json's for any other
+    return LANDMARKS if m.terrain is None else m.terrain
+
+
+def landmarkAt(row, table=LANDMARKS):
+    return table.get(row)
+
+
+def kindAt(row, table=LANDMARKS):
+    # "river", "fort", "finish" or None for open trail
+    landmark = table.get(row)
+    return None if landmark is None else landmark["kind"]
+
+
+def atRiver(state):
+    return kindAt(map.getPlayerPos(state.map), landmarksOf(state.map)) == "river"
+
+
+def decision(state):
+    # what the policy is being asked for this tick
+    return "river" if atRiver(state) else "menu"
+
+
+def checkOutcome(state):
+    inventory = state.inventory
+    if inventory.oxen <= 0:  # no oxen to pull wagon
+        return "stuck"
+    elif inventory.food <= -10:  # not enough food
+        return "starved"
+    elif len(state.party) == 0:  # everyone is dead
+        return "grim fate"
+    elif state.miles <= 0 and kindAt(map.getPlayerPos(state.map), landmarksOf(state.map)) == "finish":
+        return "oregon"  # survived the whole trail
+    elif inventory.clothes < 0:  # no clothes for your wagon party
+        return "frozen"
+    return None
+
+
+def act(state, action, rng=random):
+    # applies the player's decision - a river choice when the wagon is at a river,
+    # otherwise a menu action or None to keep travelling
+    if action is None and not atRiver(state):
+        return []  # nothing changed
+
+    player = state.player
+    inventory = state.inventory
+    events = []
+
+    if atRiver(state):
+        events.append(crossRiver(action, inventory, state.party, player, state.date, rng))
+        moveDown(state.map)  # move on the map after crossing the river
+    elif action == "continue":
+        events.append(encounter(player, inventory, state.party, rng))
+    elif action == "hunt":
+        events.append(hunt(inventory, rng))
+    elif action == "rest":
+        events.append(rest(player, state.date))
+    elif action is not None:
+        raise ValueError(f"Invalid action: {action}")
+
+    state.outcome = checkOutcome(state)
+    return events
+
+
+def tick(state, rng=random):
+    # one tick of the trail clock - the old 60/15/40 second timers
+    events = []
+
+    state.tick += 1
+    count = state.tick
+    if count % FOOD_TICKS and count % ENCOUNTER_TICKS:
+        return events  # no timer fell on this tick (DAY_TICKS is a multiple of FOOD_TICKS)
+    log = eventLog.ACTIVE
+    if count % DAY_TICKS == 0:
+        state.date.advance_days(1)  # date increases
+        if log is not None:
+            log.emit("days", 1, "trail")
+        moveDown(state.map)  # move down on the map
+    if count % FOOD_TICKS == 0:
+        state.inventory.food -= FOOD_EATEN  # food eaten
+        state.miles -= MILES_TRAVELLED  # miles traveled
+        if log is not None:
+            log.emit("supplies", "food", -FOOD_EATEN, "eaten")
+            log.emit("travelled", state.miles)
+    if count % ENCOUNTER_TICKS == 0:
+        events.append(encounter(state.player, state.inventory, state.party, rng))
+
+    state.outcome = checkOutcome(state)
+    return events
+
+
+def step(state, action=None, rng=random):
+    # applies action then advances one tick, returns a list of (event, message) that happened
+    events = act(state, action, rng)
+    if state.outcome is None:
+        events += tick(state, rng)
+    return events
+
+
+def travelPolicy(state, asked):
+    # the simplest player - never opens the menu and fords every river
+    return "ford" if asked == "river" else None
+
+
+def runTrail(state, policy=travelPolicy, rng=random, maxTicks=10000):
+    # plays a whole trail with decisions from policy(state, decision) and returns the outcome
+    while state.outcome is None and state.tick < maxTicks:
+        step(state, policy(state, decision(state)), rng)
+    if eventLog.ACTIVE is not None:
+        eventLog.ACTIVE.emit("ended", state.outcome or "unfinished")
+    return state.outcome
@@ -0,0 +1,301 @@
+# Game event log - every change to a trail (supplies gained and lost, health, deaths, river
+# crossings, hunts, purchases, landmarks, how it ended) as a typed event, streamed to a file
+# as JSON lines, or as compact binary when the file name ends in .bin. Nothing is recorded
+# until start() is called, and until then the game only checks ACTIVE and moves on.
+#
+# Events are handed to a writer thread in batches through a bounded queue. If the disk falls
+# behind the queue fills up and the game waits for it instead of piling events up in memory.
+# On an event loop (server.py) nothing waits there - batches that don't fit are held and
+# handed over from another thread, and each game waits for that in settle() at a prompt.
+# The writer is a pipeline of generators, batches -> jsonLines or binaryRecords -> the file,
+# and read() streams a log back the same way, a buffer at a time.
+#
+#   eventLog.start("events.bin")
+#   ...
+#   eventLog.stop()
+#
+#   python eventLog.py events.bin   (prints it as JSON lines)
+
+import argparse
+import contextvars
+import json
+import queue
+import struct
+import sys
+import threading
+from collections import deque
+from itertools import count
+
+ACTIVE = None  # the Log being written to, None while logging is off
+
+# kind -> (field names, types: s for text, i for a whole number), every event also has the
+# game it happened in and the tick it happened on
+KINDS = {
+    "start": (("profession", "party", "money", "oxen", "ammo", "clothes", "food", "miles"), "siiiiiii"),
+    "purchase": (("item", "amount", "cost"), "sii"),
+    "encounter": (("event",), "s"),
+    "supplies": (("item", "change", "cause"), "sis"),
+    "health": (("change", "cause"), "is"),
+    "money": (("change", "cause"), "is"),
+    "days": (("days", "cause"), "is"),
+    "died": (("name", "cause"), "ss"),
+    "sick": (("name", "cause"), "ss"),
+    "river": (("choice", "result"), "ss"),
+    "hunt": (("result",), "s"),
+    "travelled": (("miles",), "i"),
+    "moved": (("row",), "i"),
+    "arrived": (("row", "landmark"), "is"),
+    "ended": (("outcome",), "s"),
+}
+
+BATCH = 512  # events handed to the writer at a time
+QUEUED = 64  # batches waiting for the writer before the game has to wait
+READ_SIZE = 1 << 20
+
+MAGIC = b"OTEV"
+VERSION = 1
+HEADER = struct.Struct("<4sB")  # magic, version
+TEXT = struct.Struct("<BH")  # TEXT_KIND, size - the next number in the file's table of text
+TEXT_KIND = 0
+CODES = {kind: code for code, kind in enumerate(KINDS, start=1)}
+# kind code, game, tick, then each field - text as its number in the table
+RECORDS = {kind: struct.Struct("<BII" + types.replace("s", "I")) for kind, (_, types) in KINDS.items()}
+
+CURRENT = contextvars.ContextVar("eventLogGame", default=None)  # each server session has its own
+
+
+class Game:
+    __slots__ = ("id", "state")
+
+    def __init__(self, id):
+        self.id = id
+        self.state = None  # the gameState.Trail once there is one, for the tick
+
+
+class Log:
+    def __init__(self, path, batchSize=BATCH, queued=QUEUED):
+        self.file = open(path, 'wb')
+        self.encode = binaryRecords if path.endswith(".bin") else jsonLines
+        self.batchSize = batchSize
+        self.batch = []
+        self.queue = queue.Queue(queued)
+        self.held = deque()  # batches that didn't fit in the queue on the event loop, in order
+        self.handing = None  # the task handing them to the queue
+        self.games = count(1)
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name="eventLog", daemon=True)
+        self.thread.start()
+
+    def emit(self, kind, *fields):
+        game = CURRENT.get()
+        if game is None:
+            game = begin()
+        tick = 0 if game.state is None else game.state.tick
+        self.batch.append((kind, game.id, tick) + fields)
+        if len(self.batch) >= self.batchSize:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        if not self.held:
+            try:
+                self.queue.put_nowait(batch)
+                return
+            except queue.Full:
+                pass
+        loop = runningLoop()
+        if loop is None:
+            self.queue.put(batch)  # waits here while the writer is QUEUED batches behind
+            return
+        self.held.append(batch)  # never waits on the loop, every other game would wait too
+        if self.handing is None:
+            self.handing = loop.create_task(self.handOver())
+
+    async def handOver(self):
+        import asyncio  # already loaded, this only runs on the loop
+        while self.held:
+            await asyncio.to_thread(self.queue.put, self.held[0])
+            self.held.popleft()
+        self.handing = None
+
+    async def settle(self):
+        # waits, without holding up the event loop, until the writer has the held batches
+        if self.handing is not None:
+            import asyncio
+            await asyncio.shield(self.handing)
+
+    def run(self):
+        try:
+            for data in self.encode(batches(self.queue)):
+                self.file.write(data)
+        except OSError as err:
+            self.error = err
+            for _ in batches(self.queue):
+                pass  # keep taking batches so the game never waits on a dead writer
+
+    def close(self):
+        self.flush()
+        if self.handing is None:
+            for batch in self.held:
+                self.queue.put(batch)
+            self.held.clear()
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+
+def runningLoop():
+    # the event loop running on this thread, None off one - asyncio isn't imported for it,
+    # headless runs never load it and there can't be a loop without it
+    asyncio = sys.modules.get("asyncio")
+    if asyncio is None:
+        return None
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def batches(waiting):
+    # the batches put on the queue until None
+    return iter(waiting.get, None)
+
+
+def jsonLines(batches):
+    for batch in batches:
+        lines = []
+        for event in batch:
+            names, _ = KINDS[event[0]]
+            record = {"kind": event[0], "game": event[1], "tick": event[2]}
+            record.update(zip(names, event[3:]))
+            lines.append(json.dumps(record, separators=(",", ":")))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def binaryRecords(batches):
+    yield HEADER.pack(MAGIC, VERSION)
+    table = {}  # text -> its number, each one is written once before the first event using it
+    for batch in batches:
+        parts = []
+        for event in batch:
+            kind = event[0]
+            values = list(event[1:])
+            for at, kindOfField in enumerate(KINDS[kind][1], start=2):
+                if kindOfField == "s":
+                    text = values[at]
+                    number = table.get(text)
+                    if number is None:
+                        number = table[text] = len(table)
+                        raw = text.encode("utf-8")
+                        parts.append(TEXT.pack(TEXT_KIND, len(raw)) + raw)
+                    values[at] = number
+            parts.append(RECORDS[kind].pack(CODES[kind], *values))
+        yield b"".join(parts)
+
+
+def read(path):
+    # every event in a log as a dict, without reading the whole file in at once
+    with open(path, 'rb') as readFile:
+        start = readFile.read(HEADER.size)
+        if len(start) == HEADER.size and HEADER.unpack(start)[0] == MAGIC:
+            if HEADER.unpack(start)[1] != VERSION:
+                raise ValueError(f"Event log version {HEADER.unpack(start)[1]} is not supported")
+            yield from readBinary(readFile)
+            return
+        readFile.seek(0)
+        for line in readFile:
+            if line.strip():
+                yield json.loads(line)
+
+
+def readBinary(readFile):
+    # kind code -> (kind, record, dict keys, where the text fields are in the record)
+    layouts = [None] + [(kind, RECORDS[kind], ("kind", "game", "tick") + names,
+                         tuple(3 + at for at, kindOfField in enumerate(types) if kindOfField == "s"))
+                        for kind, (names, types) in KINDS.items()]
+    texts = []
+    data = b""
+    at = 0
+    while True:
+        more = readFile.read(READ_SIZE)
+        if not more:
+            break
+        data = data[at:] + more
+        at = 0
+        while at < len(data):
+            code = data[at]
+            if code == TEXT_KIND:
+                if at + TEXT.size > len(data):
+                    break
+                _, size = TEXT.unpack_from(data, at)
+                if at + TEXT.size + size > len(data):
+                    break
+                texts.append(data[at + TEXT.size:at + TEXT.size + size].decode("utf-8"))
+                at += TEXT.size + size
+                continue
+            kind, record, keys, textAt = layouts[code]
+            if at + record.size > len(data):
+                break
+            values = list(record.unpack_from(data, at))
+            at += record.size
+            values[0] = kind
+            for field in textAt:
+                values[field] = texts[values[field]]
+            yield dict(zip(keys, values))
+    if at < len(data):
+        raise ValueError("The event log ends partway through an event")
+
+
+def start(path, **options):
+    global ACTIVE
+    if ACTIVE is None:
+        ACTIVE = Log(path, **options)
+    return ACTIVE
+
+
+def stop():
+    global ACTIVE
+    log, ACTIVE = ACTIVE, None
+    if log is not None:
+        log.close()
+
+
+def begin():
+    # a new game in this session (or batch trail) - events from here on belong to it
+    if ACTIVE is None:
+        return None
+    game = Game(next(ACTIVE.games))
+    CURRENT.set(game)
+    return game
+
+
+def follow(state):
+    # the game's trail has been set up, its ticks are the event times from now on
+    if ACTIVE is None:
+        return
+    game = CURRENT.get()
+    if game is None or game.state is not None:
+        game = begin()  # a trail that didn't start with begin(), like a replay from a keyframe
+    game.state = state
+    inventory = state.inventory
+    ACTIVE.emit("start", state.player.profession, len(state.party), state.player.money, inventory.oxen,
+                inventory.ammo, inventory.clothes, inventory.food, state.miles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print an event log as JSON lines")
+    parser.add_argument("log")
+    args = parser.parse_args()
+    try:
+        for event in read(args.log):
+            print(json.dumps(event))
+    except BrokenPipeError:
+        sys.stderr.close()  # piped into head
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,98 @@
 # Updates the date on the game header
+#
+# The date is kept as a day number (date.toordinal()) so moving it on any number of days
+# is one addition, and each day's header text is formatted once and then reused. Season
+# and weather come from tables with an entry per day, built once when this is imported,
+# so game rules can look them up without any date math.
+
+from datetime import date, datetime
+
+SEASONS = ("winter", "spring", "summer", "autumn")
+MONTH_SEASONS = (0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0)  # January to December
+MONTH_TEMPERATURES = (30, 36, 44, 51, 58, 66, 74, 73, 64, 52, 40, 32)  # average °F along the trail
+WEATHER = ((20, "very cold"), (40, "cold"), (55, "cool"), (70, "warm"), (200, "hot"))  # up to °F
+
+TABLE_YEARS = range(1846, 1856)  # games that wander outside these years fall back to date math
+TABLE_START = date(TABLE_YEARS[0], 1, 1).toordinal()
+
+
+def buildTables():
+    # one entry per day for every year in TABLE_YEARS
+    seasons = bytearray()
+    temperatures = bytearray()
+    for year in TABLE_YEARS:
+        for month in range(12):
+            nextMonth = date(year + 1, 1, 1) if month == 11 else date(year, month + 2, 1)
+            days = nextMonth.toordinal() - date(year, month + 1, 1).toordinal()
+            seasons += bytes([MONTH_SEASONS[month]]) * days
+            temperatures += bytes([MONTH_TEMPERATURES[month]]) * days
+    return seasons, temperatures
+
+
+SEASON_TABLE, TEMPERATURE_TABLE = buildTables()
+TEXT = {}  # day number -> the date as the header shows it
+
+
+def formatDay(day):
+    text = TEXT.get(day)
+    if text is None:
+        text = TEXT[day] = date.fromordinal(day).strftime('%B %d, %Y')  # reformats the date
+    return text
+
+
+def season(day):
+    at = day - TABLE_START
+    if 0 <= at < len(SEASON_TABLE):
+        return SEASONS[SEASON_TABLE[at]]
+    return SEASONS[MONTH_SEASONS[date.fromordinal(day).month - 1]]
+
+
+def temperature(day):
+    at = day - TABLE_START
+    if 0 <= at < len(TEMPERATURE_TABLE):
+        return TEMPERATURE_TABLE[at]
+    return MONTH_TEMPERATURES[date.fromordinal(day).month - 1]
+
+
+def weather(day):
+    degrees = temperature(day)
+    for upTo, name in WEATHER:
+        if degrees <= upTo:
+            return name
 
-from datetime import timedelta
 
 class GameDate:
+    __slots__ = ("day",)
+
     def __init__(self, start_date): #start date must be input by the user
-        self.current_date = start_date
+        # a date, datetime or day number
+        self.day = start_date if isinstance(start_date, int) else start_date.toordinal()
 
     def advance_days(self, days):
-        self.current_date += timedelta(days=days) #adds x number of days to the date
+        self.day += days #adds x number of days to the date
 
     def get_date(self):
-        return self.current_date
+        return datetime.fromordinal(self.day)
+
+    @property
+    def current_date(self):
+        return self.get_date()
+
+    def text(self):
+        return formatDay(self.day)
+
+    def season(self):
+        return season(self.day)
+
+    def weather(self):
+        return weather(self.day)
+
+    def copy(self):
+        return GameDate(self.day)
+
+    def __getstate__(self):
+        return self.day
 
+    def __setstate__(self, state):
+        # saves pickled before the day number kept a datetime in current_date
+        self.day = state["current_date"].toordinal() if isinstance(state, dict) else state
@@ -0,0 +1,81 @@
+# Game state as small slotted objects instead of lists read through index constants and
+# dicts of dicts. A slotted object has no per-object __dict__, so a whole trail is a few
+# hundred bytes and copying one (for a simulation, a replay keyframe, a session) is a
+# handful of attribute reads.
+#
+# snapshot() turns an object into plain tuples and fromSnapshot() turns them back.
+
+import map
+from gameDate import GameDate
+
+ITEMS = ("oxen", "ammo", "clothes", "food")  # the inventory, also the item names in encounters.json
+
+
+class Player:
+    __slots__ = ("name", "profession", "money", "hp", "level")
+
+    def __init__(self, name, profession, money, hp, level):
+        self.name = name
+        self.profession = profession
+        self.money = money
+        self.hp = hp
+        self.level = level
+
+    def snapshot(self):
+        return self.name, self.profession, self.money, self.hp, self.level
+
+    @classmethod
+    def fromSnapshot(cls, snapshot):
+        return cls(*snapshot)
+
+    def copy(self):
+        return Player(*self.snapshot())
+
+
+class Inventory:
+    __slots__ = ITEMS
+
+    def __init__(self, oxen=0, ammo=0, clothes=0, food=0):
+        self.oxen = oxen
+        self.ammo = ammo  # bullets, not boxes
+        self.clothes = clothes
+        self.food = food  # lbs
+
+    def snapshot(self):
+        return self.oxen, self.ammo, self.clothes, self.food
+
+    @classmethod
+    def fromSnapshot(cls, snapshot):
+        return cls(*snapshot)
+
+    def copy(self):
+        return Inventory(*self.snapshot())
+
+
+class Trail:
+    # everything about one game in progress
+    __slots__ = ("player", "party", "inventory", "date", "map", "miles", "tick", "outcome")
+
+    def __init__(self, player, party, inventory, date, m, miles, tick=0, outcome=None):
+        self.player = player
+        self.party = party  # names of the living party members
+        self.inventory = inventory
+        self.date = date
+        self.map = m
+        self.miles = miles  # miles left to Oregon City
+        self.tick = tick
+        self.outcome = outcome  # None while the trail goes on
+
+    def snapshot(self):
+        return (self.player.snapshot(), tuple(self.party), self.inventory.snapshot(), self.date.day,
+                self.map.snapshot(), self.miles, self.tick, self.outcome)
+
+    @classmethod
+    def fromSnapshot(cls, snapshot):
+        player, party, inventory, date, m, miles, tick, outcome = snapshot
+        return cls(Player.fromSnapshot(player), list(party), Inventory.fromSnapshot(inventory), GameDate(date),
+                   map.Map.fromSnapshot(m), miles, tick, outcome)
+
+    def copy(self):
+        return Trail(self.player.copy(), list(self.party), self.inventory.copy(), self.date.copy(),
+                     self.map.copy(), self.miles, self.tick, self.outcome)
@@ -0,0 +1,35 @@
+# Landmarks along the trail - the rivers, forts and the end of the trail live in
+# landmarks.json and are compiled into an index keyed by map row, so finding what is at
+# the wagon's position is one lookup however many landmarks the trail has.
+#
+# kinds: "river" stops the trail until it is crossed, "fort" has a shop, "finish" is
+# Oregon City. A landmark with "art" and "message" greets the player on arrival.
+
+import json
+import os
+
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'landmarks.json')
+
+KINDS = ("river", "fort", "finish")
+
+
+def loadTable(path=TABLE_FILE):
+    with open(path, encoding="utf-8") as readFile:
+        return compileTable(json.load(readFile))
+
+
+def compileTable(landmarks):
+    # returns {row: landmark}
+    index = {}
+    for landmark in landmarks:
+        if landmark["kind"] not in KINDS:
+            raise ValueError(f"Unknown kind of landmark: {landmark['kind']}")
+        if landmark["row"] in index:
+            raise ValueError(f"Two landmarks on row {landmark['row']}")
+        index[landmark["row"]] = landmark
+    return index
+
+
+def rows(table, kind):
+    # every row with a landmark of this kind, for simulations that check whole arrays at once
+    return tuple(sorted(row for row, landmark in table.items() if landmark["kind"] == kind))
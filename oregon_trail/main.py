@@ -35,40 +35,39 @@ This game is a simpler version of The Oregon Trail
     - take ferry (decrease money, add 4 days)
 10. Create a save and load feature
 '''
+import asyncio
+import os
 import pickle
 import random
-import ascii
+import sys
+import autosave
+import console
 import map
+import engine
+import eventLog
+import metrics
+import gameState
+import replayLog
+import saveFormat
+import screen
+import streams
+import terrain
 from datetime import datetime
-from time import time, sleep
 from gameDate import GameDate
 
-NAME = 0
-TYPE = 1
-MONEY = 2
-HP = 3
-LEVEL = 4
-
-# place holders in inventory
-OXEN = 0
-AMMO = 1
-CLOTHES = 2
-FOOD = 3
-
 DIVIDER = '~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~'
 
 BIN_FILE = 'oregontrail.bin'
+SLOT_FOLDER = 'saves'  # saveFormat's save slots, BIN_FILE is the autosave
+NAME_LENGTH = 20  # letters in a name - every name goes in the save, which holds up to 255 bytes of one
 
 
-def sPrint(text, delay=0.03):
-    import time
-    for x in text:
-        print(x, end="")
-        time.sleep(delay)
-    print()
+async def sPrint(con, text, delay=0.03):
+    with metrics.span("sPrint"):
+        await con.typeOut(text, delay)  # press Enter to finish the message
 
 
-def displayIntro():
+async def displayIntro(con):
     story = """
     Get ready to complete the last leg of The Oregon Trail. As the wagon leader, 
     it is up to you to get your party from Fort Boise to Oregon City. This trek is 
@@ -85,113 +84,179 @@ def displayIntro():
     hoping you and your wagon aren't swallowed alive! If you have money, you can take a ferry. 
     Resting and having an adequate food supply can increase health. Good luck, travelers!
     """
-    choice = input("View the story? (y/n): ")
+    choice = await con.ask("View the story? (y/n): ")
     if choice.lower() == "y":
-        sPrint(story)
-        print(DIVIDER)
-    choice = input("View the rules? (y/n): ")
+        await sPrint(con, story)
+        con.say(DIVIDER)
+    choice = await con.ask("View the rules? (y/n): ")
     if choice.lower() == "y":
-        sPrint(rules, 0.06)
-        print(DIVIDER)
+        await sPrint(con, rules, 0.06)
+        con.say(DIVIDER)
 
 
-def gamePlay(inventory, game_date, player, party, m, milesLeft=None):
+async def gamePlay(con, inventory, game_date, player, party, m, milesLeft=None, rng=random, display=None,
+                   timers=None, saveFile=BIN_FILE, slot=None):
     if milesLeft is None:
-        totalMiles = loadGame(BIN_FILE)[0]  # load miles from saved game
+        totalMiles = loadGame(saveFile)[0]  # load miles from saved game
     else:
         totalMiles = milesLeft  # if a value is provided, use that
 
-    gameOn = True  # when true, the game is still happening
-
-    # Setting up for three different timers
-    lastAction = {
-        "sixty_seconds": time(),
-        "fifteen_seconds": time(),
-        "forty_seconds": time()
-    }
-
-    while gameOn:
-        currentTime = time()
-
-        if currentTime - lastAction['sixty_seconds'] > 60:  # if current time - the 60 second timer is greater than 60
-            game_date.advance_days(1)  # date increases
-            map.move(m, "down")  # move down on the map
-            lastAction['sixty_seconds'] = currentTime  # reset the timer
-
-        if currentTime - lastAction['fifteen_seconds'] > 15:  # every 15 seconds
-            inventory[FOOD] -= 13  # food eaten
-            totalMiles -= 23  # miles traveled
-            lastAction['fifteen_seconds'] = currentTime
-            # return totalMiles
-
-        if currentTime - lastAction['forty_seconds'] > 40:  # every 40 seconds, random encounter
-            encounter(player, inventory, party, m)
-            lastAction['forty_seconds'] = currentTime
-
-        if inventory[OXEN] <= 0:  # no oxen to pull wagon
-            gameOn = False
-            return "stuck"
-        elif inventory[FOOD] <= -10:  # not enough food
-            gameOn = False
-            return "starved"
-        elif len(party) == 0:  # everyone is dead
-            gameOn = False
-            return "grim fate"
-        elif map.getPlayerPos(m) == 9 and totalMiles <= 0:  # user survived the whole trail
-            gameOn = False
-            return "oregon"
-        elif inventory[CLOTHES] < 0:  # no clothes for your wagon party, plus a little buffer - why it isnt <= 0
-            gameOn = False
-            return "frozen"
-        elif saveGame(totalMiles, inventory, game_date, player, party, m):
-            return "saved"
-
-        header = gameHeader(player, inventory, game_date, totalMiles)
-        print(header)  # always show header if not in menu
-
-        if view_menu():  # opens gameMenu if user enters "M"
-            gameMenu(inventory, party, m, player, game_date, totalMiles)
-
-        if player[HP] <= 0 and inventory[FOOD] <= -10:  # if the player has no health or food
-            gameOn = False
-
-        # Encounters based on map position
-        if map.getPlayerPos(m) == 2 or map.getPlayerPos(m) == 6:
-            crossRiver(inventory, party, player, game_date)
-            map.move(m, "down")  # move on the map after crossing the river
-        if map.getPlayerPos(m) == 4:
-            print(ascii.fort_1)
-            sPrint("Welcome to The Dalles. The shop is open.")
-        if map.getPlayerPos(m) == 8:
-            print(ascii.fort_2)
-            sPrint("Welcome to Fort Walla Walla. The shop is open.")
-
-    return totalMiles
-
-
-def view_menu():
-    return input('Press M to view menu: ').lower() == 'm'
+    # the rules live in engine.py - the trail clock runs on the scheduler while the player
+    # answers prompts, so days, food and encounters keep happening on time
+    state = engine.newState(player, party, inventory, game_date, m, totalMiles)
+    return await playTrail(con, state, rng, display, timers, saveFile, slot=slot)
+
+
+async def playTrail(con, state, rng=random, display=None, timers=None, saveFile=BIN_FILE, arrivedAt=None,
+                    slot=None):
+    # plays a trail already under way until it ends - a replay starts here from a keyframe.
+    # slot is (folder, slot number or None for the first free one) Save game writes to, None
+    # to only autosave
+    state.outcome = engine.checkOutcome(state)
+    if state.outcome is not None:
+        return state.outcome
+    if timers is None:
+        timers = con.newTimers()
+    saver = autosave.AutoSaver(saveFile)
+    con.trail = state
+
+    async def onTick():
+        await con.atPrompt()  # ticks that come due during a turn wait for the next prompt
+        if state.outcome is not None:
+            return  # a held tick that was still waiting when the game ended
+        if engine.atRiver(state):
+            timers.pause()  # the clock stops until the river is crossed
+            return
+        with metrics.span("tick"):
+            await showEvents(con, engine.tick(state, rng))
+        if con.channel is not None:
+            con.channel.publish(state)
+        if display is not None:
+            with metrics.span("render"):
+                display.render(gameFrame(state))
+        if state.outcome is not None:
+            turns.cancel()  # the game ended while the player was at a prompt
+
+    timers.every(engine.TICK_SECONDS, onTick)
+    turns = asyncio.ensure_future(playerTurns(con, state, rng, display, saver, timers, arrivedAt, slot))
+    clock = asyncio.ensure_future(timers.run())
+    try:
+        await turns
+    except asyncio.CancelledError:
+        if state.outcome is None:
+            raise  # cancelled from outside, not by the game ending
+    finally:
+        clock.cancel()
+        await saver.closing()  # the writer thread finishes the last autosave, the loop carries on
+        if con.recorder is not None:
+            con.recorder.ended(state.tick)
+        if con.channel is not None:
+            con.channel.publish(state)  # how it ended
+        if eventLog.ACTIVE is not None:
+            eventLog.ACTIVE.emit("ended", state.outcome or "quit")
+            eventLog.ACTIVE.flush()  # a finished game's events go to disk now, not with a later game's
+            await eventLog.ACTIVE.settle()
+    return state.outcome
+
+
+async def playerTurns(con, state, rng, display, saver, timers, arrivedAt=None, slot=None):
+    player = state.player
+    inventory = state.inventory
+    party = state.party
+    m = state.map
+    game_date = state.date
+
+    while state.outcome is None:
+        if con.recorder is not None:
+            con.recorder.turn(state, rng, arrivedAt)  # keyframes for seeking through a replay
+        if metrics.ACTIVE is not None:
+            metrics.ACTIVE.trail(state)
+        if eventLog.ACTIVE is not None:
+            await eventLog.ACTIVE.settle()  # a game whose events the disk is behind on waits here
+        if con.channel is not None:
+            con.channel.publish(state)  # whatever the last turn's menus and landmarks changed
+        saveGame(state.miles, inventory, game_date, player, party, m, saver)  # written in the background
+
+        with metrics.span("render"):
+            if display is None:
+                con.say(gameHeader(player, inventory, game_date, state.miles))  # always show header if not in menu
+            else:  # the header and map stay pinned at the top, only what changed is redrawn
+                display.render(gameFrame(state), force=True)  # about to wait on the player
+
+        if await view_menu(con):  # opens gameMenu if user enters "M"
+            if await gameMenu(con, inventory, party, m, player, game_date, state.miles, saver, rng,
+                              slot) == "saved":
+                state.outcome = "saved"
+                return
+
+        # Encounters based on map position - one lookup each time the wagon enters a row,
+        # again if handling the landmark moved it on. arrivedAt is the row handled last
+        while map.getPlayerPos(m) != arrivedAt:
+            arrivedAt = map.getPlayerPos(m)
+            landmark = engine.landmarkAt(arrivedAt, engine.landmarksOf(m))
+            if landmark is not None and eventLog.ACTIVE is not None:
+                eventLog.ACTIVE.emit("arrived", arrivedAt, landmark["kind"])
+            if landmark is not None and landmark["kind"] in ARRIVALS:
+                with metrics.span("landmark"):
+                    await ARRIVALS[landmark["kind"]](con, state, landmark, rng, timers)
+
+        state.outcome = engine.checkOutcome(state)
+
+
+async def arriveRiver(con, state, landmark, rng, timers):
+    await crossRiver(con, state.inventory, state.party, state.player, state.date, rng)
+    engine.moveDown(state.map)  # move on the map after crossing the river
+    timers.resume()
+
+
+async def arriveFort(con, state, landmark, rng, timers):
+    if "message" in landmark:
+        con.sayArt(landmark["art"])
+        await sPrint(con, landmark["message"])
+
+
+ARRIVALS = {"river": arriveRiver, "fort": arriveFort}  # what happens on reaching each kind of landmark
+
+
+def gameFrame(state):
+    header = gameHeader(state.player, state.inventory, state.date, state.miles)
+    return header.splitlines() + map.renderMap(state.map)
+
+
+async def showEvents(con, events):
+    for event, message in events:
+        if metrics.ACTIVE is not None:
+            metrics.ACTIVE.event(event)
+        if con.channel is not None:
+            con.channel.event(event, message)
+        if event in engine.DEATHS:
+            con.sayArt("gravestone")
+        await sPrint(con, message)
+        await con.pause(.5)
+
+
+async def view_menu(con):
+    return (await con.ask('Press M to view menu: ')).lower() == 'm'
 
 
 def gameHeader(player, inventory, game_date, totalMiles):
-    while True:
-        dateNow = game_date.current_date.strftime('%B %d, %Y')  # reformats the date
+    dateNow = game_date.text()  # formatted once per day
 
-        header = f'''
+    header = f'''
         -=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-
                             {dateNow}
 
             HEALTH         MILES REMAINING        FOOD REMAINING 
-             {player[HP]}\t\t\t   {totalMiles} miles \t\t\t  {inventory[FOOD]} lbs 
+             {player.hp}\t\t\t   {totalMiles} miles \t\t\t  {inventory.food} lbs 
 
                     press M at any time to view menu
         -=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-=x=-
         '''
 
-        return header
+    return header
 
 
-def gameMenu(inventory, party, m, player, game_date, totalMiles):
+async def gameMenu(con, inventory, party, m, player, game_date, totalMiles, saver=None, rng=random, slot=None):
     inMenu = True
     menu = '''
     1. Continue on trail
@@ -206,61 +271,56 @@ def gameMenu(inventory, party, m, player, game_date, totalMiles):
     '''
 
     showInventory = f'''
-    OXEN: {inventory[OXEN]}
-    AMMO: {inventory[AMMO]} bullets
-    CLOTHES: {inventory[CLOTHES]} outfits
-    FOOD: {inventory[FOOD]} lbs
+    OXEN: {inventory.oxen}
+    AMMO: {inventory.ammo} bullets
+    CLOTHES: {inventory.clothes} outfits
+    FOOD: {inventory.food} lbs
     '''
 
     while inMenu:
-        print(menu)
-        choice = input(">>> ")
+        con.say(menu)
+        choice = await con.ask(">>> ")
         if choice in ["1", "2", "3", "4", "5", "6", "7", "8", "9"]:
             if choice == "1":
-                encounter(player, inventory, party, m)
+                await encounter(con, player, inventory, party, m, rng)
                 break  # break will return us to the header once the action is done
             elif choice == "2":
-                print(showInventory)
+                con.say(showInventory)
                 break
             elif choice == "3":
-                print("Party Members:")
+                con.say("Party Members:")
                 for person in party:
-                    print("- " + person)  # print each person in the wagon party
+                    con.say("- " + person)  # print each person in the wagon party
                 break
             elif choice == "4":
-                map.displayMap(m)
+                con.say(map.mapText(m))
                 break
             elif choice == "5":
-                hunt(inventory)
+                await hunt(con, inventory, rng)
                 break
             elif choice == "6":
-                sPrint("You rest for 2 days.")  # resting restores health and adds 2 days
-                player[HP] += 20
-                game_date.advance_days(2)
+                await showEvents(con, [engine.rest(player, game_date)])  # resting restores health and adds 2 days
                 break
-            elif choice == "7" and (  # the shop is only available if you
-                    map.getPlayerPos(m) == 4 or  # are at the starting position or one of the forts
-                    map.getPlayerPos(m) == 8 or
-                    map.getPlayerPos(m) == 0
-            ):
-                inventory = supplyStore(player, inventory)
+            elif choice == "7" and engine.kindAt(map.getPlayerPos(m), engine.landmarksOf(m)) == "fort":
+                # the shop is only available if you are at the starting position or one of the forts
+                await supplyStore(con, player, inventory)
                 break
 
             elif choice == "8":  # return to header
                 break
             elif choice == "9":
-                saveGame(totalMiles, inventory, game_date, player, party, m)
-                sPrint("Your progress has been saved.")
-                exit()
+                saveGame(totalMiles, inventory, game_date, player, party, m, saver)
+                if slot is not None:
+                    await saveToSlot(con, slot, totalMiles, inventory, game_date, player, party, m)
+                return "saved"  # ends the game, ending() says it was saved
             else:
-                sPrint("There is no shop nearby.")  # catches if the user presses 7 not near a shop
+                await sPrint(con, "There is no shop nearby.")  # catches if the user presses 7 not near a shop
         else:
-            sPrint("Please enter a valid selection")
-    return inventory  # updates the inventory
+            await sPrint(con, "Please enter a valid selection")
+    return None
 
 
-def createCharacter():
-    player = ["", "", 0, 0, 0]
+async def createCharacter(con):
     characterMenu = '''
     Many kinds of people made the journey on The Oregon Trail.
 
@@ -283,60 +343,45 @@ def createCharacter():
 
     '''
 
-    print(characterMenu)
-    choice = input(">>> ")
+    con.say(characterMenu)
+    choice = await con.ask(">>> ")
     while choice not in ("1", "2", "3"):
-        print("Please make a valid selection.")
-        choice = input(">>> ")
-    if choice == "1":
-        print(ascii.banker2)
-        player[NAME] = input("What is the first name of the wagon leader?: ")
-        while len(player[NAME]) == 0:  # wagon leader must have a name
-            player[NAME] = input("What is the first name of the wagon leader?: ")
-        player[TYPE] = "Banker"
-        player[MONEY] = 1000
-        player[HP] = 500
-        player[LEVEL] = 1
-
-        return player
-    elif choice == "2":
-        print(ascii.carpenter)
-        player[NAME] = input("What is the first name of the wagon leader?: ")
-        while len(player[NAME]) == 0:
-            player[NAME] = input("What is the first name of the wagon leader?: ")
-        player[TYPE] = "Carpenter"
-        player[MONEY] = 750
-        player[HP] = 350
-        player[LEVEL] = 2
-        return player
-    elif choice == "3":
-        print(ascii.farmer)
-        player[NAME] = input("What is the first name of the wagon leader?: ")
-        while len(player[NAME]) == 0:
-            player[NAME] = input("What is the first name of the wagon leader?: ")
-        player[TYPE] = "Farmer"
-        player[MONEY] = 400
-        player[HP] = 200
-        player[LEVEL] = 3
-        return player
-
-
-def wagon_party():
+        con.say("Please make a valid selection.")
+        choice = await con.ask(">>> ")
+    profession, art = {
+        "1": ("Banker", "banker2"),
+        "2": ("Carpenter", "carpenter"),
+        "3": ("Farmer", "farmer"),
+    }[choice]
+    con.sayArt(art)
+    name = await askName(con, "What is the first name of the wagon leader?: ")  # wagon leader must have a name
+    return engine.newPlayer(name, profession)
+
+
+async def askName(con, prompt, missing=None):
+    # a name that isn't empty and fits in a save, asked again until it is
+    name = await con.ask(prompt)
+    while len(name) == 0 or len(name) > NAME_LENGTH:
+        if len(name) > NAME_LENGTH:
+            con.say(f"Names can be at most {NAME_LENGTH} letters.")
+        elif missing is not None:
+            con.say(missing)
+        name = await con.ask(prompt)
+    return name
+
+
+async def wagon_party(con):
     party = []
     names = "What are the first names of the four other members in your party? Enter one at a time."
-    print(names)
+    con.say(names)
     for i in range(4):
-        name = input(">>> ")
-        while len(name) == 0:
-            print("Enter party member's name")
-            name = input(">>> ")
-        party.append(name)
+        party.append(await askName(con, ">>> ", "Enter party member's name"))
     return party
 
 
-def supplyStore(player, existing_inventory=None):
+async def supplyStore(con, player, existing_inventory=None):
     if existing_inventory == None:
-        inventory = [0, 0, 0, 0]  # use this the first time we go into the store
+        inventory = gameState.Inventory()  # use this the first time we go into the store
     else:
         inventory = existing_inventory  # this prevents the inventory from resetting
         # if we go back into the store later on
@@ -354,69 +399,55 @@ def supplyStore(player, existing_inventory=None):
 
     '''
 
-    while player[MONEY] > 0 and keepShopping:  # while the player has money and keepShopping is true
-        print(f"You have ${player[MONEY]}")
-        print(storeMenu)
+    while player.money > 0 and keepShopping:  # while the player has money and keepShopping is true
+        con.say(f"You have ${player.money}")
+        con.say(storeMenu)
 
-        purchase = int(input("Make a selection\n>>> "))
+        purchase = await askNumber(con, "Make a selection\n>>> ")
         while purchase not in (1, 2, 3, 4, 5):
-            purchase = int(input("Make a selection\n>>> "))
+            purchase = await askNumber(con, "Make a selection\n>>> ")
         if purchase in range(1, 5):  # actually 1-4
-            how_many = int(input("How many would you like to purchase?: "))
-            if purchase == 1:
-                cost = how_many * 20  # number purchased times cost of item
-            elif purchase == 2:
-                cost = how_many * 3
-            elif purchase == 3:
-                cost = how_many * 10
-            elif purchase == 4:
-                cost = how_many
-            if player[MONEY] < cost:  # if the player has less money than what the purchase costs
-                sPrint("You don't have enough money to buy that.")
+            how_many = await askNumber(con, "How many would you like to purchase?: ")
+            while how_many is None or how_many <= 0:
+                con.say("Please enter a number above 0.")
+                how_many = await askNumber(con, "How many would you like to purchase?: ")
+            item = gameState.ITEMS[purchase - 1]
+            if not engine.purchase(player, inventory, item, how_many):  # costs more than the player has
+                await sPrint(con, "You don't have enough money to buy that.")
                 continue
-            else:  # had to separate this so the inventory doesn't increase when the player doesn't have enough $
-                if purchase == 1:
-                    inventory[OXEN] += how_many  # adds to inventory
-                elif purchase == 2:
-                    inventory[AMMO] += (how_many * 10)
-                elif purchase == 3:
-                    inventory[CLOTHES] += how_many
-                elif purchase == 4:
-                    inventory[FOOD] += how_many
-                player[MONEY] -= cost  # subtracts what the player spent from what they have
         elif purchase == 5:  # can't exit the store without certain necessary supplies
-            if inventory[OXEN] < 2:
-                sPrint("You need at least 2 oxen to pull your wagon.")
-            elif inventory[FOOD] <= 0:
-                sPrint("You won't make it very far without food.")
+            missing = engine.canLeaveStore(inventory)
+            if missing:
+                await sPrint(con, missing)
             else:
                 break  # exit store
         else:
-            print("Please make a valid selection")
+            con.say("Please make a valid selection")
+
+    return inventory
 
-    return inventory, storeMenu
 
+async def askNumber(con, prompt):
+    # the whole number typed, None for anything else
+    answer = (await con.ask(prompt)).strip()
+    try:
+        return int(answer)
+    except ValueError:
+        return None
 
-def hunt(inventory):
-    print(ascii.deer)
 
-    if inventory[AMMO] < 10:
-        sPrint("You do not have enough ammo to hunt.")
+async def hunt(con, inventory, rng=random):
+    con.sayArt("deer")
+
+    if inventory.ammo < 10:
+        await sPrint(con, "You do not have enough ammo to hunt.")
         return  # exits the hunt option without giving the option to hunt
-    shoot = input("Press 'S' to shoot or 'X' to escape\n>>> ").lower()
-    if shoot == 'x':
-        return  # escapes the hunting screen
-    elif shoot == 's':
-        chance = random.randint(1, 5)
-        if chance == 2:  # if the random number is 2, the animal has been shot
-            inventory[FOOD] += 100
-            sPrint("Good aim. From the animal you shot, you got 100 pounds of meat.")
-        else:
-            sPrint("No luck this time.")
-        inventory[AMMO] -= 10  # takes ammo regardless of if the hunt was successful or not
+    shoot = (await con.ask("Press 'S' to shoot or 'X' to escape\n>>> ")).lower()
+    if shoot == 's':
+        await showEvents(con, [engine.hunt(inventory, rng)])
 
 
-def crossRiver(inventory, party, player, game_date):
+async def crossRiver(con, inventory, party, player, game_date, rng=random):
     menu = """
 
     1. Ford the river on foot
@@ -424,170 +455,151 @@ def crossRiver(inventory, party, player, game_date):
     3. Take a ferry for $10
 
     """
-    print(ascii.river)
-    print(menu)
-    choice = input(">>> ")
+    con.sayArt("river")
+    con.say(menu)
+    choice = await con.ask(">>> ")
     while choice not in ("1", "2", "3"):
-        print("Please make a valid selection.")
-        choice = input(">>> ")
-    if choice == "1":
-        game_date.advance_days(3)
-        odds = random.randint(1, 10)
-        if odds in (3, 4, 5, 6):  # fording the river is risky, high chance of losing items/party members
-            inventory[CLOTHES] -= 2
-            bulletsLost = random.randint(1, inventory[AMMO] - 1)
-            inventory[AMMO] -= bulletsLost
-            sPrint(f"The water was higher than anticipated. You lost 2 outfits and {bulletsLost} bullets.")
+        con.say("Please make a valid selection.")
+        choice = await con.ask(">>> ")
+    choice = engine.RIVER_CHOICES[int(choice) - 1]
+    await showEvents(con, [engine.crossRiver(choice, inventory, party, player, game_date, rng)])
 
-        else:
-            sPrint("Your party and wagon made it across the river safely.")
-    elif choice == "2":
-        game_date.advance_days(5)
-        odds = random.randint(1, 4)
-        if odds in (2, 3):
-            inventory[OXEN] -= 1
-            n = random.randint(0, len(party) - 1)
-            casualty = party.pop(n)  # removes casualty from list of party members
-            print(ascii.gravestone)
-            sPrint(f"Your wagon sunk. You lost 1 ox and {casualty}.")
-            return party
-        else:
-            sPrint("You made it across the river safely.")
-    elif choice == "3":
-        game_date.advance_days(4)
-        player[MONEY] -= 10
-        sPrint("You made it across the river safely.")
-        return player
-
-
-def encounter(player, inventory, party, m):
-    odds = random.randint(0, 75)
-    if len(party) == 0:  # if nobody is left in the wagon party
-        print(ascii.gravestone)
-        sPrint(f"{player[NAME]} has died of dysentery.")
-        gameOn = False  # ends game
-
-    # encounters based on random number (odds)
-    if odds in range(0, 4):
-        stolen = random.randint(0, inventory[CLOTHES])
-        inventory[CLOTHES] -= stolen
-        sPrint(f"A thief comes during the night and steals {stolen} sets of clothing.")
-    elif odds in range(4, 9):
-        inventory[OXEN] -= 1
-        sPrint("One of your ox has fallen sick and died.")
-    elif odds in range(9, 14):
-        player[HP] -= 30
-        sPrint(f"{party[random.randint(0, len(party) - 1)]} has cholera.")
-    elif odds in range(14, 20):
-        person = random.randint(0, len(party) - 1)
-        casualty = party[person]
-        player[HP] -= 40
-        print(ascii.gravestone)
-        sPrint(f"{casualty} has died of typhoid.")
-        party.pop(person)
-        return party
-    elif odds in range(20, 25):
-        player[HP] += 10
-        inventory[FOOD] += 10
-        sPrint("You found edible wild fruit.")
-    elif odds in range(25, 30):
-        person = random.randint(0, len(party) - 1)
-        casualty = party[person]
-        player[HP] -= 40
-        print(ascii.gravestone)
-        sPrint(f"{casualty} has died of a snake bite.")
-        party.pop(person)
-        return party
-    elif odds in range(30, 36):
-        foodFound = random.randint(1, 50)
-        clothesFound = random.randint(1, 5)
-        ammoFound = random.randint(1, 100)
-        inventory[FOOD] += foodFound
-        inventory[CLOTHES] += clothesFound
-        inventory[AMMO] += ammoFound
-        sPrint(f"You've come across an abandoned wagon. "
-               f"You salvaged {foodFound}lbs of food, {clothesFound} outfits, "
-               f"and {ammoFound} bullets.")
-    elif odds in range(44, 50):
-        player[HP] -= 20
-        sPrint(f"You have broken your arm.")
-    elif odds in range(36, 44) or range(50, 76):
-        sPrint("Travelling along the trail.")
-
-    sleep(.5)
-
-
-def ending(result):  # what prints depending on how the game ends
+
+async def encounter(con, player, inventory, party, m, rng=random):
+    with metrics.span("encounter"):
+        await showEvents(con, [engine.encounter(player, inventory, party, rng)])
+
+
+async def ending(con, result):  # what prints depending on how the game ends
     if result == "starved":
-        print(ascii.starved)
-        sPrint("You ran out of food and starved to death.")
+        con.sayArt("starved")
+        await sPrint(con, "You ran out of food and starved to death.")
     elif result == "oregon":
-        print(ascii.celebrate)
-        sPrint("Congratulations, you completed the Oregon Trail!")
+        con.sayArt("celebrate")
+        await sPrint(con, "Congratulations, you completed the Oregon Trail!")
     elif result == "grim fate":
-        print(ascii.perished)
-        sPrint("You and your entire party have perished.")
+        con.sayArt("perished")
+        await sPrint(con, "You and your entire party have perished.")
     elif result == "stuck":
-        print(ascii.no_cows)
-        sPrint("You cannot continue with no oxen to pull your wagon.")
+        con.sayArt("no_cows")
+        await sPrint(con, "You cannot continue with no oxen to pull your wagon.")
     elif result == "frozen":
-        print(ascii.froze)
-        sPrint("You do not have any clothes left. You and your party froze to death in the mountains.")
+        con.sayArt("froze")
+        await sPrint(con, "You do not have any clothes left. You and your party froze to death in the mountains.")
     elif result == "saved":
-        sPrint("Your progress has been saved.")
+        await sPrint(con, "Your progress has been saved.")
 
 
-def saveGame(totalMiles, inventory, dateInGame, player_1, party, theMap):
-    saveData = {
-        "totalMiles": totalMiles,
-        "inventory": inventory,
-        "dateInGame": dateInGame,
-        "player_1": player_1,
-        "party": party,
-        "theMap": theMap
-    }
-    with open(BIN_FILE, 'wb') as writeBin:
-        pickle.dump(saveData, writeBin)
+def saveGame(totalMiles, inventory, dateInGame, player_1, party, theMap, saver=None, saveFile=BIN_FILE):
+    # encoded right away so later changes don't leak into the save
+    with metrics.span("save"):
+        data = saveFormat.encode(totalMiles, inventory, dateInGame, player_1, party, theMap)
+        if saver is None:
+            autosave.writeAtomic(saveFile, data)
+        else:
+            saver.mark(data)  # the autosave thread writes it
+    if metrics.ACTIVE is not None:
+        metrics.ACTIVE.saved(len(data))
+
+
+async def saveToSlot(con, slot, totalMiles, inventory, dateInGame, player_1, party, theMap):
+    folder, number = slot
+    data = saveFormat.encode(totalMiles, inventory, dateInGame, player_1, party, theMap)
+    record = saveFormat.slotRecord(totalMiles, dateInGame, player_1, party)
+    if number is None:
+        number = saveFormat.freeSlot(folder)
+    # written on another thread, the fsyncs would hold up every other game on the server
+    await asyncio.to_thread(saveFormat.writeSlot, folder, number, data, record)
+    con.say(f"Saved in slot {number + 1}.")
+
+
+async def chooseSave(con, saveFile, slotFolder):
+    # returns (the save to load, its slot number or None for the autosave), None for a new game
+    try:
+        slots = saveFormat.listSlots(slotFolder)
+    except ValueError:
+        slots = []
+        con.say("The save slots are damaged.")
+    if os.path.exists(saveFile):
+        con.say("a. The last autosave")
+    for summary in slots:
+        con.say(f"{summary['slot'] + 1}. {summary['name']} the {summary['profession']}, "
+                f"{summary['miles']} miles to go on {GameDate(summary['date']).text()}")
+    choice = (await con.ask("Load which save? (a for the autosave or a slot number): ")).strip().lower()
+    if choice == "a":
+        return saveFile, None
+    if choice.isdigit() and int(choice) - 1 in {summary["slot"] for summary in slots}:
+        return saveFormat.slotPath(slotFolder, int(choice) - 1), int(choice) - 1
+    con.say("There is no save like that.")
+    return None
 
 
 def loadGame(BIN_FILE):
     with open(BIN_FILE, 'rb') as readBin:
-        loadData = pickle.load(readBin)
-        milesLeft = loadData["totalMiles"]
-        inventory = loadData["inventory"]
-        dateInGame = loadData["dateInGame"]
-        player_1 = loadData["player_1"]
-        party = loadData["party"]
-        theMap = loadData["theMap"]
-        return milesLeft, inventory, dateInGame, player_1, party, theMap
-
-
-def main():
+        data = readBin.read()
+    if not data:
+        raise EOFError
+    if saveFormat.isSave(data):
+        return saveFormat.decode(data)
+
+    loadData = pickle.loads(data)  # saves from before the binary format
+    milesLeft = loadData["totalMiles"]
+    inventory = gameState.Inventory(*loadData["inventory"])
+    dateInGame = loadData["dateInGame"]
+    player_1 = gameState.Player(*loadData["player_1"])
+    party = loadData["party"]
+    theMap = map.fromDict(loadData["theMap"])
+    return milesLeft, inventory, dateInGame, player_1, party, theMap
+
+
+async def main(con, saveFile=BIN_FILE, seed=None, rng=None, trailLength=None, slotFolder=SLOT_FOLDER):
+    # trailLength is the rows of a procedural trail made from seed, None for the usual trail.
+    # slotFolder holds the save slots, None to only have the autosave
+    if trailLength is not None:
+        terrain.checkLength(trailLength)  # before the player has typed anything
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    if rng is None:
+        rng = streams.Streams(seed)  # everything random in the game comes from here, so a replay can repeat it
+    eventLog.begin()  # store purchases belong to this game's events
+    if con.recorder is not None:
+        con.recorder.start(seed, trailLength)
     load_successful = False
     startDate = datetime(1846, 3, 1)
     dateInGame = GameDate(startDate)
-    print(ascii.title + ascii.wagon)
-    load_game = input("Load previous game? y/n: ").lower()
-    if load_game == 'y':
+    con.sayArt("title", "wagon")
+    load_game = (await con.ask("Load previous game? y/n: ")).lower()
+    chosen = (saveFile, None)
+    if load_game == 'y' and slotFolder is not None:
+        chosen = await chooseSave(con, saveFile, slotFolder)
+    if load_game == 'y' and chosen is not None:
+        loadFile, loadedSlot = chosen
         try:
-            milesLeft, inventory, dateInGame, player_1, party, theMap = loadGame(BIN_FILE)
+            milesLeft, inventory, dateInGame, player_1, party, theMap = loadGame(loadFile)
             load_successful = True
+            if con.recorder is not None:
+                with open(loadFile, 'rb') as readBin:
+                    con.recorder.loaded(readBin.read())  # the replay starts from the same save
         except FileNotFoundError:
-            print("This file does not exist.")
+            con.say("This file does not exist.")
         except EOFError:
-            print("This file is empty.")
+            con.say("This file is empty.")
+        except (ValueError, pickle.UnpicklingError):
+            con.say("This file is not a saved game.")
 
     if not load_successful:  # this will catch if the user tries to load a game and it
         # isn't successful, or if the user chooses to start a new game
-        milesLeft = 500  # resets totalMiles when starting a new game
-        displayIntro()
-        sleep(1)
-        player_1 = createCharacter()
-        sleep(.5)
-        party = wagon_party()
+        loadedSlot = None  # Save game picks a free slot
+        milesLeft = 500 if trailLength is None else engine.trailMiles(trailLength)  # resets totalMiles
+        # when starting a new game
+        await displayIntro(con)
+        await con.pause(1)
+        player_1 = await createCharacter(con)
+        await con.pause(.5)
+        party = await wagon_party(con)
 
         leavingTips = f"""
-        Before leaving Fort Boise, you should buy supplies. You have ${player_1[MONEY]} in cash 
+        Before leaving Fort Boise, you should buy supplies. You have ${player_1.money} in cash 
         but you don't have to spend it all now.
         You will need:
         - a team of oxen to pull your wagon (at least 6 is recommended)
@@ -595,22 +607,52 @@ def main():
         - plenty of food for the trip (50lbs per person is recommended)
         - ammunition for your rifles
         """
-        sleep(1)
-        print(DIVIDER)
-        sPrint(leavingTips)
-        print(DIVIDER)
-        sleep(1)
-
-        inventory, storeMenu = supplyStore(player_1)  # existing_inventory does not need to be defined -it is set to
-        # none and this is the first time we are going into the shop
-
-        theMap = map.createMap(10, " ⛰ ", " 𖥞 ")  # creates a 10x10 map of mountains with
-        # the wagon wheel representing the player
+        await con.pause(1)
+        con.say(DIVIDER)
+        await sPrint(con, leavingTips)
+        con.say(DIVIDER)
+        await con.pause(1)
+
+        inventory = await supplyStore(con, player_1)  # existing_inventory does not need to be
+        # defined - it is set to none and this is the first time we are going into the shop
+
+        if trailLength is None:
+            theMap = map.createMap(10, " ⛰ ", " 𖥞 ")  # creates a 10x10 map of mountains with
+            # the wagon wheel representing the player
+        else:
+            theMap = terrain.createMap(seed, trailLength)  # made a chunk at a time as the wagon gets there
         map.setPlayerPos(theMap, 0, 5)  # start the player at row 0, column 5
-        sleep(1)
-    result = gamePlay(inventory, dateInGame, player_1, party, theMap, milesLeft)  # returns how the game ends
-    ending(result)  # prints the ending
-    sleep(.5)
-
-
-main()
\ No newline at end of file
+        await con.pause(1)
+    display = None
+    frameHeight = len(gameHeader(player_1, inventory, dateInGame, milesLeft).splitlines()) + map.viewHeight(theMap)
+    if isinstance(con, console.TerminalConsole) and sys.stdout.isatty() and screen.fits(frameHeight):
+        display = screen.Screen()  # full screen mode when the terminal is big enough
+        display.start(frameHeight)
+    try:
+        # returns how the game ends
+        result = await gamePlay(con, inventory, dateInGame, player_1, party, theMap, milesLeft, rng, display,
+                                saveFile=saveFile, slot=None if slotFolder is None else (slotFolder, loadedSlot))
+    finally:
+        if display is not None:
+            display.stop()
+    await ending(con, result)  # prints the ending
+    await con.pause(.5)
+
+
+if __name__ == "__main__":
+    con = console.TerminalConsole()
+    if os.environ.get("OREGON_TRAIL_RECORD"):
+        con.recorder = replayLog.Recorder(os.environ["OREGON_TRAIL_RECORD"])  # for replay.py
+    if os.environ.get("OREGON_TRAIL_METRICS"):
+        metrics.enable()  # written to that file, .prom for Prometheus text
+    if os.environ.get("OREGON_TRAIL_EVENTS"):
+        eventLog.start(os.environ["OREGON_TRAIL_EVENTS"])  # .bin for the compact format
+    length = os.environ.get("OREGON_TRAIL_LENGTH")  # rows of a procedural trail
+    try:
+        asyncio.run(main(con, trailLength=int(length) if length else None))
+    finally:
+        eventLog.stop()
+        if con.recorder is not None:
+            con.recorder.close()
+        if metrics.ACTIVE is not None:
+            metrics.ACTIVE.write(os.environ["OREGON_TRAIL_METRICS"])
@@ -1,79 +1,178 @@
 import ascii
-def createMap(size, fillCharacter, playerSymbol="#"):
-    m = {}
-    m["grid"] = []
-    m["size"] = size  # map size (square)
-    m["pSym"] = playerSymbol
-    m["fillCharacter"] = fillCharacter
-    m["pRow"] = 0
-    m["pCol"] = 0
-
-    # Make the empty grid
-    for x in range(m["size"]):
-        m["grid"].append([])  # make it a size-by-size 2D list
-
-    # fill it with the fillCharacter
-    for row in m["grid"]:
-        for x in range(m["size"]):
-            row.append(m["fillCharacter"])
+
+VIEW_ROWS = 10  # how much of the map is drawn around the wagon
+VIEW_COLS = 20
+
+
+class Map:
+    # the terrain is a bytearray with one tile code per cell, each code an index into
+    # palette, and the wagon and anything added with add() are kept on top of it.
+    # tiles stays None while every cell is the fill, so a map of any length costs the same
+    # until terrain is laid out - and copies share it, terrain is set before the trail starts.
+    # A procedural trail has a terrain.Terrain instead, which works out its rows from a seed
+    __slots__ = ("size", "width", "palette", "tiles", "pSym", "pRow", "pCol", "marks", "terrain")
+
+    def __init__(self, size, fillCharacter, playerSymbol="#", pRow=0, pCol=0, marks=None, width=None,
+                 palette=None, tiles=None, terrain=None):
+        self.size = size  # rows
+        self.width = size if width is None else width  # columns, square unless given
+        self.palette = [fillCharacter] if palette is None else palette  # tile code -> glyph, 0 is the fill
+        self.tiles = tiles
+        self.pSym = playerSymbol
+        self.pRow = pRow
+        self.pCol = pCol
+        self.marks = marks  # {row: {col: symbol}} from add(), None until something is added
+        self.terrain = terrain
+
+    @property
+    def fillCharacter(self):
+        return self.palette[0]
+
+    def snapshot(self):
+        tiles = None if self.tiles is None else bytes(self.tiles)
+        return (self.size, self.width, tuple(self.palette), tiles, self.pSym, self.pRow, self.pCol,
+                tuple(landmarks(self)), self.terrain)
+
+    @classmethod
+    def fromSnapshot(cls, snapshot):
+        size, width, palette, tiles, playerSymbol, pRow, pCol, marks, terrain = snapshot
+        m = cls(size, palette[0], playerSymbol, pRow, pCol, width=width, palette=list(palette),
+                tiles=None if tiles is None else bytearray(tiles), terrain=terrain)
+        for row, col, symbol in marks:
+            add(m, row, col, symbol)
+        return m
+
+    def copy(self):
+        marks = {row: dict(cols) for row, cols in self.marks.items()} if self.marks else None
+        return Map(self.size, self.fillCharacter, self.pSym, self.pRow, self.pCol, marks, self.width,
+                   self.palette, self.tiles, self.terrain)
+
+
+def createMap(size, fillCharacter, playerSymbol="#", width=None):
+    return Map(size, fillCharacter, playerSymbol, width=width)
+
+
+def fromDict(old):
+    # maps saved before the Map class were a dict holding the whole grid
+    m = Map(old["size"], old["fillCharacter"], old["pSym"], old["pRow"], old["pCol"])
+    for row, cells in enumerate(old["grid"]):
+        for col, cell in enumerate(cells):
+            if cell != m.fillCharacter and (row, col) != (m.pRow, m.pCol):
+                add(m, row, col, cell)
     return m
 
 
-def displayMap(m):
-    # Top label
-    count = 0
-    print(" ", end="")
-    print(ascii.fort_boise)
-    for x in range(m["size"]):
-        #print(' ', count, end="")
-        count += 1
-    print()
-
-
-    # Each row
-    count = 0
-    for row in m["grid"]:
-        print(count, end="")
-        for col in row:
-            print(col, end="")
-        count += 1
-        print()
-    print(ascii.oregon_city)
+def setTile(m, row, col, glyph):
+    # lays down terrain under the wagon and landmarks
+    if glyph not in m.palette:
+        if len(m.palette) == 256:
+            raise ValueError("A map can only have 256 kinds of tile")
+        m.palette.append(glyph)
+    if m.tiles is None:
+        m.tiles = bytearray(m.size * m.width)  # all fill
+    m.tiles[row * m.width + col] = m.palette.index(glyph)
 
-def setPlayerPos(m, row, col):
-    if row >= m["size"] or row < 0 or col >= m["size"] or col < 0:
-        print(f"Invalid location:{row} {col}")
+
+def tile(m, row, col):
+    if m.terrain is not None:
+        return m.palette[m.terrain.row(row)[col]]
+    if m.tiles is None:
+        return m.palette[0]
+    return m.palette[m.tiles[row * m.width + col]]
+
+
+def cell(m, row, col):
+    if (row, col) == (m.pRow, m.pCol):
+        return m.pSym
+    symbol = m.marks.get(row, {}).get(col) if m.marks else None
+    return tile(m, row, col) if symbol is None else symbol
+
+
+def landmarks(m):
+    # (row, col, symbol) for everything added with add()
+    if not m.marks:
+        return []
+    return [(row, col, m.marks[row][col]) for row in sorted(m.marks) for col in sorted(m.marks[row])]
+
+
+def window(m, rows=VIEW_ROWS, cols=VIEW_COLS):
+    # (top, bottom, left, right) of the part of the map around the wagon that gets drawn
+    rows = min(rows, m.size)
+    cols = min(cols, m.width)
+    top = min(max(m.pRow - rows // 2, 0), m.size - rows)
+    left = min(max(m.pCol - cols // 2, 0), m.width - cols)
+    return top, top + rows, left, left + cols
+
+
+def renderRow(m, row, left, right):
+    if m.terrain is not None:
+        palette = m.palette
+        cells = [palette[code] for code in m.terrain.row(row)[left:right]]
+    elif m.tiles is None:
+        cells = [m.palette[0]] * (right - left)
     else:
-        curRow = m["pRow"]
-        curCol = m["pCol"]
+        start = row * m.width
+        palette = m.palette
+        cells = [palette[code] for code in m.tiles[start + left:start + right]]
+    if m.marks and row in m.marks:
+        for col, symbol in m.marks[row].items():
+            if left <= col < right:
+                cells[col - left] = symbol
+    if row == m.pRow and left <= m.pCol < right:
+        cells[m.pCol - left] = m.pSym
+    return str(row).rjust(len(str(m.size - 1))) + "".join(cells)
+
+
+def renderMap(m, rows=VIEW_ROWS, cols=VIEW_COLS):
+    # one string per row of the view, with the row number in front - only the view is
+    # drawn, so a long trail costs the same to draw as a short one
+    top, bottom, left, right = window(m, rows, cols)
+    return [renderRow(m, row, left, right) for row in range(top, bottom)]
 
-        # overwrite the old position
-        m["grid"][curRow][curCol] = m["fillCharacter"]  # brutal syntax...
 
-        # update pos
-        m["pRow"] = row
-        m["pCol"] = col
+def viewHeight(m, rows=VIEW_ROWS):
+    return min(rows, m.size)
 
-        # update the map
-        m["grid"][row][col] = m["pSym"]
+
+def mapText(m):
+    top, bottom, _, _ = window(m)
+    text = "\n".join(renderMap(m))
+    if top == 0:
+        text = " " + ascii.fort_boise + "\n\n" + text
+    if bottom == m.size:
+        text += "\n" + ascii.oregon_city
+    return text
+
+
+def displayMap(m):
+    print(mapText(m))  # the view goes out in one print
+
+def setPlayerPos(m, row, col):
+    if row >= m.size or row < 0 or col >= m.width or col < 0:
+        print(f"Invalid location:{row} {col}")
+    else:
+        m.pRow = row
+        m.pCol = col
 
 def getPlayerPos(m):
-    position = m["pRow"]
+    position = m.pRow
     return position
 
 def move(m, direction):
     if direction == "down":
-        setPlayerPos(m, m["pRow"] + 1, m["pCol"])
+        setPlayerPos(m, m.pRow + 1, m.pCol)
     elif direction == "up":
-        setPlayerPos(m, m["pRow"] - 1, m["pCol"])
+        setPlayerPos(m, m.pRow - 1, m.pCol)
     elif direction == "left":
-        setPlayerPos(m, m["pRow"], m["pCol"] - 1)
+        setPlayerPos(m, m.pRow, m.pCol - 1)
     elif direction == "right":
-        setPlayerPos(m, m["pRow"], m["pCol"] + 1)
+        setPlayerPos(m, m.pRow, m.pCol + 1)
     else:
         print("Invalid direction:", direction)
 
 
 # Add something to the map
 def add(m, row, col, symbol):
-    m["grid"][row][col] = symbol
\ No newline at end of file
+    if m.marks is None:
+        m.marks = {}
+    m.marks.setdefault(row, {})[col] = symbol
@@ -0,0 +1,165 @@
+# Opt-in instrumentation - how long each part of a turn takes (drawing, waiting on the
+# player, typewriter text and pauses, encounters, saving, landmarks), how often each event
+# happens, how big saves are and how big a trail gets. Nothing is recorded until enable()
+# is called, and until then span() hands back one shared do-nothing context manager, so
+# the instrumented code costs a function call.
+#
+#   with metrics.span("render"):
+#       ...
+#
+# write() saves everything as JSON, or as Prometheus text when the file name ends in .prom
+# (for node_exporter's textfile collector).
+
+import json
+import sys
+import threading
+from contextlib import nullcontext
+from time import perf_counter
+
+ACTIVE = None  # the Metrics being recorded to, None while instrumentation is off
+OFF = nullcontext()
+PREFIX = "oregon_trail"
+
+
+class Timing:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+
+class Span:
+    __slots__ = ("metrics", "phase", "start")
+
+    def __init__(self, metrics, phase):
+        self.metrics = metrics
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics.time(self.phase, perf_counter() - self.start)
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()  # saves are written on the autosave thread
+        self.phases = {}  # phase -> Timing of seconds
+        self.events = {}  # event name -> how many times it happened
+        self.saveSizes = Timing()  # bytes
+        self.statePeak = 0  # bytes in the biggest trail seen
+
+    def time(self, phase, seconds):
+        with self.lock:
+            timing = self.phases.get(phase)
+            if timing is None:
+                timing = self.phases[phase] = Timing()
+            timing.add(seconds)
+
+    def event(self, name):
+        with self.lock:
+            self.events[name] = self.events.get(name, 0) + 1
+
+    def saved(self, size):
+        with self.lock:
+            self.saveSizes.add(size)
+
+    def trail(self, state):
+        size = sizeOf(state)
+        with self.lock:
+            if size > self.statePeak:
+                self.statePeak = size
+
+    def summary(self):
+        with self.lock:
+            return {
+                "phases": {phase: {"count": t.count, "seconds": t.total, "maxSeconds": t.max}
+                           for phase, t in sorted(self.phases.items())},
+                "events": dict(sorted(self.events.items())),
+                "saveBytes": {"count": self.saveSizes.count, "total": int(self.saveSizes.total),
+                              "max": int(self.saveSizes.max)},
+                "statePeakBytes": self.statePeak,
+            }
+
+    def prometheus(self):
+        summary = self.summary()
+        lines = [f"# HELP {PREFIX}_phase_seconds Time spent in each part of a turn",
+                 f"# TYPE {PREFIX}_phase_seconds summary"]
+        for phase, t in summary["phases"].items():
+            lines.append(f'{PREFIX}_phase_seconds_sum{{phase="{phase}"}} {t["seconds"]:.6f}')
+            lines.append(f'{PREFIX}_phase_seconds_count{{phase="{phase}"}} {t["count"]}')
+        lines += [f"# HELP {PREFIX}_phase_max_seconds Longest single time in each part of a turn",
+                  f"# TYPE {PREFIX}_phase_max_seconds gauge"]
+        for phase, t in summary["phases"].items():
+            lines.append(f'{PREFIX}_phase_max_seconds{{phase="{phase}"}} {t["maxSeconds"]:.6f}')
+        lines += [f"# HELP {PREFIX}_events_total Events shown to players, by event",
+                  f"# TYPE {PREFIX}_events_total counter"]
+        for name, count in summary["events"].items():
+            lines.append(f'{PREFIX}_events_total{{event="{name}"}} {count}')
+        saves = summary["saveBytes"]
+        lines += [f"# HELP {PREFIX}_save_bytes Size of each save",
+                  f"# TYPE {PREFIX}_save_bytes summary",
+                  f"{PREFIX}_save_bytes_sum {saves['total']}",
+                  f"{PREFIX}_save_bytes_count {saves['count']}",
+                  f"# HELP {PREFIX}_save_max_bytes Biggest save",
+                  f"# TYPE {PREFIX}_save_max_bytes gauge",
+                  f"{PREFIX}_save_max_bytes {saves['max']}",
+                  f"# HELP {PREFIX}_state_peak_bytes Memory used by the biggest trail",
+                  f"# TYPE {PREFIX}_state_peak_bytes gauge",
+                  f"{PREFIX}_state_peak_bytes {summary['statePeakBytes']}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        if path.endswith(".prom"):
+            text = self.prometheus()
+        else:
+            text = json.dumps(self.summary(), indent=2) + "\n"
+        import autosave  # autosave times its writes through this module
+        autosave.writeAtomic(path, text.encode("utf-8"))  # a scraper never reads half a file
+
+
+def enable():
+    global ACTIVE
+    if ACTIVE is None:
+        ACTIVE = Metrics()
+    return ACTIVE
+
+
+def disable():
+    global ACTIVE
+    ACTIVE = None
+
+
+def span(phase):
+    # times the with block under phase
+    if ACTIVE is None:
+        return OFF
+    return Span(ACTIVE, phase)
+
+
+def sizeOf(obj, seen=None):
+    # bytes used by obj and everything it holds - follows __slots__, lists, tuples and dicts
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sizeOf(key, seen) + sizeOf(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(sizeOf(item, seen) for item in obj)
+    else:
+        for name in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, name):
+                size += sizeOf(getattr(obj, name), seen)
+    return size
@@ -0,0 +1,256 @@
+# Supply loadout optimizer - searches what to buy before leaving Fort Boise (oxen, boxes of
+# ammo, clothes, and whatever money is left on food) for the loadouts that reach Oregon City
+# most often, by playing headless trails the way batch.py does.
+#
+# Every loadout plays the same trails: trail i always has the same streams.Streams, so two
+# loadouts meet the same luck and the difference between them is far less noisy than
+# either survival rate (common random numbers). The search is successive halving - every
+# loadout on the grid gets a few trails, the best third get three times as many and so on,
+# then the neighbours of the best few join the finalists. Evaluated loadouts are cached in
+# batch_cache/ and later searches reuse and extend them.
+#
+#   python optimizer.py --profession Farmer --keep 5
+
+import argparse
+import json
+import math
+import os
+from collections import Counter
+from functools import partial
+from multiprocessing import Pool, cpu_count
+
+import batch
+import engine
+import streams
+from gameState import ITEMS
+
+OUTCOMES = batch.OUTCOMES
+
+TRAILS = 4096  # trails each finalist is played on
+FIRST_TRAILS = 32  # trails every loadout on the grid starts with
+GROWTH = 3  # each round keeps 1/GROWTH of the loadouts and plays GROWTH times the trails
+KEEP = 10
+STEP = 2  # grid spacing for ammo boxes and clothes, oxen go one at a time
+MAX_OXEN = 10
+MAX_AMMO = 10  # boxes
+MAX_CLOTHES = 10
+MIN_OXEN = 2  # canLeaveStore won't let the wagon leave with fewer
+
+
+def cost(supplies):
+    return sum(howMany * engine.PRICES[item] for item, howMany in zip(ITEMS, supplies))
+
+
+def fill(profession, oxen, ammo, clothes):
+    # the rest of the budget goes on food, None when there's nothing left for it
+    budget = engine.PROFESSIONS[profession]["money"]
+    food = (budget - cost((oxen, ammo, clothes, 0))) // engine.PRICES["food"]
+    if food <= 0:
+        return None
+    return oxen, ammo, clothes, food
+
+
+def candidates(profession, step=STEP, maxOxen=MAX_OXEN, maxAmmo=MAX_AMMO, maxClothes=MAX_CLOTHES):
+    loadouts = []
+    for oxen in range(MIN_OXEN, maxOxen + 1):
+        for ammo in range(0, maxAmmo + 1, step):
+            for clothes in range(0, maxClothes + 1, step):
+                supplies = fill(profession, oxen, ammo, clothes)
+                if supplies is not None:
+                    loadouts.append(supplies)
+    return loadouts
+
+
+def neighbours(profession, supplies):
+    # one more or one fewer of oxen, ammo or clothes, food making up the difference
+    found = []
+    for at in range(3):
+        for change in (-1, 1):
+            amounts = list(supplies[:3])
+            amounts[at] += change
+            if amounts[0] >= MIN_OXEN and min(amounts) >= 0:
+                neighbour = fill(profession, *amounts)
+                if neighbour is not None:
+                    found.append(neighbour)
+    return found
+
+
+def playLoadouts(profession, river, seed, start, trails, loadouts):
+    # trails start to start + trails for every loadout - returns [(outcome counts, survivors)],
+    # bit i of survivors set when trail start + i reached Oregon City
+    policy = partial(batch.riverPolicy, river)
+    results = []
+    for supplies in loadouts:
+        counts = Counter()
+        survivors = 0
+        for i in range(trails):
+            rng = streams.Streams(seed, "loadouts", start + i)  # the same luck for every loadout
+            outcome = engine.runTrail(engine.newTrail(profession, supplies), policy, rng)
+            counts[outcome] += 1
+            if outcome == "oregon":
+                survivors |= 1 << i
+        results.append((dict(counts), survivors))
+    return results
+
+
+class Search:
+    # everything evaluated for one profession, river choice and seed
+    def __init__(self, profession, river="ford", seed=0, pool=None, cache=True, workers=None):
+        self.profession = profession
+        self.river = river
+        self.seed = seed
+        self.pool = pool
+        self.workers = 1 if pool is None else workers or cpu_count()  # processes in pool, what it was made with
+        self.config = {"search": "loadouts", "profession": profession, "river": river, "seed": seed}
+        self.path = os.path.join(batch.CACHE_DIR, f"loadouts-{batch.cacheKey(self.config)}.json") if cache else None
+        self.results = {}  # supplies -> {"trails", "counts", "survivors"}
+        self.load()
+
+    def load(self):
+        if self.path is None:
+            return
+        try:
+            with open(self.path) as readFile:
+                saved = json.load(readFile)["loadouts"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return
+        for key, result in saved.items():
+            self.results[tuple(json.loads(key))] = {"trails": result["trails"], "counts": Counter(result["counts"]),
+                                                   "survivors": int(result["survivors"], 16)}
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(batch.CACHE_DIR, exist_ok=True)
+        loadouts = {json.dumps(list(supplies)): {"trails": result["trails"], "counts": dict(result["counts"]),
+                                                 "survivors": format(result["survivors"], "x")}
+                    for supplies, result in self.results.items()}
+        with open(self.path + '.tmp', 'w') as writeFile:
+            json.dump({"config": self.config, "loadouts": loadouts}, writeFile)
+        os.replace(self.path + '.tmp', self.path)  # never leave half a cache behind
+
+    def evaluate(self, loadouts, trails):
+        # plays each loadout until it has trails trails, skipping what's already been played
+        needed = {}  # trails already played -> loadouts starting from there
+        for supplies in loadouts:
+            result = self.results.setdefault(supplies, {"trails": 0, "counts": Counter(), "survivors": 0})
+            if result["trails"] < trails:
+                needed.setdefault(result["trails"], []).append(supplies)
+        tasks = []
+        for start, group in needed.items():
+            size = max(1, math.ceil(len(group) / (self.workers * 4)))
+            for at in range(0, len(group), size):
+                tasks.append((self.profession, self.river, self.seed, start, trails - start, group[at:at + size]))
+        if not tasks:
+            return
+        if self.pool is None:
+            played = [playLoadouts(*task) for task in tasks]
+        else:
+            played = self.pool.starmap(playLoadouts, tasks)
+        for task, results in zip(tasks, played):
+            start = task[3]
+            for supplies, (counts, survivors) in zip(task[5], results):
+                result = self.results[supplies]
+                result["counts"].update(counts)
+                result["survivors"] |= survivors << start
+                result["trails"] = trails
+        self.save()
+
+    def survival(self, supplies):
+        result = self.results[supplies]
+        return result["counts"]["oregon"] / result["trails"]
+
+    def best(self, loadouts, count):
+        return sorted(loadouts, key=self.survival, reverse=True)[:count]
+
+    def run(self, trails=TRAILS, keep=KEEP, step=STEP, first=FIRST_TRAILS):
+        # successive halving over the grid, then the finalists and their neighbours on trails trails
+        loadouts = candidates(self.profession, step)
+        played = first
+        while len(loadouts) > keep * GROWTH and played < trails:
+            self.evaluate(loadouts, played)
+            loadouts = self.best(loadouts, max(keep, len(loadouts) // GROWTH))
+            played *= GROWTH
+        self.evaluate(loadouts, min(played, trails))
+        finalists = set(self.best(loadouts, keep))
+        for supplies in self.best(loadouts, 3):
+            finalists.update(neighbours(self.profession, supplies))
+        self.evaluate(sorted(finalists), trails)
+        return self.ranked(self.best(finalists, keep))
+
+    def ranked(self, loadouts):
+        # rows for report(), with each loadout's gap to the best measured on the same trails
+        leader = self.results[loadouts[0]]
+        rows = []
+        for supplies in loadouts:
+            result = self.results[supplies]
+            n = result["trails"]
+            p = result["counts"]["oregon"] / n
+            gap, gapError = pairedGap(leader["survivors"], result["survivors"], min(n, leader["trails"]))
+            rows.append({
+                "profession": self.profession,
+                "supplies": supplies,
+                "cost": cost(supplies),
+                "trails": n,
+                "survival": p,
+                "error": math.sqrt(p * (1 - p) / n),
+                "gap": gap,
+                "gapError": gapError,
+                "counts": {outcome: result["counts"][outcome] for outcome in OUTCOMES},
+            })
+        return rows
+
+
+def pairedGap(best, other, n):
+    # survival of other minus best on the same n trails, and its standard error - only the
+    # trails where exactly one of them survived count, so shared luck cancels out
+    mask = (1 << n) - 1
+    onlyBest = (best & ~other & mask).bit_count()
+    onlyOther = (other & ~best & mask).bit_count()
+    gap = (onlyOther - onlyBest) / n
+    variance = (onlyBest + onlyOther - (onlyOther - onlyBest) ** 2 / n) / (n * n)
+    return gap, math.sqrt(max(variance, 0.0))
+
+
+def recommend(profession, river="ford", seed=0, trails=TRAILS, pool=None, workers=None):
+    # the loadout that reached Oregon City most often - (oxen, boxes of ammo, clothes, lbs of food)
+    return Search(profession, river, seed, pool, workers=workers).run(trails, keep=1)[0]["supplies"]
+
+
+def report(rows):
+    print(f"{'PROFESSION':<11}{'OXEN':>5}{'AMMO':>6}{'CLOTHES':>8}{'FOOD':>6}{'COST':>6}{'SURVIVAL':>14}"
+          f"{'VS BEST':>16}  " + " ".join(f"{outcome.upper():>9}" for outcome in OUTCOMES[1:]))
+    for row in rows:
+        oxen, ammo, clothes, food = row["supplies"]
+        n = row["trails"]
+        line = f"{row['profession']:<11}{oxen:>5}{ammo:>6}{clothes:>8}{food:>6}{row['cost']:>6}"
+        line += f"{row['survival']:>8.1%} ±{row['error']:>4.1%}{row['gap']:>+9.1%} ±{row['gapError']:>4.1%}  "
+        line += " ".join(f"{row['counts'][outcome] / n:>9.1%}" for outcome in OUTCOMES[1:])
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the supplies that get the most wagons to Oregon City")
+    parser.add_argument("--profession", choices=list(engine.PROFESSIONS), help="default: every profession")
+    parser.add_argument("--river", choices=engine.RIVER_CHOICES, default="ford")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trails", type=int, default=TRAILS, help="trails each finalist is played on")
+    parser.add_argument("--keep", type=int, default=KEEP, help="loadouts shown per profession")
+    parser.add_argument("--step", type=int, default=STEP, help="grid spacing for ammo and clothes")
+    parser.add_argument("--workers", type=int, default=cpu_count())
+    args = parser.parse_args()
+
+    professions = [args.profession] if args.profession else list(engine.PROFESSIONS)
+    pool = Pool(args.workers) if args.workers > 1 else None
+    try:
+        for profession in professions:
+            search = Search(profession, args.river, args.seed, pool, workers=args.workers)
+            report(search.run(args.trails, args.keep, args.step))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# Vectorized population simulator - holds a whole population of wagon parties as
+# NumPy arrays (one array per field) and steps every party with the same rules as
+# engine.step in a handful of array operations per tick. Needs numpy.
+#
+#   python population.py --parties 1000000 --profession Farmer
+
+import argparse
+
+import numpy as np
+
+import engine
+
+OUTCOMES = ("oregon", "starved", "stuck", "frozen", "grim fate")
+TRAVELLING = 0  # outcome code while the party is still on the trail
+CODES = {outcome: code for code, outcome in enumerate(OUTCOMES, start=1)}
+
+FIELDS = ("hp", "money", "oxen", "ammo", "clothes", "food", "party", "miles", "row", "days", "outcome")
+
+
+def newPopulation(n, profession, supplies, partySize=4):
+    # n identical parties leaving Fort Boise - supplies is (oxen, boxes of ammo, clothes, lbs of food)
+    start = engine.newTrail(profession, supplies, ("",) * partySize)
+    player = start.player
+    inventory = start.inventory
+    pop = {
+        "hp": np.full(n, player.hp, np.int32),
+        "money": np.full(n, player.money, np.int32),
+        "oxen": np.full(n, inventory.oxen, np.int32),
+        "ammo": np.full(n, inventory.ammo, np.int32),
+        "clothes": np.full(n, inventory.clothes, np.int32),
+        "food": np.full(n, inventory.food, np.int32),
+        "party": np.full(n, partySize, np.int8),
+        "miles": np.full(n, start.miles, np.int32),
+        "row": np.zeros(n, np.int8),
+        "days": np.zeros(n, np.int32),
+        "outcome": np.zeros(n, np.int8),
+        "tick": 0,  # every party started together so they share the trail clock
+    }
+    return pop
+
+
+def randint(rng, low, high):
+    # like random.randint, inclusive of high, with high given per party
+    return low + (rng.random(len(high)) * (high - low + 1)).astype(np.int32)
+
+
+def drawEvents(count, rng, table=engine.ENCOUNTERS):
+    # encounterTable.drawBlock as one array operation - returns event numbers
+    prob = np.asarray(table["prob"])
+    alias = np.asarray(table["alias"])
+    spin = rng.random(count) * len(prob)
+    column = np.minimum(spin.astype(np.intp), len(prob) - 1)
+    return np.where(spin - column < prob[column], column, alias[column])
+
+
+def encounter(pop, idx, rng, table=engine.ENCOUNTERS):
+    # engine.encounter for the parties in idx
+    idx = idx[pop["party"][idx] > 0]  # nobody left - dysentery, nothing changes
+    chosen = drawEvents(len(idx), rng, table)
+    for number, event in enumerate(table["events"]):
+        who = idx[chosen == number]
+        if not len(who):
+            continue
+        if "steal" in event:
+            field = pop[event["steal"]]
+            field[who] -= randint(rng, 0, np.maximum(field[who], 0))
+        for name, (low, high) in event.get("found", {}).items():
+            pop[name][who] += rng.integers(low, high + 1, len(who))
+        for name in engine.ITEMS:  # the inventory items are named the same as the arrays
+            if name in event:
+                pop[name][who] += event[name]
+        if "hp" in event:
+            pop["hp"][who] += event["hp"]
+        if event.get("victim") == "dies":
+            pop["party"][who] -= 1
+
+
+def crossRiver(pop, idx, choice, rng):
+    # engine.crossRiver for the parties in idx, everyone crossing the same way
+    if choice not in engine.RIVER_DAYS:
+        raise ValueError(f"Invalid river choice: {choice}")
+    pop["days"][idx] += engine.RIVER_DAYS[choice]
+    if choice == "ford":
+        sides, bad, lost = engine.RIVER_RISKS[choice]
+        flooded = idx[np.isin(rng.integers(1, sides + 1, len(idx)), bad)]
+        pop["clothes"][flooded] -= lost["clothes"]
+        ammo = pop["ammo"][flooded]
+        pop["ammo"][flooded] = np.where(ammo > 1, ammo - randint(rng, 1, ammo - 1), ammo)
+    elif choice == "caulk":
+        sides, bad, lost = engine.RIVER_RISKS[choice]
+        sunk = idx[np.isin(rng.integers(1, sides + 1, len(idx)), bad) & (pop["party"][idx] > 0)]
+        pop["oxen"][sunk] -= lost["oxen"]
+        pop["party"][sunk] -= lost["party"]
+    else:
+        pop["money"][idx] -= engine.FERRY_COST
+
+
+def moveDown(pop, idx):
+    row = pop["row"]
+    row[idx] = np.minimum(row[idx] + 1, engine.MAP_SIZE - 1)  # the wagon stops at the last row
+
+
+def checkOutcome(pop, idx):
+    # engine.checkOutcome - the first rule that matches wins, so fill in reverse order
+    code = np.zeros(len(idx), np.int8)
+    code[pop["clothes"][idx] < 0] = CODES["frozen"]
+    code[(pop["row"][idx] == engine.FINISH_ROW) & (pop["miles"][idx] <= 0)] = CODES["oregon"]
+    code[pop["party"][idx] == 0] = CODES["grim fate"]
+    code[pop["food"][idx] <= -10] = CODES["starved"]
+    code[pop["oxen"][idx] <= 0] = CODES["stuck"]
+    pop["outcome"][idx] = code
+
+
+def step(pop, river, rng):
+    # engine.step for every party still travelling, crossing rivers with the river choice
+    idx = np.flatnonzero(pop["outcome"] == TRAVELLING)
+    atRiver = idx[np.isin(pop["row"][idx], engine.RIVER_ROWS)]
+    if len(atRiver):
+        crossRiver(pop, atRiver, river, rng)
+        moveDown(pop, atRiver)
+        checkOutcome(pop, atRiver)
+        idx = idx[pop["outcome"][idx] == TRAVELLING]
+
+    pop["tick"] += 1
+    count = pop["tick"]
+    if count % engine.FOOD_TICKS and count % engine.ENCOUNTER_TICKS:
+        return  # no timer fell on this tick
+    if count % engine.DAY_TICKS == 0:
+        pop["days"][idx] += 1
+        moveDown(pop, idx)
+    if count % engine.FOOD_TICKS == 0:
+        pop["food"][idx] -= engine.FOOD_EATEN  # food eaten
+        pop["miles"][idx] -= engine.MILES_TRAVELLED  # miles traveled
+    if count % engine.ENCOUNTER_TICKS == 0:
+        encounter(pop, idx, rng)
+    checkOutcome(pop, idx)
+
+
+def run(pop, river="ford", rng=None, maxTicks=10000):
+    # plays every trail to the end and returns {outcome: count}
+    if rng is None:
+        rng = np.random.default_rng()
+    while pop["tick"] < maxTicks and (pop["outcome"] == TRAVELLING).any():
+        step(pop, river, rng)
+    counts = np.bincount(pop["outcome"], minlength=len(OUTCOMES) + 1)
+    return {outcome: int(counts[code]) for outcome, code in CODES.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a population of Oregon Trail parties")
+    parser.add_argument("--parties", type=int, default=1000000)
+    parser.add_argument("--profession", choices=list(engine.PROFESSIONS), default="Banker")
+    parser.add_argument("--supplies", type=int, nargs=4, default=(3, 0, 4, 300),
+                        metavar=("OXEN", "AMMO_BOXES", "CLOTHES", "FOOD"))
+    parser.add_argument("--river", choices=engine.RIVER_CHOICES, default="ford")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pop = newPopulation(args.parties, args.profession, args.supplies)
+    counts = run(pop, args.river, np.random.default_rng(args.seed))
+    for outcome in OUTCOMES:
+        print(f"{outcome:<10}{counts[outcome] / args.parties:>8.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# Plays a recording from replayLog.py back through main.py without a terminal or a
+# clock - answers come from the log, ticks happen when the log says they did and nothing
+# sleeps, so a whole game replays in milliseconds. seek() starts from the nearest keyframe
+# before the answer wanted instead of the beginning.
+#
+#   python replay.py game.otr
+#   python replay.py game.otr --seek 40 --show
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import console
+import engine
+import main
+import replayLog
+import saveFormat
+import streams
+
+
+class ReplayError(Exception):
+    pass  # the game asked for something the recording doesn't have
+
+
+class ReplayStop(Exception):
+    pass  # reached the answer the replay was asked to stop at
+
+
+class ReplayClock:
+    # stands in for scheduler.Scheduler - the console fires ticks when the log says
+    def __init__(self):
+        self.callbacks = []
+        self.paused = False
+
+    def every(self, seconds, callback, *args):
+        self.callbacks.append((callback, args))
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    async def run(self):
+        await asyncio.Event().wait()  # never ticks on its own
+
+    async def fire(self):
+        for callback, args in self.callbacks:
+            await callback(*args)
+
+
+class ReplayConsole(console.Console):
+    def __init__(self, log, position=0, stopAt=None, keepOutput=False):
+        super().__init__()
+        self.inputs = log["inputs"]
+        self.end = log["end"]
+        self.position = position  # answers given so far
+        self.stopAt = stopAt
+        self.output = [] if keepOutput else None
+        self.clock = ReplayClock()
+
+    def write(self, text):
+        if self.output is not None:
+            self.output.append(text)
+
+    async def typeOut(self, text, delay=0.03):
+        self.write(text + "\n")
+
+    async def pause(self, seconds):
+        pass
+
+    def newTimers(self):
+        return self.clock
+
+    async def catchUp(self, tick):
+        # the ticks that happened before the player answered
+        self.prompting.set()
+        try:
+            while self.trail is not None and self.trail.tick < tick and self.trail.outcome is None:
+                if self.clock.paused:
+                    raise ReplayError(f"The recording has tick {tick} but the clock stopped at {self.trail.tick}")
+                await self.clock.fire()
+        finally:
+            self.prompting.clear()
+        if self.trail is not None and self.trail.outcome is not None:
+            await asyncio.sleep(0)  # the tick that ended the game cancelled this turn
+
+    async def nextLine(self):
+        if self.position == self.stopAt:
+            raise ReplayStop
+        if self.position == len(self.inputs):
+            if self.end is not None:
+                await self.catchUp(self.end)
+            raise EOFError  # the player left here
+        tick, line = self.inputs[self.position]
+        await self.catchUp(tick)
+        self.position += 1
+        self.write(line + "\n")  # what the player typed, for --show
+        return line
+
+
+def newRng(log):
+    # the game's random numbers as they were when the recording started
+    if log["version"] == 1:
+        return random.Random(log["seed"])  # recorded before streams.py
+    return streams.Streams(log["seed"])
+
+
+def loadSlot(folder, log):
+    # puts the save the game loaded in the slot the player picked, their second answer
+    if log["version"] < 4 or len(log["inputs"]) < 2:
+        return
+    choice = log["inputs"][1][1].strip()
+    if not choice.isdigit() or int(choice) < 1:
+        return  # the autosave, or no save at all
+    miles, inventory, dateInGame, player, party, _ = saveFormat.decode(log["load"])
+    saveFormat.writeSlot(folder, int(choice) - 1, log["load"], saveFormat.slotRecord(miles, dateInGame, player,
+                                                                                      party))
+
+
+async def play(log, stopAt=None, keyframe=None, keepOutput=False):
+    # returns the console, its trail is the game as it was when the replay stopped
+    folder = tempfile.mkdtemp(prefix="replay-")
+    saveFile = os.path.join(folder, main.BIN_FILE)
+    con = ReplayConsole(log, 0 if keyframe is None else keyframe["inputs"], stopAt, keepOutput)
+    try:
+        if keyframe is None:
+            if log["load"] is not None:
+                with open(saveFile, 'wb') as writeBin:
+                    writeBin.write(log["load"])
+                loadSlot(folder, log)
+            slotFolder = folder if log["version"] >= 4 else None  # older games were never asked for a slot
+            await main.main(con, saveFile, log["seed"], newRng(log), log["length"], slotFolder)
+        else:
+            miles, inventory, dateInGame, player, party, m = saveFormat.decode(keyframe["trail"])
+            state = engine.newState(player, party, inventory, dateInGame, m, miles)
+            state.tick = keyframe["tick"]
+            rng = newRng(log)
+            rng.setstate(keyframe["rng"])
+            await main.playTrail(con, state, rng, saveFile=saveFile, arrivedAt=keyframe["arrivedAt"])
+    except (ReplayStop, EOFError):
+        pass
+    finally:
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
+    return con
+
+
+def replay(log, stopAt=None, keepOutput=False):
+    # plays the recording from the start
+    return asyncio.run(play(log, stopAt, keepOutput=keepOutput))
+
+
+def nearestKeyframe(log, answer):
+    best = None
+    for keyframe in log["keyframes"]:
+        if keyframe["inputs"] <= answer:
+            best = keyframe
+    return best
+
+
+def seek(log, answer, keepOutput=False):
+    # the game just before the player gave answer number answer, from the nearest keyframe
+    return asyncio.run(play(log, answer, nearestKeyframe(log, answer), keepOutput))
+
+
+def describe(state):
+    if state is None:
+        return "no trail started"
+    return (f"tick {state.tick}, {state.date.text()}, row {state.map.pRow}, {state.miles} miles left, "
+            f"food {state.inventory.food}, hp {state.player.hp}, party {len(state.party)}, "
+            f"outcome {state.outcome}")
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Replay a recorded game of The Oregon Trail")
+    parser.add_argument("recording")
+    parser.add_argument("--seek", type=int, help="stop just before this answer, starting from a keyframe")
+    parser.add_argument("--show", action="store_true", help="print what the player saw")
+    args = parser.parse_args()
+
+    log = replayLog.loadLog(args.recording)
+    start = time.perf_counter()
+    if args.seek is None:
+        con = replay(log, keepOutput=args.show)
+    else:
+        con = seek(log, args.seek, keepOutput=args.show)
+    seconds = time.perf_counter() - start
+    if args.show:
+        print("".join(con.output))
+    print(f"{len(log['inputs'])} answers, {len(log['keyframes'])} keyframes, seed {log['seed']}")
+    print(describe(con.trail))
+    print(f"replayed in {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    cli()
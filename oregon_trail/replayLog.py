@@ -0,0 +1,150 @@
+# Game recordings - the seed the game's random numbers came from, every answer the player
+# typed with the tick it was given at, and a keyframe of the whole trail every few turns.
+# That is enough for replay.py to play the game again exactly, and to start from the
+# nearest keyframe instead of the beginning.
+#
+# A recording is a header followed by records, each starting with its kind:
+#   INPUT     the tick and the answer
+#   LOAD      the save the game was loaded from
+#   KEYFRAME  answers so far, tick, row last arrived at, the position of each of the
+#             game's streams.Streams and the trail in saveFormat
+#
+#   END       the tick the trail ended on
+#
+# Version 1 recordings come from before streams.py - the game ran on random.Random(seed) and
+# keyframes hold its state instead. Version 2 ones come from before procedural trails, and
+# have no trail length after the seed. Version 3 ones are laid out like version 4 but come
+# from before save slots, so loading a game never asked which save.
+
+import struct
+
+import saveFormat
+import streams
+
+MAGIC = b"OTRL"
+VERSION = 4
+
+HEADER = struct.Struct("<4sBQ")  # magic, version, seed
+LENGTH = struct.Struct("<I")  # rows of the procedural trail the game is on, 0 for the usual trail
+INPUT = struct.Struct("<BIH")  # kind, tick, size of the answer
+LOAD = struct.Struct("<BI")  # kind, size of the save
+KEYFRAME = struct.Struct("<BIIiI")  # kind, answers so far, tick, row arrived at (-1 for none), size of the trail
+RNG = struct.Struct("<625I?d")  # version 1 - Mersenne Twister state, whether there is a spare gauss() value, the value
+STREAMS = struct.Struct(f"<{len(streams.PARTS)}Q")  # numbers drawn from each stream
+END = struct.Struct("<BI")  # kind, tick
+
+INPUT_KIND, LOAD_KIND, KEYFRAME_KIND, END_KIND = 1, 2, 3, 4
+
+KEYFRAME_TURNS = 25  # turns between keyframes
+
+
+class Recorder:
+    def __init__(self, path, keyframeTurns=KEYFRAME_TURNS):
+        self.file = open(path, 'wb')
+        self.keyframeTurns = keyframeTurns
+        self.inputs = 0
+        self.turns = 0
+
+    def start(self, seed, length=None):
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed) + LENGTH.pack(length or 0))
+
+    def input(self, line, tick):
+        raw = line.encode("utf-8")
+        if len(raw) > 0xFFFF:
+            raw = raw[:0xFFFF].decode("utf-8", "ignore").encode("utf-8")  # never half a character
+        self.file.write(INPUT.pack(INPUT_KIND, tick, len(raw)) + raw)
+        self.inputs += 1
+
+    def loaded(self, data):
+        self.file.write(LOAD.pack(LOAD_KIND, len(data)) + data)
+
+    def turn(self, state, rng, arrivedAt):
+        # called at the top of every turn, the only place a replay can start from
+        if self.turns % self.keyframeTurns == 0:
+            self.file.write(encodeKeyframe(self.inputs, state, rng, arrivedAt))
+            self.file.flush()
+        self.turns += 1
+
+    def ended(self, tick):
+        self.file.write(END.pack(END_KIND, tick))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def encodeKeyframe(inputs, state, rng, arrivedAt):
+    trail = saveFormat.encode(state.miles, state.inventory, state.date, state.player, state.party, state.map)
+    return b"".join([
+        KEYFRAME.pack(KEYFRAME_KIND, inputs, state.tick, -1 if arrivedAt is None else arrivedAt, len(trail)),
+        STREAMS.pack(*rng.getstate()),
+        trail,
+    ])
+
+
+def readLog(data):
+    # returns {"seed", "length", "inputs": [(tick, answer)], "load", "keyframes", "end"}. A
+    # recording cut off partway through a record (the game crashed) is read up to that record
+    if len(data) < HEADER.size:
+        raise ValueError("Not an Oregon Trail recording")
+    magic, version, seed = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not an Oregon Trail recording")
+    if version not in (1, 2, 3, VERSION):
+        raise ValueError(f"Unsupported recording version {version}")
+
+    log = {"version": version, "seed": seed, "length": None, "inputs": [], "load": None, "keyframes": [],
+           "end": None}
+    at = HEADER.size
+    if version >= 3:
+        if at + LENGTH.size > len(data):
+            return log
+        log["length"] = LENGTH.unpack_from(data, at)[0] or None
+        at += LENGTH.size
+    rngRecord = RNG if version == 1 else STREAMS  # what each keyframe holds the random numbers in
+    while at < len(data):
+        kind = data[at]
+        if kind == INPUT_KIND and at + INPUT.size <= len(data):
+            _, tick, size = INPUT.unpack_from(data, at)
+            if at + INPUT.size + size > len(data):
+                break
+            at += INPUT.size
+            log["inputs"].append((tick, data[at:at + size].decode("utf-8")))
+            at += size
+        elif kind == LOAD_KIND and at + LOAD.size <= len(data):
+            _, size = LOAD.unpack_from(data, at)
+            if at + LOAD.size + size > len(data):
+                break
+            at += LOAD.size
+            log["load"] = data[at:at + size]
+            at += size
+        elif kind == KEYFRAME_KIND and at + KEYFRAME.size <= len(data):
+            _, inputs, tick, arrivedAt, size = KEYFRAME.unpack_from(data, at)
+            if at + KEYFRAME.size + rngRecord.size + size > len(data):
+                break
+            at += KEYFRAME.size
+            if version == 1:
+                *internal, hasGauss, gauss = RNG.unpack_from(data, at)
+                rng = (3, tuple(internal), gauss if hasGauss else None)
+            else:
+                rng = STREAMS.unpack_from(data, at)
+            at += rngRecord.size
+            log["keyframes"].append({
+                "inputs": inputs,
+                "tick": tick,
+                "arrivedAt": None if arrivedAt < 0 else arrivedAt,
+                "rng": rng,
+                "trail": data[at:at + size],
+            })
+            at += size
+        elif kind == END_KIND and at + END.size <= len(data):
+            _, log["end"] = END.unpack_from(data, at)
+            at += END.size
+        else:
+            break  # the rest was cut off when the game crashed
+    return log
+
+
+def loadLog(path):
+    with open(path, 'rb') as readBin:
+        return readLog(readBin.read())
@@ -0,0 +1,84 @@
+# Rules parity check - population.py plays the rules as arrays and solver.py works them out
+# as exact chances, both written separately from engine.py. This plays the same loadouts
+# through engine.runTrail and checks that both still agree with it, every ending's share
+# within a few standard errors. Run it after changing a rule, the encounter table or the
+# landmarks. Exits with 1 when something is out. Needs numpy.
+#
+#   python rulesCheck.py --trails 20000
+
+import argparse
+import sys
+from functools import partial
+
+import numpy as np
+
+import batch
+import engine
+import population
+import solver
+import streams
+
+# (profession, (oxen, boxes of ammo, clothes, lbs of food), river) - one for each way across
+CASES = (
+    ("Farmer", (2, 0, 2, 340), "ford"),
+    ("Carpenter", (6, 5, 8, 150), "caulk"),
+    ("Banker", (3, 0, 4, 300), "ferry"),
+)
+ERRORS = 4  # standard errors a share can be off by
+SLACK = 0.002  # and a little more, for endings that almost never happen
+
+
+def monteCarlo(profession, supplies, river, trails, seed):
+    # {outcome: share} from engine.runTrail
+    policy = partial(batch.riverPolicy, river)
+    counts = dict.fromkeys(solver.OUTCOMES, 0)
+    for trail in range(trails):
+        state = engine.newTrail(profession, supplies)
+        counts[engine.runTrail(state, policy, streams.Streams(seed, "check", trail))] += 1
+    return {outcome: count / trails for outcome, count in counts.items()}
+
+
+def vectorized(profession, supplies, river, trails, seed):
+    counts = population.run(population.newPopulation(trails, profession, supplies), river,
+                            np.random.default_rng(seed))
+    return {outcome: count / trails for outcome, count in counts.items()}
+
+
+def allowed(share, trails, otherTrails=None):
+    # how far apart two estimates of share can be, otherTrails None when the other is exact
+    spread = share * (1 - share) * (1 / trails + (0 if otherTrails is None else 1 / otherTrails))
+    return ERRORS * spread ** 0.5 + SLACK
+
+
+def check(trails=20000, seed=0, cases=CASES):
+    # returns [(case, outcome, monte carlo, population, solver, out of line)]
+    rows = []
+    for profession, supplies, river in cases:
+        expected = monteCarlo(profession, supplies, river, trails, seed)
+        arrays = vectorized(profession, supplies, river, trails, seed)
+        exact = solver.solve(river=river).outcomes(supplies)
+        for outcome in solver.OUTCOMES:
+            share = expected[outcome]
+            out = (abs(arrays[outcome] - share) > allowed(share, trails, trails)
+                   or abs(exact[outcome] - share) > allowed(exact[outcome], trails))
+            rows.append(((profession, supplies, river), outcome, share, arrays[outcome], exact[outcome], out))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check population.py and solver.py against engine.py")
+    parser.add_argument("--trails", type=int, default=20000, help="trails per loadout")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'LOADOUT':<34}{'ENDING':<11}{'ENGINE':>9}{'ARRAYS':>9}{'SOLVER':>9}")
+    failed = False
+    for (profession, supplies, river), outcome, share, arrays, exact, out in check(args.trails, args.seed):
+        failed = failed or out
+        loadout = f"{profession} {' '.join(map(str, supplies))} {river}"
+        print(f"{loadout:<34}{outcome:<11}{share:>9.2%}{arrays:>9.2%}{exact:>9.2%}" + ("  OUT" if out else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
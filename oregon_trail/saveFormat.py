@@ -0,0 +1,227 @@
+# Compact binary saves - a few dozen bytes instead of a pickle of every object. The map
+# is stored as the wagon's position plus any landmarks added to it, never the grid of
+# glyphs, and the date as a day number. Terrain laid down with map.setTile is stored
+# as its tile codes, compressed, and a procedural trail from terrain.py as just its seed.
+#
+# Save slots live in one folder: slot-<n>.ots holds the save itself and slots.idx holds
+# a fixed size summary record per slot, so listing thousands of slots is one mmap. The
+# load prompt in main.py lists them and the game menu's Save game writes to one.
+
+import mmap
+import os
+import struct
+import time
+import zlib
+from datetime import datetime
+
+import autosave
+import map
+import terrain
+from gameDate import GameDate
+from gameState import Player, Inventory
+
+MAGIC = b"OTSV"
+VERSION = 3  # version 1 saves, from before maps could be bigger than 255 rows, and 2, from before
+# procedural trails, still load
+
+HEADER = struct.Struct("<4sB")  # magic, version
+# miles, oxen, ammo, clothes, food, date, money, hp, level, map rows, map columns, row, col
+BODY = struct.Struct("<iiiiiiiiBHHHH")
+LANDMARK = struct.Struct("<HH")  # row, col - followed by the symbol
+TILES = struct.Struct("<I")  # size of the compressed tile codes, 0 when the map is all fill
+TERRAIN = struct.Struct("<BQ")  # terrain.VERSION the trail was made with (0 for none), seed
+
+BODY_V1 = struct.Struct("<iiiiiiiiBBBB")  # miles, oxen, ammo, clothes, food, date, money, hp, level, map size, row, col
+LANDMARK_V1 = struct.Struct("<BB")
+
+INDEX_MAGIC = b"OTIX"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sBxxx")  # magic, version
+INDEX_RECORD = struct.Struct("<BxH16s16siiq")  # used, party size, name, profession, miles, date, saved at
+
+
+def packText(text):
+    raw = text.encode("utf-8")
+    if len(raw) > 255:
+        raise ValueError(f"Too long to save: {text[:20]}...")
+    return bytes([len(raw)]) + raw
+
+
+def unpackText(data, at):
+    size = data[at]
+    return data[at + 1:at + 1 + size].decode("utf-8"), at + 1 + size
+
+
+def encode(totalMiles, inventory, dateInGame, player_1, party, theMap):
+    parts = [
+        HEADER.pack(MAGIC, VERSION),
+        BODY.pack(totalMiles, *inventory.snapshot(), dateInGame.day, player_1.money,
+                  player_1.hp, player_1.level, theMap.size, theMap.width, theMap.pRow, theMap.pCol),
+        packText(player_1.name),
+        packText(player_1.profession),
+        bytes([len(theMap.palette) - 1]),  # there is always the fill
+    ]
+    parts += [packText(glyph) for glyph in theMap.palette]
+    parts.append(packText(theMap.pSym))
+    parts.append(bytes([len(party)]))
+    parts += [packText(person) for person in party]
+
+    # whatever was put on the map with map.add
+    landmarks = [LANDMARK.pack(row, col) + packText(symbol) for row, col, symbol in map.landmarks(theMap)]
+    parts.append(struct.pack("<H", len(landmarks)))
+    parts += landmarks
+
+    tiles = b"" if theMap.tiles is None else zlib.compress(theMap.tiles)
+    parts.append(TILES.pack(len(tiles)))
+    parts.append(tiles)
+    if theMap.terrain is None:
+        parts.append(TERRAIN.pack(0, 0))
+    else:
+        parts.append(TERRAIN.pack(terrain.VERSION, theMap.terrain.seed))
+    return b"".join(parts)
+
+
+def decode(data):
+    # returns the same tuple as main.loadGame
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not an Oregon Trail save")
+    if version not in (1, 2, VERSION):
+        raise ValueError(f"Unsupported save version {version}")
+
+    if version == 1:
+        body, landmark = BODY_V1, LANDMARK_V1
+        (totalMiles, oxen, ammo, clothes, food, ordinal, money, hp, level,
+         size, row, col) = body.unpack_from(data, HEADER.size)
+        width = size
+    else:
+        body, landmark = BODY, LANDMARK
+        (totalMiles, oxen, ammo, clothes, food, ordinal, money, hp, level,
+         size, width, row, col) = body.unpack_from(data, HEADER.size)
+    at = HEADER.size + body.size
+    name, at = unpackText(data, at)
+    profession, at = unpackText(data, at)
+    if version == 1:
+        fill, at = unpackText(data, at)
+        palette = [fill]
+    else:
+        count = data[at] + 1
+        at += 1
+        palette = []
+        for _ in range(count):
+            glyph, at = unpackText(data, at)
+            palette.append(glyph)
+    playerSymbol, at = unpackText(data, at)
+    count = data[at]
+    at += 1
+    party = []
+    for _ in range(count):
+        person, at = unpackText(data, at)
+        party.append(person)
+
+    theMap = map.createMap(size, palette[0], playerSymbol, width)
+    theMap.palette = palette
+    map.setPlayerPos(theMap, row, col)
+    count, = struct.unpack_from("<H", data, at)
+    at += 2
+    for _ in range(count):
+        landmarkRow, landmarkCol = landmark.unpack_from(data, at)
+        symbol, at = unpackText(data, at + landmark.size)
+        map.add(theMap, landmarkRow, landmarkCol, symbol)
+    if version != 1:
+        tileSize, = TILES.unpack_from(data, at)
+        at += TILES.size
+        if tileSize:
+            theMap.tiles = bytearray(zlib.decompress(data[at:at + tileSize]))
+        at += tileSize
+    if version >= 3:
+        made, seed = TERRAIN.unpack_from(data, at)
+        if made and made != terrain.VERSION:
+            raise ValueError(f"The trail was made by terrain version {made}, which can't be made again")
+        if made:
+            theMap.terrain = terrain.Terrain(seed, size, width)
+
+    player_1 = Player(name, profession, money, hp, level)
+    inventory = Inventory(oxen, ammo, clothes, food)
+    return totalMiles, inventory, GameDate(ordinal), player_1, party, theMap
+
+
+def isSave(data):
+    return data[:len(MAGIC)] == MAGIC
+
+
+# ---- save slots ----
+
+def slotPath(folder, slot):
+    return os.path.join(folder, f"slot-{slot}.ots")
+
+
+def indexPath(folder):
+    return os.path.join(folder, "slots.idx")
+
+
+def slotRecord(totalMiles, dateInGame, player_1, party):
+    # the summary of a save listSlots shows, made on the game's thread like the save itself
+    return INDEX_RECORD.pack(1, len(party), player_1.name.encode("utf-8")[:16],
+                             player_1.profession.encode("utf-8")[:16], totalMiles, dateInGame.day, int(time.time()))
+
+
+def writeSlot(folder, slot, data, record):
+    # waits on the disk - main.py calls it from another thread
+    os.makedirs(folder, exist_ok=True)
+    autosave.writeAtomic(slotPath(folder, slot), data)
+
+    path = indexPath(folder)
+    try:
+        with open(path, 'xb') as writeBin:  # never truncates an index another game just made
+            writeBin.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION))
+    except FileExistsError:
+        pass
+    with open(path, 'r+b') as writeBin:  # the record is rewritten in place
+        end = writeBin.seek(0, os.SEEK_END)
+        offset = INDEX_HEADER.size + slot * INDEX_RECORD.size
+        if offset > end:
+            writeBin.write(bytes(offset - end))  # unused slots in between
+        writeBin.seek(offset)
+        writeBin.write(record)
+        writeBin.flush()
+        os.fsync(writeBin.fileno())
+
+
+def listSlots(folder):
+    # returns a summary dict per used slot without opening any of the saves
+    try:
+        readBin = open(indexPath(folder), 'rb')
+    except FileNotFoundError:
+        return []
+    with readBin:
+        if os.fstat(readBin.fileno()).st_size <= INDEX_HEADER.size:
+            return []
+        with mmap.mmap(readBin.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            magic, version = INDEX_HEADER.unpack_from(index)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                raise ValueError("Not an Oregon Trail save index")
+            usable = (len(index) - INDEX_HEADER.size) // INDEX_RECORD.size * INDEX_RECORD.size
+            slots = []
+            records = INDEX_RECORD.iter_unpack(index[INDEX_HEADER.size:INDEX_HEADER.size + usable])
+            for slot, (used, partySize, name, profession, miles, ordinal, savedAt) in enumerate(records):
+                if used:
+                    slots.append({
+                        "slot": slot,
+                        "name": name.rstrip(b"\0").decode("utf-8", "replace"),
+                        "profession": profession.rstrip(b"\0").decode("utf-8", "replace"),
+                        "party": partySize,
+                        "miles": miles,
+                        "date": datetime.fromordinal(ordinal),
+                        "savedAt": savedAt,
+                    })
+            return slots
+
+
+def freeSlot(folder):
+    # the first slot no save is using
+    used = {summary["slot"] for summary in listSlots(folder)}
+    slot = 0
+    while slot in used:
+        slot += 1
+    return slot
@@ -0,0 +1,101 @@
+# Timer scheduler for the asyncio game loop - periodic and one-shot game events sit in a
+# priority queue ordered by when they are due, and run() sleeps until the earliest one.
+# New timed mechanics register with every()/after() instead of checking the clock.
+
+import asyncio
+import heapq
+import inspect
+import itertools
+
+
+class Timer:
+    __slots__ = ("when", "interval", "callback", "args", "cancelled")
+
+    def __init__(self, when, interval, callback, args):
+        self.when = when
+        self.interval = interval  # None for a one-shot timer
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    def __init__(self, clock=None):
+        self.clock = clock  # defaults to the event loop's clock once running
+        self.queue = []
+        self.order = itertools.count()  # timers due at the same moment run in the order they were added
+        self.wake = None
+        self.paused = False
+
+    def now(self):
+        if self.clock is None:
+            return asyncio.get_running_loop().time()
+        return self.clock()
+
+    def add(self, delay, interval, callback, args):
+        timer = Timer(self.now() + delay, interval, callback, args)
+        heapq.heappush(self.queue, (timer.when, next(self.order), timer))
+        if self.wake is not None:
+            self.wake.set()  # the new timer might be due before the one run() is sleeping on
+        return timer
+
+    def every(self, seconds, callback, *args):
+        return self.add(seconds, seconds, callback, args)
+
+    def after(self, seconds, callback, *args):
+        return self.add(seconds, None, callback, args)
+
+    def nextDue(self):
+        while self.queue and self.queue[0][2].cancelled:
+            heapq.heappop(self.queue)
+        return self.queue[0][0] if self.queue else None
+
+    async def runDue(self):
+        # runs every timer that is due, a periodic timer once per interval it fell behind
+        now = self.now()
+        while not self.paused:
+            when = self.nextDue()
+            if when is None or when > now:
+                break
+            _, _, timer = heapq.heappop(self.queue)
+            if timer.interval is not None:
+                timer.when += timer.interval  # from when it was due so it never drifts
+                heapq.heappush(self.queue, (timer.when, next(self.order), timer))
+            result = timer.callback(*timer.args)
+            if inspect.isawaitable(result):
+                await result
+
+    async def run(self):
+        # runs timers as they come due until cancelled
+        self.wake = asyncio.Event()
+        try:
+            while True:
+                await self.runDue()
+                when = self.nextDue()
+                self.wake.clear()
+                timeout = None if when is None or self.paused else max(when - self.now(), 0)
+                try:
+                    await asyncio.wait_for(self.wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.wake = None
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        # timers that fell due while paused are pushed back so they don't all fire at once
+        now = self.now()
+        timers = [timer for _, _, timer in self.queue if not timer.cancelled]
+        for timer in timers:
+            if timer.interval is not None and timer.when < now:
+                timer.when += ((now - timer.when) // timer.interval + 1) * timer.interval
+        self.queue = [(timer.when, next(self.order), timer) for timer in timers]
+        heapq.heapify(self.queue)
+        self.paused = False
+        if self.wake is not None:
+            self.wake.set()
@@ -0,0 +1,85 @@
+# Full screen terminal renderer - the header and map are pinned to the top of the
+# terminal and redrawn from an off-screen buffer, while prompts and messages scroll in
+# the space underneath. Only the lines that changed since the last frame are sent,
+# all in one write.
+
+import asyncio
+import shutil
+import sys
+from time import monotonic
+
+ESC = "\x1b["
+
+
+def fits(frameHeight, promptRows=8):
+    # is there room for the frame and enough lines underneath to answer prompts
+    return shutil.get_terminal_size().lines >= frameHeight + promptRows
+
+
+class Screen:
+    def __init__(self, out=sys.stdout, fps=20, clock=monotonic):
+        self.out = out
+        self.minInterval = 1 / fps  # frame rate cap
+        self.clock = clock
+        self.shown = []  # the lines on the terminal right now
+        self.pending = None  # a frame that arrived too soon after the last one
+        self.later = None  # the loop's handle for drawing it once it's allowed to
+        self.lastFrame = None
+        self.height = 0  # rows reserved at the top for the frame
+        self.active = False
+
+    def start(self, frameHeight):
+        # clear the screen and keep the frame out of the scrolling region
+        rows = shutil.get_terminal_size().lines
+        self.height = frameHeight
+        self.shown = [""] * frameHeight
+        self.active = True
+        self.out.write(f"{ESC}2J{ESC}{frameHeight + 1};{rows}r{ESC}{frameHeight + 1};1H")
+        self.out.flush()
+
+    def stop(self):
+        if not self.active:
+            return
+        self.flush()
+        rows = shutil.get_terminal_size().lines
+        self.out.write(f"{ESC}r{ESC}{rows};1H\n")  # give the whole terminal back
+        self.out.flush()
+        self.active = False
+
+    def render(self, lines, force=False):
+        # queue a frame, drawing it now unless the last one went out too recently
+        self.pending = list(lines)
+        now = self.clock()
+        if force or self.lastFrame is None or now - self.lastFrame >= self.minInterval:
+            self.flush()
+        elif self.later is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # no loop to wait on, it goes out with the next frame
+            # the last of a burst of frames still gets drawn, not just the next one after it
+            self.later = loop.call_later(self.minInterval - (now - self.lastFrame), self.flush)
+
+    def flush(self):
+        if self.later is not None:
+            self.later.cancel()
+            self.later = None
+        if self.pending is None:
+            return
+        frame = self.pending[:self.height] + [""] * (self.height - len(self.pending))
+        self.pending = None
+        self.lastFrame = self.clock()
+
+        changes = []
+        for row, (old, new) in enumerate(zip(self.shown, frame)):
+            if old != new:
+                changes.append(f"{ESC}{row + 1};1H{new}{ESC}K")  # rewrite the line and clear the rest
+        if changes:
+            # save the cursor so the prompt underneath doesn't move
+            self.out.write("\x1b7" + "".join(changes) + "\x1b8")
+            self.out.flush()
+        self.shown = frame
+
+    def invalidate(self):
+        # redraw everything on the next frame, e.g. after something else wrote over the frame
+        self.shown = [None] * self.height
@@ -0,0 +1,147 @@
+# Multi-player game server - every TCP/telnet connection plays its own game of The Oregon
+# Trail through the same menus as the terminal version. Sessions are coroutines on one
+# event loop, so an idle player costs a few kilobytes and no thread.
+#
+#   python server.py --port 2323
+#   telnet localhost 2323
+#
+# With --record every game is also written to recordings/ for replay.py. With --metrics
+# the timings from metrics.py for every session are written to a file every few seconds.
+# With --events every session's eventLog events go to one file, each game numbered. With
+# --spectate PORT every game is broadcast live for broadcast.py spectators on that port.
+# With --trail-length ROWS new games are on procedural trails that long, each from its own seed.
+
+import argparse
+import asyncio
+import os
+import re
+import time
+import traceback
+
+import broadcast
+import console
+import eventLog
+import main
+import metrics
+import replayLog
+import terrain
+
+SAVE_DIR = 'saves'
+RECORD_DIR = 'recordings'
+
+
+def savePath(saveName):
+    return os.path.join(SAVE_DIR, saveName + '.bin')
+
+
+async def askSaveName(con):
+    # each player's autosave lives in its own file, and their save slots in a folder of their own
+    saveName = ""
+    while not re.fullmatch(r"[A-Za-z0-9_-]{1,20}", saveName):
+        saveName = (await con.ask("Enter a save name (letters and numbers): ")).strip()
+    return saveName
+
+
+class Server:
+    def __init__(self, maxSessions=10000, record=False, metricsFile=None, metricsEvery=15.0, eventsFile=None,
+                 spectatePort=None, trailLength=None):
+        self.maxSessions = maxSessions
+        self.record = record  # write a replayLog recording of every game
+        self.metricsFile = metricsFile  # where metrics.py's numbers go, None to leave them off
+        self.metricsEvery = metricsEvery
+        self.eventsFile = eventsFile  # where eventLog.py's events go, None to leave them off
+        self.spectatePort = spectatePort  # where spectators connect, None for no broadcast
+        self.hub = None if spectatePort is None else broadcast.Hub()
+        self.trailLength = trailLength  # rows of terrain.py trail for new games, None for the usual one
+        self.sessions = set()
+
+    async def session(self, reader, writer):
+        con = console.StreamConsole(reader, writer)
+        if len(self.sessions) >= self.maxSessions:
+            con.say("The trail is full, try again later.")
+            await con.close()
+            return
+
+        task = asyncio.current_task()
+        self.sessions.add(task)
+        try:
+            os.makedirs(SAVE_DIR, exist_ok=True)
+            saveName = await askSaveName(con)
+            if self.record:
+                os.makedirs(RECORD_DIR, exist_ok=True)
+                con.recorder = replayLog.Recorder(os.path.join(RECORD_DIR, f"{saveName}-{int(time.time())}.otr"))
+            if self.hub is not None:
+                con.channel = self.hub.channel(saveName)
+            await main.main(con, savePath(saveName), trailLength=self.trailLength,
+                            slotFolder=os.path.join(SAVE_DIR, saveName))
+        except (EOFError, ConnectionError):
+            pass  # the player left
+        except Exception:
+            traceback.print_exc()  # one broken game never takes the others down
+        finally:
+            self.sessions.discard(task)
+            if con.recorder is not None:
+                con.recorder.close()
+            if con.channel is not None:
+                con.channel.close()
+            await con.close()
+
+    async def writeMetrics(self):
+        while True:
+            await asyncio.sleep(self.metricsEvery)
+            await asyncio.to_thread(metrics.ACTIVE.write, self.metricsFile)
+
+    async def serve(self, host, port):
+        writing = None
+        if self.metricsFile is not None:
+            metrics.enable()
+            writing = asyncio.ensure_future(self.writeMetrics())
+        if self.eventsFile is not None:
+            eventLog.start(self.eventsFile)
+        spectating = None
+        if self.hub is not None:
+            spectating = asyncio.ensure_future(self.hub.serve(host, self.spectatePort))
+        listener = await asyncio.start_server(self.session, host, port, limit=4096)
+        names = ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+        print(f"Serving The Oregon Trail on {names}")
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            if writing is not None:
+                writing.cancel()
+                metrics.ACTIVE.write(self.metricsFile)  # the last numbers before shutting down
+            if spectating is not None:
+                spectating.cancel()
+            if eventLog.ACTIVE is not None:
+                await eventLog.ACTIVE.settle()  # the held batches go before the end of the log
+            eventLog.stop()
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Host The Oregon Trail over TCP/telnet")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=2323)
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--record", action="store_true", help=f"record every game to {RECORD_DIR}/")
+    parser.add_argument("--metrics", metavar="FILE", help="write timings and counts here, Prometheus text for .prom")
+    parser.add_argument("--metrics-every", type=float, default=15.0, help="seconds between metrics writes")
+    parser.add_argument("--events", metavar="FILE", help="log every game's events here, compact binary for .bin")
+    parser.add_argument("--spectate", type=int, metavar="PORT", help="broadcast every game live to spectators here")
+    parser.add_argument("--trail-length", type=int, metavar="ROWS", help="play procedural trails this many rows long")
+    args = parser.parse_args()
+    if args.trail_length is not None:
+        try:
+            terrain.checkLength(args.trail_length)
+        except ValueError as err:
+            parser.error(str(err))
+    server = Server(args.max_sessions, args.record, args.metrics, args.metrics_every, args.events, args.spectate,
+                    args.trail_length)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    run()
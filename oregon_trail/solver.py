@@ -0,0 +1,355 @@
+# Exact survival odds - a headless trail (engine.runTrail, no menu actions) is a finite
+# Markov chain, so instead of simulating it this works out the probability of every ending
+# from every state by dynamic programming, backwards from the last tick, along with the
+# river choice that gets the most wagons to Oregon City. Needs numpy.
+#
+# The state is compressed to what the rules actually read. The tick fixes the row and the
+# miles left, since the wagon moves the same way whatever happens. HP, ammo, money and the
+# date never decide an ending without the menu, so they drop out. What's left is a grid
+# of food, clothes, oxen and party size, and every encounter or river crossing is a few
+# shifts and running sums over one axis of it. The grid is capped where more makes no
+# difference: food that outlasts every meal left, more oxen than can still be lost. Clothes
+# are capped at CLOTHES_TOP, which is exact unless a wagon carries more than that.
+#
+# One solve covers every loadout and every state of every trail. Solutions are cached
+# (the last SOLUTIONS of them), and looking up a state afterwards is a few array reads.
+#
+#   python solver.py --profession Farmer --supplies 2 0 2 340
+#   python solver.py --profession Banker --best 5
+
+import argparse
+from functools import lru_cache
+
+import numpy as np
+
+import engine
+import map
+import optimizer
+from gameState import ITEMS
+
+OUTCOMES = ("oregon", "starved", "stuck", "frozen", "grim fate")
+OREGON, STARVED, STUCK, FROZEN, GRIM = range(len(OUTCOMES))
+
+PARTY_SIZE = 4
+STARVED_AT = -10  # engine.checkOutcome
+CLOTHES_TOP = 40
+SOLUTIONS = 2  # solutions kept in memory, each is a few tens of MB
+
+
+# each axis of the grid holds low..top, index 0 is everything below low (the wagon is
+# finished) and the top index is top or more
+AXES = ("food", "clothes", "oxen", "party")
+
+
+def riverOdds(choice):
+    # engine.crossRiver as [(probability, {item: change}, party change)], worked out from
+    # engine.RIVER_RISKS - only what's on the grid, so not the ammo or the ferry's fare
+    if choice not in engine.RIVER_RISKS:
+        return [(1.0, {}, 0)]
+    sides, bad, lost = engine.RIVER_RISKS[choice]
+    wrong = len(bad) / sides
+    changes = {item: -howMany for item, howMany in lost.items() if item in AXES and item != "party"}
+    return [(1 - wrong, {}, 0), (wrong, changes, -lost.get("party", 0))]
+
+
+RIVERS = {choice: riverOdds(choice) for choice in engine.RIVER_CHOICES}
+
+
+def schedule(miles=engine.START_MILES, size=engine.MAP_SIZE, maxTicks=10000):
+    # what happens on each tick, the same for every wagon:
+    #   rivers      ticks that start with a crossing
+    #   crossings   {river tick: whether a wagon across has made it}
+    #   checks      {tick: whether a wagon still going has made it} for the ticks engine.tick
+    #               checks the outcome on
+    #   meals       ticks food is eaten on
+    #   encounters  ticks with an encounter
+    #   end         the tick every wagon has finished by
+    #   rows/miles  the row and miles left at the start of each tick
+    row = 0
+    plan = {"rivers": set(), "checks": {}, "crossings": {}, "meals": set(), "encounters": set(),
+            "rows": [], "miles": []}
+    for tick in range(maxTicks):
+        plan["rows"].append(row)
+        plan["miles"].append(miles)
+        if engine.kindAt(row) == "river":
+            plan["rivers"].add(tick)
+            row = min(row + 1, size - 1)
+            plan["crossings"][tick] = miles <= 0 and engine.kindAt(row) == "finish"
+        count = tick + 1
+        if count % engine.FOOD_TICKS and count % engine.ENCOUNTER_TICKS:
+            continue
+        if count % engine.DAY_TICKS == 0:
+            row = min(row + 1, size - 1)
+        if count % engine.FOOD_TICKS == 0:
+            plan["meals"].add(count)
+            miles -= engine.MILES_TRAVELLED
+        if count % engine.ENCOUNTER_TICKS == 0:
+            plan["encounters"].add(count)
+        made = miles <= 0 and engine.kindAt(row) == "finish"
+        plan["checks"][count] = made
+        if made:
+            plan["end"] = count
+            return plan
+    raise ValueError("The trail never reaches Oregon City")
+
+
+class Grid:
+    # the ranges of the four axes, and turning a state into grid indexes
+    def __init__(self, plan, clothesTop=CLOTHES_TOP):
+        meals = len(plan["meals"])
+        losses = len(plan["encounters"]) + len(plan["rivers"])  # oxen that can still die
+        self.low = {"food": STARVED_AT + 1, "clothes": 0, "oxen": 1, "party": 1}
+        self.top = {"food": engine.FOOD_EATEN * (meals + 1), "clothes": clothesTop, "oxen": losses + 1,
+                    "party": PARTY_SIZE}
+        self.size = {axis: self.top[axis] - self.low[axis] + 1 for axis in AXES}
+
+    def index(self, axis, value):
+        return min(max(value - self.low[axis] + 1, 0), self.size[axis])
+
+    def indexes(self, food, clothes, oxen, party):
+        # into an array of living wagons (no index 0), None when the wagon is already finished
+        at = tuple(self.index(axis, value) - 1 for axis, value in zip(AXES, (food, clothes, oxen, party)))
+        return None if min(at) < 0 else at
+
+
+def extend(grid, values, made):
+    # values for every living wagon (outcome, food, clothes, oxen, party) -> the same with
+    # index 0 added to every axis for the wagons that just finished, in engine.checkOutcome's
+    # order: the first rule that matches wins, so fill in reverse
+    shape = (len(OUTCOMES),) + tuple(grid.size[axis] + 1 for axis in AXES)
+    full = np.zeros(shape)
+    full[:, 1:, 1:, 1:, 1:] = values
+    ending = lambda outcome: np.eye(len(OUTCOMES))[outcome].reshape(-1, 1, 1, 1)
+    full[:, :, 0, :, :] = ending(FROZEN)
+    if made:
+        full[:, 1:, :, 1:, 1:] = np.eye(len(OUTCOMES))[OREGON].reshape(-1, 1, 1, 1, 1)
+    full[:, :, :, :, 0] = ending(GRIM)
+    full[:, 0, :, :, :] = ending(STARVED)
+    full[:, :, :, 0, :] = ending(STUCK)
+    return full
+
+
+def windowMean(values, axis, grid, name, first, count, low, high):
+    # mean over a in low..high of values at u + a, for u = first .. first + count - 1 along axis
+    positions = np.arange(first + low, first + count + high) - grid.low[name] + 1
+    if 0 <= positions[0] and positions[-1] <= grid.size[name]:
+        padded = values[(slice(None),) * axis + (slice(positions[0], positions[-1] + 1),)]  # no copy
+    else:
+        padded = np.take(values, np.clip(positions, 0, grid.size[name]), axis=axis)
+    if low == high:
+        return padded  # a fixed change, nothing to average
+    sums = np.cumsum(padded, axis=axis)
+    zero = np.zeros_like(np.take(sums, [0], axis=axis))
+    sums = np.concatenate([zero, sums], axis=axis)
+    width = high - low + 1
+    upper = np.take(sums, np.arange(width, width + count), axis=axis)
+    lower = np.take(sums, np.arange(count), axis=axis)
+    return (upper - lower) / width
+
+
+def applyAxis(values, axis, grid, name, before=0, steal=False, change=0, low=0, high=0):
+    # the expected value for every living amount v along axis when the amount becomes
+    # steal(v + before) + change + a random low..high - engine.applyEncounter's order
+    axis += 1  # past the outcome axis
+    amounts = np.arange(grid.low[name], grid.top[name] + 1) + before
+    if not steal:
+        return windowMean(values, axis, grid, name, amounts[0] + change, len(amounts), low, high)
+    # a thief leaves anything from 0 to what there was, or nothing changes below 0
+    first = min(amounts[0], 0)
+    after = windowMean(values, axis, grid, name, first + change, amounts[-1] - first + 1, low, high)
+    sums = np.cumsum(np.take(after, np.arange(-first, after.shape[axis]), axis=axis), axis=axis)
+    kept = np.take(after, np.clip(amounts - first, 0, None), axis=axis)
+    shape = [1] * after.ndim
+    shape[axis] = len(amounts)
+    average = np.take(sums, np.clip(amounts, 0, None), axis=axis) / (np.clip(amounts, 0, None) + 1).reshape(shape)
+    return np.where((amounts >= 0).reshape(shape), average, kept)
+
+
+def applyChanges(full, grid, changes):
+    # changes is {axis name: applyAxis keyword arguments}, the other axes stay as they are
+    values = full
+    for axis, name in enumerate(AXES):
+        values = applyAxis(values, axis, grid, name, **changes.get(name, {}))
+    return values
+
+
+def encounterChanges(event, meal):
+    # engine.applyEncounter as grid changes - ammo and hp never decide an ending
+    changes = {name: {} for name in AXES}
+    if meal:
+        changes["food"]["before"] = -engine.FOOD_EATEN
+    if event.get("steal") in AXES:
+        changes[event["steal"]]["steal"] = True
+    for item, (low, high) in event.get("found", {}).items():
+        if item in AXES:
+            changes[item].update(low=low, high=high)
+    for item in ITEMS:
+        if item in event and item in AXES:
+            changes[item]["change"] = event[item]
+    if event.get("victim") == "dies":
+        changes["party"]["change"] = -1
+    return changes
+
+
+class Solution:
+    def __init__(self, plan, grid, river):
+        self.plan = plan
+        self.grid = grid
+        self.river = river  # the choice at every river, None for the best one
+        self.survival = {}  # tick -> chance of reaching Oregon City for every living wagon
+        self.choices = {}  # river tick -> index into engine.RIVER_CHOICES for every living wagon
+        self.start = None  # every ending's chance from the start, for every loadout
+
+    def stored(self, tick):
+        return tick == 0 or tick in self.plan["rivers"] or tick + 1 in self.plan["encounters"]
+
+    def settle(self, tick, food, clothes, oxen, party):
+        # moves a wagon on through the ticks nothing random happens on - returns
+        # (tick, indexes) at the next tick there's a table for, or (None, outcome index)
+        grid = self.grid
+        while True:
+            ending = outcomeOf(food, clothes, oxen, party)
+            if ending is not None:
+                return None, ending
+            if self.stored(tick):
+                return tick, grid.indexes(food, clothes, oxen, party)
+            count = tick + 1
+            if count in self.plan["meals"]:
+                food -= engine.FOOD_EATEN
+            if count in self.plan["checks"]:
+                if outcomeOf(food, clothes, oxen, party) is None and self.plan["checks"][count]:
+                    return None, OREGON
+            tick = count
+
+    def odds(self, tick, food, clothes, oxen, party):
+        # the chance of reaching Oregon City from a wagon about to play tick
+        tick, at = self.settle(tick, food, clothes, oxen, party)
+        if tick is None:
+            return 1.0 if at == OREGON else 0.0
+        return float(self.survival[tick][at])
+
+    def riverChoice(self, tick, food, clothes, oxen, party):
+        # the best way across the river at the start of tick, None when tick isn't at a river
+        if tick not in self.choices:
+            return None
+        at = self.grid.indexes(food, clothes, oxen, party)
+        return None if at is None else engine.RIVER_CHOICES[self.choices[tick][at]]
+
+    def outcomes(self, supplies, party=PARTY_SIZE):
+        # every ending's chance for a loadout - (oxen, boxes of ammo, clothes, lbs of food)
+        oxen, _, clothes, food = supplies
+        at = self.grid.indexes(food, clothes, oxen, party)
+        if at is None:
+            return dict(zip(OUTCOMES, np.eye(len(OUTCOMES))[outcomeOf(food, clothes, oxen, party)]))
+        return {outcome: float(self.start[(number,) + at]) for number, outcome in enumerate(OUTCOMES)}
+
+
+def outcomeOf(food, clothes, oxen, party):
+    # engine.checkOutcome for the four things it reads besides the row and miles
+    if oxen <= 0:
+        return STUCK
+    elif food <= STARVED_AT:
+        return STARVED
+    elif party <= 0:
+        return GRIM
+    elif clothes < 0:
+        return FROZEN
+    return None
+
+
+@lru_cache(maxsize=SOLUTIONS)
+def solve(miles=engine.START_MILES, river=None, clothesTop=CLOTHES_TOP):
+    plan = schedule(miles)
+    grid = Grid(plan, clothesTop)
+    solution = Solution(plan, grid, river)
+    weights = [event["weight"] for event in engine.ENCOUNTERS["events"]]
+    chances = [weight / sum(weights) for weight in weights]
+
+    values = np.zeros((len(OUTCOMES),) + tuple(grid.size[axis] for axis in AXES))
+    for tick in range(plan["end"] - 1, -1, -1):
+        count = tick + 1
+        if count in plan["checks"]:
+            full = extend(grid, values, plan["checks"][count])
+            meal = count in plan["meals"]
+            if count in plan["encounters"]:
+                values = sum(chance * applyChanges(full, grid, encounterChanges(event, meal))
+                             for chance, event in zip(chances, engine.ENCOUNTERS["events"]))
+            else:
+                values = applyChanges(full, grid, {"food": {"before": -engine.FOOD_EATEN}} if meal else {})
+
+        if tick in plan["rivers"]:
+            full = extend(grid, values, plan["crossings"][tick])
+            options = []
+            for choice in engine.RIVER_CHOICES:
+                option = 0
+                for chance, items, partyChange in RIVERS[choice]:
+                    changes = {item: {"change": change} for item, change in items.items()}
+                    changes["party"] = {"change": partyChange}
+                    option = option + chance * applyChanges(full, grid, changes)
+                options.append(option)
+            if river is None:
+                best = np.argmax(np.stack([option[OREGON] for option in options]), axis=0)
+            else:
+                best = np.full(values.shape[1:], engine.RIVER_CHOICES.index(river))
+            solution.choices[tick] = best.astype(np.int8)
+            values = np.choose(best, options)
+
+        if solution.stored(tick):
+            solution.survival[tick] = values[OREGON].astype(np.float32)
+    solution.start = values.astype(np.float32)
+    return solution
+
+
+def trailOdds(state, solution=None):
+    # (chance of reaching Oregon City, best river choice or None) for a live gameState.Trail,
+    # None when the trail isn't where the standard trail would be on its tick
+    solution = solve() if solution is None else solution
+    plan = solution.plan
+    tick = state.tick
+    if tick >= len(plan["rows"]) or plan["rows"][tick] != map.getPlayerPos(state.map) \
+            or plan["miles"][tick] != state.miles:
+        return None
+    inventory = state.inventory
+    wagon = (tick, inventory.food, inventory.clothes, inventory.oxen, len(state.party))
+    return solution.odds(*wagon), solution.riverChoice(*wagon)
+
+
+def best(profession, solution, count=10):
+    # every loadout the profession can afford, ranked by the chance of reaching Oregon City
+    top = solution.grid.top  # ammo never helps, more than top doesn't either
+    loadouts = optimizer.candidates(profession, step=1, maxOxen=top["oxen"], maxAmmo=0, maxClothes=top["clothes"])
+    ranked = [(solution.outcomes(supplies), supplies) for supplies in loadouts]
+    ranked.sort(key=lambda row: row[0]["oregon"], reverse=True)
+    return ranked[:count]
+
+
+def report(profession, rows):
+    print(f"{'PROFESSION':<11}{'OXEN':>5}{'AMMO':>6}{'CLOTHES':>8}{'FOOD':>6}"
+          + "".join(f"{outcome.upper():>11}" for outcome in OUTCOMES))
+    for odds, (oxen, ammo, clothes, food) in rows:
+        print(f"{profession:<11}{oxen:>5}{ammo:>6}{clothes:>8}{food:>6}"
+              + "".join(f"{odds[outcome]:>11.2%}" for outcome in OUTCOMES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact chances of every ending of a headless trail")
+    parser.add_argument("--profession", choices=list(engine.PROFESSIONS), default="Farmer")
+    parser.add_argument("--supplies", type=int, nargs=4, metavar=("OXEN", "AMMO", "CLOTHES", "FOOD"))
+    parser.add_argument("--best", type=int, default=10, help="how many of the best loadouts to show")
+    parser.add_argument("--river", choices=engine.RIVER_CHOICES, help="always cross this way (default: the best way)")
+    args = parser.parse_args()
+
+    if args.supplies:
+        try:
+            engine.newTrail(args.profession, args.supplies)  # the way batch.py's trails are bought
+        except ValueError as err:
+            parser.error(str(err))
+    solution = solve(river=args.river)
+    if args.supplies:
+        report(args.profession, [(solution.outcomes(args.supplies), tuple(args.supplies))])
+    else:
+        report(args.profession, best(args.profession, solution, args.best))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Cold start check - how long a fresh interpreter takes to import each entry point, against
+# a budget. Batch workers and server processes pay this on every start, so run it after
+# changing what gets imported. Exits with 1 when something is over budget.
+#
+#   python startupBudget.py --runs 10
+
+import argparse
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+BUDGETS = {"engine": 40, "batch": 80, "main": 150, "server": 160}  # milliseconds
+
+
+def importTime(module):
+    # (milliseconds to import module in a new interpreter, how many pieces of art it read)
+    code = f"import {module}, ascii; print(len(ascii.ART))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=HERE,
+                            capture_output=True, text=True, check=True)
+    for line in reversed(result.stderr.splitlines()):
+        name = line.rsplit("|", 1)[-1].strip()
+        if name == module:
+            return int(line.split("|")[1]) / 1000, int(result.stdout)
+    raise ValueError(f"No import time for {module}")
+
+
+def check(runs=5, budgets=BUDGETS):
+    # returns {module: (best time, budget, art read)}, best of runs to leave out a busy machine
+    results = {}
+    for module, budget in budgets.items():
+        times = [importTime(module) for _ in range(runs)]
+        results[module] = (min(ms for ms, _ in times), budget, max(art for _, art in times))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check how fast the game's modules import")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module, (ms, budget, art) in check(args.runs).items():
+        over = ms > budget or art > 0
+        failed = failed or over
+        print(f"{module:<8}{ms:>8.1f} ms  budget {budget} ms  art read {art}" + ("  OVER" if over else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Counter-based random numbers - a stream is a key and a position, and the numbers at any
+# position are worked out from those two alone (BLAKE2b of the key and the block number).
+# Nothing depends on what else drew numbers first or on which process plays what, so trail
+# 7 of a batch is the same trail however the batch is split up, and a stream can jump to any
+# position without drawing what comes before it.
+#
+# Streams split by name. A master seed gives every run its own Streams, and every run gives
+# encounters, rivers and hunting a stream each, so crossing a river another way doesn't
+# change which encounters come next. Numbers are worked out a block at a time, one hash for
+# eight of them, and handed out from there - randint() costs less than random.Random's.
+#
+#   rng = streams.Streams(seed, "batch", 7)
+#   engine.runTrail(state, rng=rng)
+
+import hashlib
+import struct
+
+VERSION = 1  # bump if the numbers a key and position give ever change
+BLOCK = 8  # numbers worked out at a time, a 64 byte hash
+BLOCK_FORMAT = struct.Struct(f"<{BLOCK}Q")
+SCALE = 2.0 ** -53
+
+PARTS = ("game", "encounters", "rivers", "hunting")  # the game stream is for anything else
+
+
+def derive(*names):
+    # the key of the stream named by names, ints, text or a parent key
+    return hashlib.blake2b(repr(names).encode("utf-8"), digest_size=16).digest()
+
+
+class Stream:
+    __slots__ = ("key", "next", "numbers", "at")
+
+    def __init__(self, key, position=0):
+        self.key = key
+        self.next = 0
+        self.numbers = ()
+        self.at = 0
+        if position:
+            self.seek(position)
+
+    def split(self, name):
+        # a stream of its own, never overlapping this one
+        return Stream(derive(self.key, name))
+
+    def seek(self, position):
+        self.next, at = divmod(position, BLOCK)  # the block to work out next
+        self.numbers = ()
+        self.at = 0
+        if at:
+            self.refill()
+            self.at = at
+
+    def position(self):
+        # numbers drawn so far
+        return (self.next - len(self.numbers) // BLOCK) * BLOCK + self.at
+
+    def refill(self):
+        data = hashlib.blake2b(self.key + self.next.to_bytes(8, "little")).digest()
+        self.numbers = BLOCK_FORMAT.unpack(data)  # 64 bit numbers, turned into floats as they're used
+        self.next += 1
+        self.at = 0
+
+    def random(self):
+        # like random.random(), 0 <= number < 1 with 53 bits like a float has
+        at = self.at
+        if at == len(self.numbers):
+            self.refill()
+            at = 0
+        self.at = at + 1
+        return (self.numbers[at] >> 11) * SCALE
+
+    def randint(self, low, high):
+        # like random.randint(), high included
+        at = self.at
+        if at == len(self.numbers):
+            self.refill()
+            at = 0
+        self.at = at + 1
+        return low + ((self.numbers[at] >> 11) * (high - low + 1) >> 53)
+
+
+class Streams:
+    # one run's streams, one per part of the game - passes for a random.Random anywhere
+    # the game takes an rng
+    __slots__ = ("key",) + PARTS
+
+    def __init__(self, seed, *run):
+        self.key = derive(seed, *run)
+
+    def __getattr__(self, name):
+        # each part's stream is made the first time it's used, most trails never hunt
+        if name not in PARTS:
+            raise AttributeError(name)
+        stream = Stream(self.key + bytes([PARTS.index(name)]))
+        setattr(self, name, stream)
+        return stream
+
+    def random(self):
+        return self.game.random()
+
+    def randint(self, low, high):
+        return self.game.randint(low, high)
+
+    def getstate(self):
+        return tuple(getattr(self, name).position() for name in PARTS)
+
+    def setstate(self, state):
+        for name, position in zip(PARTS, state):
+            getattr(self, name).seek(position)
+
+
+def part(rng, name):
+    # the stream for one part of the game - a random.Random or the random module has just
+    # the one stream for everything
+    return getattr(rng, name) if type(rng) is Streams else rng
@@ -0,0 +1,107 @@
+# Procedural trails - terrain, rivers and forts worked out from a seed, CHUNK_ROWS rows at a
+# time, instead of the landmarks.json trail. A chunk is only made when something looks at
+# one of its rows (drawing the map around the wagon looks a few rows ahead, so the next one
+# is made as the wagon gets near it) and is never saved: every chunk has a streams.Stream
+# of its own, so it comes out the same whenever and in whatever order it's made again. The
+# last CHUNKS chunks used are kept, older ones are dropped and made again if they're needed.
+# A trail can be as long as a map can be, and a save or recording only needs the seed.
+#
+#   m = terrain.createMap(seed, 500)      (a 500 row trail)
+#   engine.landmarksOf(m).get(row)        (the landmark on a row, like landmarkTable's)
+
+from functools import lru_cache
+
+import map
+import streams
+
+VERSION = 1  # bump if the trail a seed gives ever changes, saves of the old ones won't load
+CHUNK_ROWS = 16
+CHUNKS = 4096  # chunks kept across every game being played, a few hundred bytes each
+MIN_ROWS = 2  # Fort Boise and Oregon City
+MAX_ROWS = 0xFFFF  # saves hold the rows in 16 bits
+SEEDS = 2 ** 64  # and the seed in 64, bigger or negative seeds wrap around
+
+PALETTE = (" ⛰ ", " 🌲 ", " 🌾 ", " 🌊 ", " 🏰 ")
+MOUNTAINS, FOREST, PLAINS, WATER, FORT = range(len(PALETTE))
+SAME = 0.6  # chance a tile is the same as the one above it, so the terrain comes in patches
+RIVER_CHANCE = 0.15  # of any row being a river
+FORT_CHANCE = 0.08
+
+NAMES = ("Bear", "Cedar", "Cold", "Crow", "Elk", "Grand", "Green", "Horse", "Lone", "Pine", "Red", "Salt",
+         "Silver", "Stone", "Willow", "Wolf")
+ENDINGS = ("bridge", "field", "ford", "hill", "rock", "ton", "view", "wood")
+
+START = {"name": "Fort Boise", "row": 0, "kind": "fort"}
+
+
+class Terrain:
+    # what a map's rows hold - shared by every copy of the map, it never changes
+    __slots__ = ("seed", "size", "width", "finish")
+
+    def __init__(self, seed, size, width):
+        checkLength(size)
+        self.seed = seed % SEEDS
+        self.size = size
+        self.width = width
+        self.finish = {"name": "Oregon City", "row": size - 1, "kind": "finish"}
+
+    def __eq__(self, other):
+        # the same trail however many times it's made, so snapshots of a map compare equal
+        return type(other) is Terrain and (self.seed, self.size, self.width) == (other.seed, other.size, other.width)
+
+    def __hash__(self):
+        return hash((self.seed, self.size, self.width))
+
+    def get(self, row, default=None):
+        # the landmark on a row, looked up the same way as a landmarkTable table
+        if row == 0:
+            return START
+        if row == self.size - 1:
+            return self.finish
+        return chunk(self.seed, row // CHUNK_ROWS, self.width)[1].get(row, default)
+
+    def row(self, row):
+        # the tile codes along a row, indexes into PALETTE
+        return chunk(self.seed, row // CHUNK_ROWS, self.width)[0][row % CHUNK_ROWS]
+
+
+def checkLength(rows):
+    if not MIN_ROWS <= rows <= MAX_ROWS:
+        raise ValueError(f"A trail has to be {MIN_ROWS} to {MAX_ROWS} rows long, not {rows}")
+
+
+@lru_cache(maxsize=CHUNKS)
+def chunk(seed, index, width):
+    # (tile codes for each row, {row: landmark}) for rows index * CHUNK_ROWS onwards
+    stream = streams.Stream(streams.derive(seed, "terrain", index))
+    rows = []
+    landmarks = {}
+    above = None
+    for row in range(index * CHUNK_ROWS, (index + 1) * CHUNK_ROWS):
+        roll = stream.random()
+        if row > 0 and roll < RIVER_CHANCE:
+            landmarks[row] = {"name": f"{NAMES[stream.randint(0, len(NAMES) - 1)]} River", "row": row,
+                              "kind": "river"}
+            rows.append(bytes([WATER]) * width)
+            above = None  # the far bank starts new patches
+            continue
+        codes = bytearray(width)
+        for col in range(width):
+            if above is not None and stream.random() < SAME:
+                codes[col] = above[col]
+            else:
+                codes[col] = stream.randint(MOUNTAINS, PLAINS)
+        above = bytes(codes)  # the fort isn't part of the patches below it
+        if row > 0 and roll < RIVER_CHANCE + FORT_CHANCE:
+            name = f"Fort {NAMES[stream.randint(0, len(NAMES) - 1)]}{ENDINGS[stream.randint(0, len(ENDINGS) - 1)]}"
+            landmarks[row] = {"name": name, "row": row, "kind": "fort", "art": f"fort_{stream.randint(1, 2)}",
+                              "message": f"Welcome to {name}. The shop is open."}
+            codes[stream.randint(0, width - 1)] = FORT
+        rows.append(bytes(codes))
+    return tuple(rows), landmarks
+
+
+def createMap(seed, size, width=10, playerSymbol=" 𖥞 "):
+    # a trail of size rows made from seed, Fort Boise at the top and Oregon City at the bottom
+    return map.Map(size, PALETTE[0], playerSymbol, width=width, palette=list(PALETTE),
+                   terrain=Terrain(seed, size, width))
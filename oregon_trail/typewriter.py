@@ -0,0 +1,23 @@
+# Typewriter text - messages are written a chunk at a time instead of one print and sleep
+# per character. Console.typeOut does the writing and waiting, and pressing Enter while a
+# message is typing finishes it straight away.
+#
+# DELAY_SCALE slows down or speeds up every message: 1 is normal, 0.5 is twice as fast
+# and 0 prints instantly. It can also be set with the OREGON_TRAIL_TEXT_DELAY variable.
+
+import os
+
+DELAY_SCALE = float(os.environ.get("OREGON_TRAIL_TEXT_DELAY", 1))
+CHUNK_SECONDS = 1 / 30  # how often the terminal gets written to while typing
+
+
+def chunks(text, delay=0.03):
+    # yields (start, chunk, pause) - each piece of text and how long to wait after it
+    delay *= DELAY_SCALE
+    if delay <= 0 or not text:
+        yield 0, text, 0
+        return
+    perChunk = max(1, int(CHUNK_SECONDS / delay))  # characters written each time
+    for start in range(0, len(text), perChunk):
+        chunk = text[start:start + perChunk]
+        yield start, chunk, delay * len(chunk)